@@ -500,6 +500,11 @@ function buildSmartReply(input: string): string {
   return buildAdvancedProductRecommendations(input)
 }
 
+// Latency budget handed to the Python service; it falls back to its own dataset
+// engine before this runs out, so the fetch only needs a little headroom on top
+const ML_DEADLINE_MS = 2500
+const ML_FETCH_TIMEOUT_MS = ML_DEADLINE_MS + 1000
+
 // Enhanced ML-powered chatbot integration
 async function getMLResponse(userInput: string): Promise<string | null> {
   try {
@@ -510,14 +515,13 @@ async function getMLResponse(userInput: string): Promise<string | null> {
         const response = await fetch(url, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ message: userInput }),
-          // Increase timeout a bit for heavier models
-          signal: AbortSignal.timeout(10000)
+          body: JSON.stringify({ message: userInput, deadline_ms: ML_DEADLINE_MS }),
+          signal: AbortSignal.timeout(ML_FETCH_TIMEOUT_MS)
         })
 
         if (response.ok) {
           const data = await response.json()
-          console.log('✅ ML Response received from', url, '- Intent:', data.intent) // Debug log
+          console.log('✅ ML Response received from', url, '- Intent:', data.intent, '- Engine:', data.engine, '- Budget left:', data.budget_remaining_ms) // Debug log
           if (data && data.response) return data.response
         } else {
           console.log('⚠️ ML endpoint', url, 'returned status', response.status)
@@ -15,8 +15,6 @@ import pickle
 import os
 import logging
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 import warnings
 warnings.filterwarnings('ignore')
 
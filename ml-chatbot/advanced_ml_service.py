@@ -6,30 +6,42 @@ Deep dataset and website structure understanding with intelligent query processi
 import os
 import pandas as pd
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import pickle
 import re
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
 import logging
 from datetime import datetime
 import json
 from typing import Dict, List, Tuple, Any
+from forest_compiler import CompiledForest, check_parity
+from answer_compiler import advanced_signature, dataset_version, load_compiled_answers
+from single_flight import SingleFlight
+from service_logging import configure_logging, logging_stats
+from live_profiler import install_profile_endpoint
+from catalog_accounting import accountant_from_env
+from slow_requests import annotate, install_slow_request_endpoint, watchdog_from_env
+from semantic_cache import cache_from_env
+from streaming_catalog import catalog_path
+from catalog_schema import TRAINING_ONLY, compact_enabled, compact_frame
+from catalog_core import ColumnarCatalog, cluster_keys
+from service_metrics import (REGISTRY, REQUESTS, REQUEST_SECONDS, ERRORS, PROMETHEUS_CONTENT_TYPE,
+                             stage, stats_collector)
 import warnings
 warnings.filterwarnings('ignore')
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging('advanced_ml_service')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
+# Identical in-flight /chat messages share one computation
+chat_flight = SingleFlight()
+
 class AdvancedJewelryBot:
     def __init__(self):
         """Initialize the advanced jewelry bot with deep dataset understanding"""
@@ -39,11 +51,15 @@ class AdvancedJewelryBot:
         # Load and process datasets
         self.jewelry_df = None
         self.diamonds_df = None
+        self.jewelry_catalog = None
+        self.diamonds_catalog = None
         self.combined_knowledge = {}
         
         # ML models and components
         self.tfidf_vectorizer = TfidfVectorizer(max_features=5000, stop_words='english', ngram_range=(1, 3))
         self.intent_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.compiled_intent_classifier = None
+        self.semantic_cache = None
         self.diamond_recommender = None
         self.jewelry_recommender = None
         
@@ -96,6 +112,14 @@ class AdvancedJewelryBot:
         self.load_datasets()
         self.process_datasets()
         self.train_models()
+        if compact_enabled():
+            self.compact_datasets()
+        # Handlers query the NumPy catalogs; the frames stay for training and fingerprinting
+        self.jewelry_catalog = ColumnarCatalog.from_frame(self.jewelry_df, cluster_by=cluster_keys('jewelry'))
+        self.diamonds_catalog = ColumnarCatalog.from_frame(self.diamonds_df, cluster_by=cluster_keys('diamonds'))
+        self.semantic_cache = cache_from_env(len(getattr(self.tfidf_vectorizer, 'vocabulary_', {})))
+        self.dataset_version = dataset_version(self)
+        self.compiled_answers = load_compiled_answers(self, self.dataset_version)
         
         logger.info(f"🚀 {self.app_name} v{self.version} initialized successfully!")
         logger.info(f"📊 Loaded {len(self.jewelry_df)} jewelry items and {len(self.diamonds_df)} diamonds")
@@ -104,7 +128,7 @@ class AdvancedJewelryBot:
         """Load both jewelry and diamond datasets"""
         try:
             # Load jewelry dataset
-            jewelry_path = "../datasets/jewelry_dataset.csv"
+            jewelry_path = catalog_path("jewelry_dataset.csv", "../datasets/jewelry_dataset.csv")
             if os.path.exists(jewelry_path):
                 self.jewelry_df = pd.read_csv(jewelry_path)
                 logger.info(f"✅ Loaded jewelry dataset: {len(self.jewelry_df)} items")
@@ -112,7 +136,7 @@ class AdvancedJewelryBot:
                 logger.warning("⚠️ Jewelry dataset not found")
                 
             # Load diamonds dataset
-            diamonds_path = "../datasets/diamonds_dataset.csv"
+            diamonds_path = catalog_path("diamonds_dataset.csv", "../datasets/diamonds_dataset.csv")
             if os.path.exists(diamonds_path):
                 self.diamonds_df = pd.read_csv(diamonds_path)
                 logger.info(f"✅ Loaded diamonds dataset: {len(self.diamonds_df)} items")
@@ -181,6 +205,11 @@ class AdvancedJewelryBot:
                 labels=['Small', 'Medium', 'Large', 'Very Large']
             )
     
+    def compact_datasets(self):
+        """Shrink the served frames once training is done: categorical strings, narrow numbers, no training-only columns"""
+        self.jewelry_df = compact_frame(self.jewelry_df, 'jewelry')
+        self.diamonds_df = compact_frame(self.diamonds_df, 'diamonds', drop=TRAINING_ONLY['diamonds'])
+    
     def _determine_style(self, row):
         """Determine jewelry style based on characteristics"""
         if row['type'] in ['engagement', 'wedding']:
@@ -240,6 +269,7 @@ class AdvancedJewelryBot:
             
             # Train intent classifier
             self.intent_classifier.fit(X, training_labels)
+            self._compile_intent_classifier(X)
             
             # Train product recommenders if data is available
             if self.jewelry_df is not None and len(self.jewelry_df) > 0:
@@ -253,6 +283,19 @@ class AdvancedJewelryBot:
         except Exception as e:
             logger.error(f"❌ Error training models: {e}")
     
+    def _compile_intent_classifier(self, X):
+        """Flatten the forest for request-time inference, keeping it only if predictions match"""
+        try:
+            compiled = CompiledForest.from_sklearn(self.intent_classifier)
+            parity = check_parity(self.intent_classifier, compiled, X)
+            if parity['ok']:
+                self.compiled_intent_classifier = compiled
+                logger.info(f"✅ Compiled intent forest ({compiled.n_trees} trees, {len(compiled.feature)} nodes)")
+            else:
+                logger.warning(f"⚠️ Compiled forest disagrees with sklearn on {parity['mismatches']} samples, using predict()")
+        except Exception as e:
+            logger.error(f"Error compiling intent classifier: {e}")
+    
     def _train_jewelry_recommender(self):
         """Train jewelry recommendation model"""
         try:
@@ -291,16 +334,29 @@ class AdvancedJewelryBot:
         """Process user query with advanced understanding"""
         try:
             # Clean and analyze the message
-            cleaned_message = self._clean_message(message)
+            with stage('clean'):
+                cleaned_message = self._clean_message(message)
             
             # Classify intent
-            intent = self._classify_intent(cleaned_message)
+            with stage('tfidf'):
+                X = self.tfidf_vectorizer.transform([cleaned_message])
+            with stage('classify'):
+                intent = self._classify_intent(cleaned_message, X)
             
             # Extract entities
-            entities = self._extract_entities(cleaned_message)
+            with stage('extract'):
+                entities = self._extract_entities(cleaned_message)
+            annotate(intent, entities)
             
-            # Generate intelligent response based on intent and entities
-            response = self._generate_intelligent_response(intent, entities, cleaned_message)
+            # Answer from the compiled table, falling back to the live handlers
+            response, engine = None, 'compiled'
+            if self.compiled_answers is not None:
+                with stage('compiled_lookup'):
+                    response = self.compiled_answers.lookup(intent, entities, cleaned_message)
+            if response is None:
+                with stage('respond'):
+                    response, engine = self._live_response(X, intent, entities, cleaned_message)
+            REQUESTS.inc(intent=intent, engine=engine)
             
             return {
                 'response': response,
@@ -313,6 +369,7 @@ class AdvancedJewelryBot:
             
         except Exception as e:
             logger.error(f"Error processing query: {e}")
+            REQUESTS.inc(intent='error', engine='error_fallback')
             return {
                 'response': "I apologize, but I'm having trouble processing your request. Could you please rephrase your question?",
                 'intent': 'error',
@@ -322,6 +379,26 @@ class AdvancedJewelryBot:
                 'timestamp': datetime.now().isoformat()
             }
     
+    def _live_response(self, X, intent: str, entities: Dict, message: str) -> Tuple[str, str]:
+        """Run the handlers, reusing the answer of a near-duplicate query when cached"""
+        if self.semantic_cache is None:
+            return self._generate_intelligent_response(intent, entities, message), 'handlers'
+        
+        # The handlers also branch on words outside the TF-IDF vocabulary, which the fingerprint
+        # cannot see; the compiled-answer signature captures every input they branch on
+        guard = advanced_signature(intent, entities, message)
+        if guard is None:
+            return self._generate_intelligent_response(intent, entities, message), 'handlers'
+        
+        fingerprint = self.semantic_cache.fingerprint(X)
+        response = self.semantic_cache.get(fingerprint, guard)
+        if response is not None:
+            return response, 'semantic_cache'
+        
+        response = self._generate_intelligent_response(intent, entities, message)
+        self.semantic_cache.put(fingerprint, guard, response)
+        return response, 'handlers'
+    
     def _clean_message(self, message: str) -> str:
         """Clean and normalize the message"""
         # Convert to lowercase
@@ -342,12 +419,16 @@ class AdvancedJewelryBot:
         
         return cleaned
     
-    def _classify_intent(self, message: str) -> str:
+    def _classify_intent(self, message: str, X=None) -> str:
         """Classify the intent of the message"""
         try:
             # Use TF-IDF and trained classifier
-            X = self.tfidf_vectorizer.transform([message])
-            predicted_intent = self.intent_classifier.predict(X)[0]
+            if X is None:
+                X = self.tfidf_vectorizer.transform([message])
+            if self.compiled_intent_classifier is not None:
+                predicted_intent = self.compiled_intent_classifier.predict(X)[0]
+            else:
+                predicted_intent = self.intent_classifier.predict(X)[0]
             
             # Additional rule-based classification for edge cases
             if any(word in message for word in ['compare', 'vs', 'better', 'which']):
@@ -673,26 +754,24 @@ class AdvancedJewelryBot:
         """Get ML-powered recommendations"""
         recommendations = []
         
-        if self.jewelry_df is not None and len(self.jewelry_df) > 0:
-            # Filter by budget
-            filtered_df = self.jewelry_df[
-                (self.jewelry_df['price'] >= budget_range[0]) & 
-                (self.jewelry_df['price'] <= budget_range[1])
-            ]
-            
-            # Filter by entities
+        catalog = self.jewelry_catalog
+        if catalog is not None and len(catalog) > 0:
+            # Filter by entities, then budget: in storage-key order, so each step narrows a contiguous run
+            rows = None
             if entities.get('products'):
                 product_filter = entities['products'][0].replace(' ', '_')
-                filtered_df = filtered_df[filtered_df['category'].str.contains(product_filter, case=False, na=False)]
+                rows = catalog.contains('category', product_filter, rows)
             
             if entities.get('materials'):
                 material_filter = entities['materials'][0]
-                filtered_df = filtered_df[filtered_df['metal'].str.contains(material_filter, case=False, na=False)]
+                rows = catalog.contains('metal', material_filter, rows)
+            
+            rows = catalog.between('price', budget_range[0], budget_range[1], rows)
             
             # Get top recommendations
-            if not filtered_df.empty:
-                top_items = filtered_df.nsmallest(3, 'price')
-                for _, item in top_items.iterrows():
+            if len(rows):
+                top_items = catalog.records(catalog.top_k('price', 3, rows), ['category', 'metal', 'stone', 'price'])
+                for item in top_items:
                     rec = f"• **{item['category'].title()} in {item['metal'].title()}** with {item['stone']} - ${item['price']:,.0f}"
                     recommendations.append(rec)
         
@@ -750,26 +829,27 @@ class AdvancedJewelryBot:
         """Get insights about specific product from dataset"""
         insights = []
         
-        if self.jewelry_df is not None:
+        catalog = self.jewelry_catalog
+        if catalog is not None:
             # Filter for the product
-            product_df = self.jewelry_df[self.jewelry_df['category'].str.contains(product, case=False, na=False)]
+            rows = catalog.contains('category', product)
             
-            if not product_df.empty:
+            if len(rows):
                 # Price insights
-                avg_price = product_df['price'].mean()
-                price_range = (product_df['price'].min(), product_df['price'].max())
+                avg_price = catalog.mean('price', rows)
+                price_range = (catalog.min('price', rows), catalog.max('price', rows))
                 insights.append(f"\n**{product.title()} Insights from our collection:**")
                 insights.append(f"• Average price: ${avg_price:,.0f}")
                 insights.append(f"• Price range: ${price_range[0]:,.0f} - ${price_range[1]:,.0f}")
                 
                 # Popular materials
-                popular_materials = product_df['metal'].value_counts().head(3)
-                materials_text = ", ".join([f"{mat} ({count} pieces)" for mat, count in popular_materials.items()])
+                popular_materials = catalog.value_counts('metal', rows, top=3)
+                materials_text = ", ".join([f"{mat} ({count} pieces)" for mat, count in popular_materials])
                 insights.append(f"• Popular materials: {materials_text}")
                 
                 # Popular stones
-                popular_stones = product_df['stone'].value_counts().head(3)
-                stones_text = ", ".join([f"{stone} ({count} pieces)" for stone, count in popular_stones.items()])
+                popular_stones = catalog.value_counts('stone', rows, top=3)
+                stones_text = ", ".join([f"{stone} ({count} pieces)" for stone, count in popular_stones])
                 insights.append(f"• Popular stones: {stones_text}")
         
         return insights
@@ -803,18 +883,20 @@ class AdvancedJewelryBot:
         """Get pricing insights from jewelry dataset"""
         insights = []
         
-        if self.jewelry_df is not None and len(self.jewelry_df) > 0:
+        catalog = self.jewelry_catalog
+        if catalog is not None and len(catalog) > 0:
             insights.append("\n**Our Collection Pricing Overview:**")
             
             # Price by category
-            price_by_category = self.jewelry_df.groupby('category')['price'].agg(['mean', 'min', 'max'])
-            for category, row in price_by_category.iterrows():
+            price_by_category = catalog.group_stats('category', 'price')
+            for category, row in price_by_category.items():
                 insights.append(f"• **{category.title()}s**: ${row['min']:,.0f} - ${row['max']:,.0f} (avg: ${row['mean']:,.0f})")
             
             # Price by material
-            price_by_material = self.jewelry_df.groupby('metal')['price'].mean().sort_values(ascending=False)
+            price_by_material = sorted(((material, row['mean']) for material, row in catalog.group_stats('metal', 'price').items()),
+                                       key=lambda item: item[1], reverse=True)
             insights.append(f"\n**By Material** (average prices):")
-            for material, avg_price in price_by_material.head(5).items():
+            for material, avg_price in price_by_material[:5]:
                 insights.append(f"• {material.title()}: ${avg_price:,.0f}")
         
         return insights
@@ -823,7 +905,8 @@ class AdvancedJewelryBot:
         """Get diamond pricing insights"""
         insights = []
         
-        if self.diamonds_df is not None and len(self.diamonds_df) > 0:
+        catalog = self.diamonds_catalog
+        if catalog is not None and len(catalog) > 0:
             insights.append("\n**Diamond Pricing Insights:**")
             
             # Price by carat range
@@ -832,16 +915,16 @@ class AdvancedJewelryBot:
             
             for (min_carat, max_carat), label in zip(carat_ranges, range_labels):
                 if max_carat == float('inf'):
-                    filtered = self.diamonds_df[self.diamonds_df['carat'] >= min_carat]
+                    rows = catalog.between('carat', min_carat)
                 else:
-                    filtered = self.diamonds_df[(self.diamonds_df['carat'] >= min_carat) & (self.diamonds_df['carat'] < max_carat)]
+                    rows = catalog.between('carat', min_carat, max_carat, inclusive='left')
                 
-                if not filtered.empty:
-                    avg_price = filtered['price'].mean()
+                if len(rows):
+                    avg_price = catalog.mean('price', rows)
                     insights.append(f"• **{label}**: Average ${avg_price:,.0f}")
             
             # Price per carat insights
-            avg_price_per_carat = (self.diamonds_df['price'] / self.diamonds_df['carat']).mean()
+            avg_price_per_carat = (catalog.column('price') / catalog.column('carat')).mean()
             insights.append(f"• **Average price per carat**: ${avg_price_per_carat:,.0f}")
         
         return insights
@@ -888,28 +971,29 @@ class AdvancedJewelryBot:
         """Get technical insights from diamond dataset"""
         insights = []
         
-        if self.diamonds_df is not None and len(self.diamonds_df) > 0:
+        catalog = self.diamonds_catalog
+        if catalog is not None and len(catalog) > 0:
             insights.append("\n**Insights from Our Diamond Collection:**")
             
             # Cut distribution
-            cut_dist = self.diamonds_df['cut'].value_counts()
-            insights.append(f"• Most common cut: {cut_dist.index[0]} ({cut_dist.iloc[0]} diamonds)")
+            cut, count = catalog.value_counts('cut', top=1)[0]
+            insights.append(f"• Most common cut: {cut} ({count} diamonds)")
             
             # Color distribution
-            color_dist = self.diamonds_df['color'].value_counts()
-            insights.append(f"• Most common color grade: {color_dist.index[0]} ({color_dist.iloc[0]} diamonds)")
+            color, count = catalog.value_counts('color', top=1)[0]
+            insights.append(f"• Most common color grade: {color} ({count} diamonds)")
             
             # Clarity distribution
-            clarity_dist = self.diamonds_df['clarity'].value_counts()
-            insights.append(f"• Most common clarity: {clarity_dist.index[0]} ({clarity_dist.iloc[0]} diamonds)")
+            clarity, count = catalog.value_counts('clarity', top=1)[0]
+            insights.append(f"• Most common clarity: {clarity} ({count} diamonds)")
             
             # Size insights
-            avg_carat = self.diamonds_df['carat'].mean()
+            avg_carat = catalog.mean('carat')
             insights.append(f"• Average carat weight: {avg_carat:.2f}ct")
             
             # Quality correlation
-            if 'quality_score' in self.diamonds_df.columns:
-                high_quality = self.diamonds_df[self.diamonds_df['quality_score'] >= 4.0]
+            if 'quality_score' in catalog.columns:
+                high_quality = catalog.between('quality_score', 4.0)
                 insights.append(f"• {len(high_quality)} diamonds with quality score 4.0+ out of 5.0")
         
         return insights
@@ -1047,11 +1131,12 @@ What specific information can I help you find today? Feel free to ask about prod
     
     def _get_popular_items(self) -> str:
         """Get popular items from dataset"""
-        if self.jewelry_df is not None and len(self.jewelry_df) > 0:
+        catalog = self.jewelry_catalog
+        if catalog is not None and len(catalog) > 0:
             # Find most common combinations
-            popular_combo = self.jewelry_df.groupby(['category', 'metal']).size().nlargest(1)
-            if not popular_combo.empty:
-                category, metal = popular_combo.index[0]
+            combo_counts = catalog.group_counts(['category', 'metal'])
+            if combo_counts:
+                category, metal = max(combo_counts, key=combo_counts.get)
                 return f"{metal} {category}s"
         
         return "classic diamond engagement rings"
@@ -1083,6 +1168,19 @@ Would you like specific comparisons between particular items or materials? I can
 # Initialize the bot
 bot = AdvancedJewelryBot()
 
+REGISTRY.register_collector(stats_collector('chat_single_flight', chat_flight.stats))
+REGISTRY.register_collector(stats_collector('chat_logging', logging_stats))
+if bot.semantic_cache is not None:
+    REGISTRY.register_collector(stats_collector('chat_semantic_cache', bot.semantic_cache.stats))
+if bot.compiled_answers is not None:
+    REGISTRY.register_collector(stats_collector('chat_compiled_answers', bot.compiled_answers.stats))
+
+# Opt-in rows/allocation accounting per handler call (CATALOG_ACCOUNTING=1)
+catalog_accountant = accountant_from_env()
+if catalog_accountant is not None:
+    catalog_accountant.instrument(bot, ('jewelry_df', 'diamonds_df', 'jewelry_catalog', 'diamonds_catalog'),
+                                  lambda name: name.startswith('_handle_') or name == '_generate_personal_recommendation')
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Main chat endpoint"""
@@ -1097,12 +1195,15 @@ def chat():
             }), 400
         
         # Process the query with advanced ML
-        result = bot.process_query(message)
+        with REQUEST_SECONDS.time(), slow_watchdog.track(message):
+            key = (bot.dataset_version, bot._clean_message(message))
+            result = chat_flight.do(key, lambda: bot.process_query(message))
         
         return jsonify(result)
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
+        ERRORS.inc(stage='endpoint', type=type(e).__name__)
         return jsonify({
             'response': 'I apologize for the technical issue. Please try again.',
             'error': str(e),
@@ -1120,9 +1221,24 @@ def health():
         'data_loaded': {
             'jewelry_items': len(bot.jewelry_df) if bot.jewelry_df is not None else 0,
             'diamond_items': len(bot.diamonds_df) if bot.diamonds_df is not None else 0
-        }
+        },
+        'compiled_answers': bot.compiled_answers.stats() if bot.compiled_answers is not None else None,
+        'single_flight': chat_flight.stats(),
+        'semantic_cache': bot.semantic_cache.stats() if bot.semantic_cache is not None else None
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint with per-stage chat latency histograms"""
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+# Token-guarded POST /debug/profile; idle until called
+install_profile_endpoint(app)
+
+# Requests over SLOW_REQUEST_MS, readable at GET /debug/slow
+slow_watchdog = watchdog_from_env()
+install_slow_request_endpoint(app, slow_watchdog)
+
 @app.route('/analytics', methods=['GET'])
 def analytics():
     """Analytics endpoint for dataset insights"""
@@ -1134,32 +1250,34 @@ def analytics():
             'recommendations': []
         }
         
-        if bot.jewelry_df is not None:
+        jewelry = bot.jewelry_catalog
+        if jewelry is not None:
             analytics_data['dataset_summary']['jewelry'] = {
-                'total_items': len(bot.jewelry_df),
-                'categories': bot.jewelry_df['category'].nunique(),
-                'avg_price': float(bot.jewelry_df['price'].mean()),
-                'price_range': [float(bot.jewelry_df['price'].min()), float(bot.jewelry_df['price'].max())]
+                'total_items': len(jewelry),
+                'categories': jewelry.nunique('category'),
+                'avg_price': jewelry.mean('price'),
+                'price_range': [float(jewelry.min('price')), float(jewelry.max('price'))]
             }
             
             analytics_data['popular_items']['jewelry'] = {
-                'categories': bot.jewelry_df['category'].value_counts().head(5).to_dict(),
-                'materials': bot.jewelry_df['metal'].value_counts().head(5).to_dict(),
-                'stones': bot.jewelry_df['stone'].value_counts().head(5).to_dict()
+                'categories': dict(jewelry.value_counts('category', top=5)),
+                'materials': dict(jewelry.value_counts('metal', top=5)),
+                'stones': dict(jewelry.value_counts('stone', top=5))
             }
         
-        if bot.diamonds_df is not None:
+        diamonds = bot.diamonds_catalog
+        if diamonds is not None:
             analytics_data['dataset_summary']['diamonds'] = {
-                'total_items': len(bot.diamonds_df),
-                'avg_carat': float(bot.diamonds_df['carat'].mean()),
-                'avg_price': float(bot.diamonds_df['price'].mean()),
-                'price_range': [float(bot.diamonds_df['price'].min()), float(bot.diamonds_df['price'].max())]
+                'total_items': len(diamonds),
+                'avg_carat': diamonds.mean('carat'),
+                'avg_price': diamonds.mean('price'),
+                'price_range': [float(diamonds.min('price')), float(diamonds.max('price'))]
             }
             
             analytics_data['popular_items']['diamonds'] = {
-                'cuts': bot.diamonds_df['cut'].value_counts().head(5).to_dict(),
-                'colors': bot.diamonds_df['color'].value_counts().head(5).to_dict(),
-                'clarities': bot.diamonds_df['clarity'].value_counts().head(5).to_dict()
+                'cuts': dict(diamonds.value_counts('cut', top=5)),
+                'colors': dict(diamonds.value_counts('color', top=5)),
+                'clarities': dict(diamonds.value_counts('clarity', top=5))
             }
         
         return jsonify(analytics_data)
@@ -1168,11 +1286,15 @@ def analytics():
         logger.error(f"Error in analytics endpoint: {e}")
         return jsonify({'error': str(e)}), 500
 
+if catalog_accountant is not None:
+    app.view_functions['analytics'] = catalog_accountant.wrap('analytics', analytics)
+
 if __name__ == '__main__':
     logger.info(f"🚀 Starting {bot.app_name} v{bot.version}")
     logger.info("🔗 Endpoints available:")
     logger.info("   POST /chat - Main chat interface")
     logger.info("   GET /health - Health check")
+    logger.info("   GET /metrics - Prometheus metrics")
     logger.info("   GET /analytics - Dataset analytics")
     
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
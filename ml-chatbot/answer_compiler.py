@@ -0,0 +1,535 @@
+"""
+Offline answer compiler for the Ornament Tech chatbots
+Pre-renders every (intent, entities, message flags) response once per dataset version
+into a memory-mapped lookup table so the serving path does no pandas work
+"""
+
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'OTANSWR1'
+FORMAT_VERSION = 1
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+INDEX_DTYPE = np.dtype([
+    ('hash', '<u8'),
+    ('offset', '<u8'),
+    ('key_len', '<u4'),
+    ('text_len', '<u4')
+])
+
+PRODUCTS = ['ring', 'necklace', 'earring', 'bracelet', 'engagement ring', 'wedding band']
+MATERIALS = ['gold', 'silver', 'platinum', 'white gold', 'rose gold']
+GEMSTONES = ['diamond', 'emerald', 'ruby', 'sapphire', 'pearl']
+OCCASIONS = ['wedding', 'engagement', 'anniversary', 'birthday', 'valentine']
+SERVICES = ['bespoke', 'custom', 'resize', 'repair', 'clean', 'appointment']
+EDUCATION_TOPICS = ['care', 'sizing', 'gemstone']
+
+
+def _has(message: str, *words: str) -> bool:
+    return any(word in message for word in words)
+
+
+def _first(items: List[str], allowed: Optional[Iterable[str]] = None) -> str:
+    if not items:
+        return ''
+    if allowed is not None and items[0] not in allowed:
+        return ''
+    return items[0]
+
+
+# ---------------------------------------------------------------------------
+# Signatures: everything a handler reads from (intent, entities, message).
+# Two messages with the same signature must render the same response; the
+# build step enforces this and refuses to write a table when they do not.
+# ``None`` means "not covered" and the live handler answers.
+# ---------------------------------------------------------------------------
+
+def advanced_signature(intent: str, entities: Dict, message: str) -> Optional[Tuple]:
+    """Signature for ``AdvancedJewelryBot._generate_intelligent_response``"""
+    products = entities.get('products', [])
+    materials = entities.get('materials', [])
+    gemstones = entities.get('gemstones', [])
+    occasions = entities.get('occasions', [])
+
+    if intent == 'comparison':
+        if _has(message, 'suits me', 'best for me'):
+            return (intent, 'personal',
+                    _has(message, 'elegant', 'classic'),
+                    _has(message, 'modern', 'contemporary'),
+                    _has(message, 'budget', 'affordable'),
+                    _first(occasions, ('engagement', 'wedding')))
+        if len(products) >= 2:
+            return (intent, 'products', tuple(products))
+        if len(materials) >= 2:
+            return (intent, 'materials', tuple(materials))
+        if len(gemstones) >= 2:
+            return (intent, 'gemstones', tuple(gemstones))
+        return (intent, 'general')
+
+    if intent == 'recommendation':
+        # Explicit amounts go through the budget regexes; only keyword bands are compiled
+        if re.search(r'\d', message):
+            return None
+        if _has(message, 'budget', 'affordable'):
+            band = 'budget'
+        elif _has(message, 'luxury', 'premium'):
+            band = 'luxury'
+        else:
+            band = 'default'
+        return (intent, band, _first(products), _first(materials),
+                _first(occasions, ('engagement', 'wedding', 'anniversary')))
+
+    if intent == 'product_inquiry':
+        return (intent, _first(products))
+    if intent == 'pricing':
+        return (intent, 'diamond' in message)
+    if intent == 'technical_info':
+        return (intent, _has(message, 'diamond', '4c'))
+    if intent == 'services':
+        return (intent, tuple(service for service in SERVICES if service in message))
+    if intent == 'education':
+        return (intent, next((topic for topic in EDUCATION_TOPICS if topic in message), ''))
+    return ('general_inquiry',)
+
+
+def intelligent_signature(intent: str, entities: Dict, message: str) -> Optional[Tuple]:
+    """Signature for ``IntelligentJewelryBot._generate_response``"""
+    products = entities.get('products', [])
+    materials = entities.get('materials', [])
+
+    if intent == 'comparison':
+        if _has(message, 'suits me', 'best for me'):
+            return (intent, 'personal',
+                    _has(message, 'elegant', 'classic'),
+                    _has(message, 'budget', 'affordable'),
+                    'diamond' in message)
+        if len(products) >= 2:
+            return (intent, 'products', tuple(products))
+        if len(materials) >= 2:
+            return (intent, 'materials', tuple(materials))
+        return (intent, 'general')
+
+    if intent == 'recommendation':
+        return (intent, _has(message, 'budget', 'cheap', 'affordable', 'expensive'), _first(products))
+    if intent in ('product_inquiry', 'pricing'):
+        return (intent, _first(products))
+    if intent == 'technical_info':
+        return (intent, _has(message, 'diamond', '4c'))
+    if intent in ('services', 'education'):
+        return (intent,)
+    return ('general_inquiry',)
+
+
+# ---------------------------------------------------------------------------
+# Enumeration: phrase slots whose cartesian product reaches every signature
+# ---------------------------------------------------------------------------
+
+def _choices(words: List[str], max_items: int, min_items: int = 0) -> List[str]:
+    """'' plus every 'a and b' style combination of up to ``max_items`` words"""
+    options = []
+    for size in range(min_items, max_items + 1):
+        for combo in itertools.combinations(words, size):
+            options.append(' and '.join(combo))
+    return options
+
+
+def _optional(*words: str) -> List[str]:
+    return [''] + list(words)
+
+
+def _expand(*slots: List[str]) -> List[str]:
+    return [' '.join(part for part in parts if part) for parts in itertools.product(*slots)]
+
+
+def advanced_phrases() -> Dict[str, List[str]]:
+    return {
+        'comparison': (
+            _expand(['which suits me', 'what is best for me'], _optional('elegant'), _optional('modern'),
+                    _optional('budget'), _optional('for an engagement', 'for a wedding', 'for a birthday'))
+            + _expand(['compare'], _choices(PRODUCTS, 3, 2))
+            + _expand(['compare'], _choices(MATERIALS, 3, 2))
+            + _expand(['compare'], _choices(GEMSTONES, 3, 2))
+            + ['compare options']
+        ),
+        'recommendation': _expand(
+            ['recommend'], _optional('budget', 'luxury'), _optional(*PRODUCTS), _optional(*MATERIALS),
+            _optional('for an engagement', 'for a wedding', 'for an anniversary')
+        ),
+        'product_inquiry': _expand(['show me'], _optional(*PRODUCTS)),
+        'pricing': _expand(['price of'], _optional('diamond')),
+        'technical_info': _expand(['explain the grading'], _optional('diamond')),
+        'services': _expand(['tell me about'], _choices(SERVICES, 2)),
+        'education': _expand(['learn about'], _optional(*EDUCATION_TOPICS)),
+        'general_inquiry': ['hello']
+    }
+
+
+def intelligent_phrases() -> Dict[str, List[str]]:
+    return {
+        'comparison': (
+            _expand(['which suits me', 'what is best for me'], _optional('elegant'), _optional('budget'),
+                    _optional('diamond'))
+            + _expand(['compare'], _choices(PRODUCTS, 3, 2))
+            + _expand(['compare'], _choices(MATERIALS, 3, 2))
+            + ['compare options']
+        ),
+        'recommendation': _expand(['recommend'], _optional('budget'), _optional(*PRODUCTS)),
+        'product_inquiry': _expand(['show me'], _optional(*PRODUCTS)),
+        'pricing': _expand(['price of'], _optional(*PRODUCTS)),
+        'technical_info': _expand(['explain the grading'], _optional('diamond')),
+        'services': ['tell me about your services'],
+        'education': ['learn about jewelry'],
+        'general_inquiry': ['hello']
+    }
+
+
+class AnswerSpec:
+    """How to enumerate, key and render the answers of one bot class"""
+
+    def __init__(self, name: str, signature: Callable, phrases: Callable, render: str):
+        self.name = name
+        self.signature = signature
+        self.phrases = phrases
+        self.render = render
+
+    @property
+    def table_path(self) -> str:
+        return os.path.join(MODELS_DIR, f'compiled_answers_{self.name}.bin')
+
+
+SPECS = {
+    'AdvancedJewelryBot': AnswerSpec('advanced', advanced_signature, advanced_phrases, '_generate_intelligent_response'),
+    'IntelligentJewelryBot': AnswerSpec('intelligent', intelligent_signature, intelligent_phrases, '_generate_response')
+}
+
+
+def dataset_version(bot) -> str:
+    """
+    Fingerprint of everything a compiled answer depends on: the loaded
+    (enriched) datasets, precomputed analytics and the bot's handler code.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'format={FORMAT_VERSION}'.encode())
+    digest.update(inspect.getsource(type(bot)).encode('utf-8'))
+    for attr in ('jewelry_df', 'diamonds_df'):
+        df = getattr(bot, attr, None)
+        if df is not None:
+            digest.update(attr.encode())
+            digest.update(','.join(map(str, df.columns)).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    analytics = getattr(bot, 'analytics', None)
+    if analytics:
+        digest.update(json.dumps(analytics, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _encode_key(signature: Tuple) -> bytes:
+    return json.dumps(signature, separators=(',', ':')).encode('utf-8')
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+# ---------------------------------------------------------------------------
+# Table file: MAGIC | header length | JSON header | padding | index | blobs
+# The index is sorted by key hash; each blob is the key followed by the text.
+# ---------------------------------------------------------------------------
+
+def write_table(path: str, answers: Dict[Tuple, str], header: Dict[str, Any]):
+    """Write ``answers`` atomically to ``path``"""
+    entries = []
+    for signature, text in answers.items():
+        key = _encode_key(signature)
+        entries.append((_key_hash(key), key, text.encode('utf-8')))
+    entries.sort(key=lambda entry: entry[0])
+
+    hashes = [entry[0] for entry in entries]
+    if len(set(hashes)) != len(hashes):
+        raise ValueError("Key hash collision in compiled answers")
+
+    index = np.zeros(len(entries), dtype=INDEX_DTYPE)
+    offset = 0
+    for i, (key_hash, key, text) in enumerate(entries):
+        index[i] = (key_hash, offset, len(key), len(text))
+        offset += len(key) + len(text)
+
+    header = dict(header, entries=len(entries), format=FORMAT_VERSION)
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix_len = len(MAGIC) + 4 + len(header_bytes)
+    padding = b'\0' * (-prefix_len % INDEX_DTYPE.alignment)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(padding)
+        f.write(index.tobytes())
+        for _, key, text in entries:
+            f.write(key)
+            f.write(text)
+    os.replace(tmp_path, path)
+
+
+class AnswerTable:
+    """Read-only, memory-mapped view of a compiled answer table"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled answer table")
+        (header_len,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[header_start:header_start + header_len].decode('utf-8'))
+
+        index_start = header_start + header_len
+        index_start += -index_start % INDEX_DTYPE.alignment
+        self._index = np.frombuffer(self._mmap, dtype=INDEX_DTYPE, count=self.header['entries'], offset=index_start)
+        self._hashes = self._index['hash']
+        self._blob_start = index_start + self._index.nbytes
+
+    @property
+    def dataset_version(self) -> str:
+        return self.header.get('dataset_version', '')
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, signature: Tuple) -> Optional[str]:
+        key = _encode_key(signature)
+        key_hash = _key_hash(key)
+        i = int(np.searchsorted(self._hashes, key_hash))
+        if i >= len(self._hashes) or int(self._hashes[i]) != key_hash:
+            return None
+        _, offset, key_len, text_len = self._index[i]
+        start = self._blob_start + int(offset)
+        if self._mmap[start:start + key_len] != key:
+            return None
+        start += int(key_len)
+        return self._mmap[start:start + int(text_len)].decode('utf-8')
+
+    def items(self):
+        """Yield (signature key, text) for every entry"""
+        for _, offset, key_len, text_len in self._index:
+            start = self._blob_start + int(offset)
+            key = self._mmap[start:start + int(key_len)].decode('utf-8')
+            start += int(key_len)
+            yield key, self._mmap[start:start + int(text_len)].decode('utf-8')
+
+
+class CompiledAnswers:
+    """Serving-side lookup: signature -> pre-rendered response, with hit counters"""
+
+    def __init__(self, spec: AnswerSpec, table: AnswerTable):
+        self.spec = spec
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, intent: str, entities: Dict, message: str) -> Optional[str]:
+        signature = self.spec.signature(intent, entities, message)
+        response = self.table.get(signature) if signature is not None else None
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.table),
+            'dataset_version': self.table.dataset_version[:12],
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+def load_compiled_answers(bot, version: Optional[str] = None) -> Optional[CompiledAnswers]:
+    """
+    Open the bot's compiled table if it exists and matches the loaded data.
+    ``version`` is the bot's ``dataset_version`` when already computed.
+    """
+    spec = SPECS.get(type(bot).__name__)
+    if spec is None or not os.path.exists(spec.table_path):
+        return None
+
+    try:
+        table = AnswerTable(spec.table_path)
+    except Exception as e:
+        print(f"⚠️ Could not open compiled answers {spec.table_path}: {e}")
+        return None
+
+    if table.dataset_version != (version or dataset_version(bot)):
+        print(f"⚠️ Compiled answers in {spec.table_path} are stale; "
+              f"rebuild with: python answer_compiler.py build {spec.name}")
+        return None
+
+    print(f"✓ Loaded {len(table)} compiled answers ({spec.name})")
+    return CompiledAnswers(spec, table)
+
+
+def compile_answers(bot, spec: AnswerSpec) -> Tuple[Dict[Tuple, str], int]:
+    """
+    Render every reachable signature once with the live handler.
+
+    Signatures whose handler raises are left out so those queries keep
+    going through the live path (and its error fallback). Returns the
+    answers and the number of phrases skipped that way.
+    """
+    render = getattr(bot, spec.render)
+    answers: Dict[Tuple, str] = {}
+    sources: Dict[Tuple, str] = {}
+    failed = 0
+
+    for intent, phrases in spec.phrases().items():
+        for phrase in phrases:
+            message = bot._clean_message(phrase)
+            entities = bot._extract_entities(message)
+            signature = spec.signature(intent, entities, message)
+            if signature is None:
+                continue
+            try:
+                text = render(intent, entities, message)
+            except Exception:
+                failed += 1
+                continue
+            if signature in answers and answers[signature] != text:
+                raise ValueError(
+                    f"Signature {signature} is ambiguous: '{sources[signature]}' and '{phrase}' "
+                    f"render different answers; the {spec.name} signature is missing an input"
+                )
+            answers[signature] = text
+            sources.setdefault(signature, phrase)
+
+    return answers, failed
+
+
+def build(bot) -> Dict[str, Any]:
+    spec = SPECS[type(bot).__name__]
+    answers, failed = compile_answers(bot, spec)
+    header = {
+        'bot': type(bot).__name__,
+        'dataset_version': dataset_version(bot),
+        'built_at': datetime.now().isoformat()
+    }
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    write_table(spec.table_path, answers, header)
+    return {
+        'path': spec.table_path,
+        'entries': len(answers),
+        'handler_errors_skipped': failed,
+        'bytes': os.path.getsize(spec.table_path),
+        'dataset_version': header['dataset_version'][:12]
+    }
+
+
+def _verification_messages(spec: AnswerSpec, samples: int, seed: int = 42) -> List[str]:
+    """Enumerated phrases plus random word salads that cross intent boundaries"""
+    messages = [phrase for phrases in spec.phrases().values() for phrase in phrases]
+    vocabulary = (PRODUCTS + MATERIALS + GEMSTONES + OCCASIONS + SERVICES + EDUCATION_TOPICS + [
+        'compare', 'vs', 'which', 'recommend', 'suggest', 'suits me', 'show', 'find', 'price', 'cost',
+        'budget', 'affordable', 'luxury', 'premium', 'elegant', 'classic', 'modern', '4c', 'carat',
+        'explain', 'learn', 'what is', 'hello', 'please', 'under $500', 'around 2k', "I'm", 'my'
+    ])
+    rng = random.Random(seed)
+    for _ in range(samples):
+        messages.append(' '.join(rng.sample(vocabulary, rng.randint(1, 6))))
+    return messages
+
+
+def verify(bot, samples: int = 2000, messages: Iterable[str] = (),
+           table: Optional[AnswerTable] = None) -> Dict[str, Any]:
+    """
+    Replay messages through intent + entities and compare table answers to
+    live handlers. ``messages`` are replayed on top of the generated ones;
+    ``table`` defaults to the bot's table on disk.
+    """
+    spec = SPECS[type(bot).__name__]
+    table = table or AnswerTable(spec.table_path)
+    render = getattr(bot, spec.render)
+    report = {
+        'table': table.path,
+        'fresh': table.dataset_version == dataset_version(bot),
+        'messages': 0,
+        'hits': 0,
+        'mismatches': []
+    }
+
+    for raw in _verification_messages(spec, samples) + list(messages):
+        message = bot._clean_message(raw)
+        intent = bot._classify_intent(message)
+        entities = bot._extract_entities(message)
+        signature = spec.signature(intent, entities, message)
+        report['messages'] += 1
+        compiled = table.get(signature) if signature is not None else None
+        if compiled is None:
+            continue
+        report['hits'] += 1
+        try:
+            live = render(intent, entities, message)
+        except Exception as e:
+            live = f'<{type(e).__name__}>'
+        if compiled != live:
+            report['mismatches'].append({'message': raw, 'signature': list(signature)})
+
+    report['ok'] = report['fresh'] and not report['mismatches']
+    return report
+
+
+def _load_bot(name: str):
+    # Services build their bot at import time
+    if name == 'advanced':
+        from advanced_ml_service import bot
+    else:
+        from intelligent_ml_service import bot
+    return bot
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or verify compiled chatbot answers')
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('bots', nargs='*', help='advanced and/or intelligent (default: both)')
+    parser.add_argument('--samples', type=int, default=2000, help='random messages to replay in verify')
+    parser.add_argument('--corpus', action='store_true', help='also replay the benchmark corpus in verify')
+    args = parser.parse_args()
+
+    corpus = []
+    if args.corpus:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+        from engine_benchmark import load_corpus
+        corpus = [query for query, _ in load_corpus()]
+
+    names = args.bots or ['advanced', 'intelligent']
+    unknown = [name for name in names if name not in ('advanced', 'intelligent')]
+    if unknown:
+        parser.error(f"unknown bot(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        bot = _load_bot(name)
+        results[name] = build(bot) if args.command == 'build' else verify(bot, args.samples, corpus)
+    print(json.dumps(results, indent=2))
+
+    if args.command == 'verify' and not all(result['ok'] for result in results.values()):
+        raise SystemExit(1)
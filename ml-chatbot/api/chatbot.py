@@ -4,9 +4,13 @@ import pickle
 import json
 import os
 import re
+import sys
 from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from artifact_store import artifact_path, load_response_data, open_current
+
 class JewelryChatbot:
     def __init__(self):
         """
@@ -26,28 +30,30 @@ class JewelryChatbot:
         """
         try:
             model_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
+            # The basic trainer's CURRENT store version if published, else the loose files
+            version = open_current(model_dir, 'basic')
             
             # Load intent model
-            intent_model_path = os.path.join(model_dir, 'intent_model.h5')
+            intent_model_path = artifact_path(model_dir, 'intent_model.h5', version)
             self.intent_model = tf.keras.models.load_model(intent_model_path)
             
             # Load vectorizer
-            vectorizer_path = os.path.join(model_dir, 'vectorizer.pkl')
+            vectorizer_path = artifact_path(model_dir, 'vectorizer.pkl', version)
             with open(vectorizer_path, 'rb') as f:
                 self.vectorizer = pickle.load(f)
             
             # Load label encoder
-            encoder_path = os.path.join(model_dir, 'label_encoder.pkl')
+            encoder_path = artifact_path(model_dir, 'label_encoder.pkl', version)
             with open(encoder_path, 'rb') as f:
                 self.label_encoder = pickle.load(f)
             
             # Load response data
-            response_path = os.path.join(model_dir, 'response_data.pkl')
-            with open(response_path, 'rb') as f:
-                self.response_data = pickle.load(f)
+            self.response_data = load_response_data(model_dir, version)
+            if self.response_data is None:
+                raise FileNotFoundError(os.path.join(model_dir, 'response_data.pkl'))
             
             # Load metadata
-            metadata_path = os.path.join(model_dir, 'model_metadata.json')
+            metadata_path = artifact_path(model_dir, 'model_metadata.json', version)
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 self.metadata = json.load(f)
             
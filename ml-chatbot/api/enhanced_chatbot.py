@@ -11,8 +11,12 @@ from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 import os
 import re
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from artifact_store import artifact_path, open_current
+
 class EnhancedJewelryChatbot:
     def __init__(self):
         """
@@ -37,26 +41,31 @@ class EnhancedJewelryChatbot:
         Load all trained models and datasets
         """
         try:
-            model_dir = os.path.join(os.path.dirname(__file__), 'models')
+            model_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
+            # The enhanced trainer's CURRENT store version if published, else the loose files
+            version = open_current(model_dir, 'enhanced')
             
             # Load enhanced models
-            if os.path.exists(os.path.join(model_dir, 'enhanced_intent_model.h5')):
-                self.intent_model = tf.keras.models.load_model(os.path.join(model_dir, 'enhanced_intent_model.h5'))
+            intent_model_path = artifact_path(model_dir, 'enhanced_intent_model.h5', version)
+            if os.path.exists(intent_model_path):
+                self.intent_model = tf.keras.models.load_model(intent_model_path)
                 print("✓ Enhanced intent model loaded")
             
-            if os.path.exists(os.path.join(model_dir, 'price_prediction_model.h5')):
-                self.price_model = tf.keras.models.load_model(os.path.join(model_dir, 'price_prediction_model.h5'))
+            price_model_path = artifact_path(model_dir, 'price_prediction_model.h5', version)
+            if os.path.exists(price_model_path):
+                self.price_model = tf.keras.models.load_model(price_model_path)
                 print("✓ Price prediction model loaded")
             
             # Load preprocessors
-            with open(os.path.join(model_dir, 'enhanced_vectorizer.pkl'), 'rb') as f:
+            with open(artifact_path(model_dir, 'enhanced_vectorizer.pkl', version), 'rb') as f:
                 self.vectorizer = pickle.load(f)
             
-            with open(os.path.join(model_dir, 'enhanced_label_encoder.pkl'), 'rb') as f:
+            with open(artifact_path(model_dir, 'enhanced_label_encoder.pkl', version), 'rb') as f:
                 self.label_encoder = pickle.load(f)
             
-            if os.path.exists(os.path.join(model_dir, 'price_scaler.pkl')):
-                with open(os.path.join(model_dir, 'price_scaler.pkl'), 'rb') as f:
+            price_scaler_path = artifact_path(model_dir, 'price_scaler.pkl', version)
+            if os.path.exists(price_scaler_path):
+                with open(price_scaler_path, 'rb') as f:
                     self.price_scaler = pickle.load(f)
             
             # Load datasets
@@ -69,8 +78,9 @@ class EnhancedJewelryChatbot:
                 print(f"✓ Jewelry dataset loaded: {len(self.jewelry_data)} samples")
             
             # Load Q&A pairs
-            if os.path.exists(os.path.join(model_dir, 'dataset_qa_pairs.json')):
-                with open(os.path.join(model_dir, 'dataset_qa_pairs.json'), 'r') as f:
+            qa_path = artifact_path(model_dir, 'dataset_qa_pairs.json', version)
+            if os.path.exists(qa_path):
+                with open(qa_path, 'r') as f:
                     self.qa_pairs = json.load(f)
                 print(f"✓ Dataset Q&A pairs loaded: {len(self.qa_pairs)}")
             
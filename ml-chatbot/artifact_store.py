@@ -0,0 +1,412 @@
+"""
+Versioned model artifact store
+One directory per version with a sha256 manifest, atomic publish by rename and a CURRENT pointer for instant rollback
+
+Each trainer publishes its own lineage, so a new enhanced version never
+hides the basic trainer's files or the other way round. Layout under a
+models directory:
+
+    models/store/<lineage>/versions/<version>/manifest.json
+    models/store/<lineage>/versions/<version>/<artifact files>
+    models/store/<lineage>/CURRENT        # the version services load
+
+A version is written into a hidden staging directory, fsynced, and only
+renamed into versions/ once complete; CURRENT is then replaced
+atomically. A crash mid-save therefore never leaves a half-written model
+where services look, and rolling back is rewriting one small file.
+Sparse matrices are stored as uncompressed .npy components (data,
+indices, indptr) that load memory-mapped, so processes share the page
+cache instead of each unpickling its own copy.
+
+Services fall back to a single models/store/CURRENT written before
+lineages existed, then to the loose files in the models directory.
+
+Usage:
+    python artifact_store.py list                                   # every lineage
+    python artifact_store.py verify [VERSION]
+    python artifact_store.py --lineage enhanced rollback [VERSION]  # default: the version published before CURRENT
+    python artifact_store.py import-loose           # snapshot the loose model files as a new version per lineage
+    python artifact_store.py prune --keep 5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+MANIFEST = 'manifest.json'
+SPARSE_PARTS = ('data', 'indices', 'indptr')
+
+# Lineage -> the files its trainer writes, which import-loose picks up when they exist
+LINEAGES = {
+    'basic': ['intent_model.h5', 'vectorizer.pkl', 'label_encoder.pkl', 'response_data.pkl',
+              'model_metadata.json'],
+    'enhanced': ['enhanced_intent_model.h5', 'enhanced_vectorizer.pkl', 'enhanced_label_encoder.pkl',
+                 'price_prediction_model.h5', 'price_scaler.pkl', 'enhanced_model_metadata.json',
+                 'dataset_qa_pairs.json'],
+}
+LOOSE_ARTIFACTS = [name for names in LINEAGES.values() for name in names]
+
+
+class ArtifactError(Exception):
+    """A version is missing, incomplete or fails its checksums"""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fsync(path: str):
+    # Directories need O_RDONLY; Windows cannot open them, and NTFS renames are journaled anyway
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _fsync_file(path: str):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+
+class VersionWriter:
+    """Collects one version's files in a staging directory; paths are relative to the version"""
+
+    def __init__(self, version: str, staging: str, metadata: Dict[str, Any]):
+        self.version = version
+        self.staging = staging
+        self.metadata = dict(metadata)
+        self.sparse: Dict[str, Dict[str, Any]] = {}
+
+    def path(self, name: str) -> str:
+        """Where to write ``name``, for savers that take a path (e.g. ``keras_model.save``)"""
+        path = os.path.join(self.staging, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def save_pickle(self, name: str, obj: Any):
+        with open(self.path(name), 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def save_json(self, name: str, obj: Any):
+        with open(self.path(name), 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+    def save_sparse(self, name: str, matrix):
+        """Store a scipy sparse matrix as CSR .npy components that ArtifactVersion.load_sparse memory-maps"""
+        import numpy as np
+
+        matrix = matrix.tocsr()
+        for part in SPARSE_PARTS:
+            np.save(self.path(f'{name}.{part}.npy'), np.ascontiguousarray(getattr(matrix, part)))
+        self.sparse[name] = {'format': 'csr', 'shape': list(matrix.shape), 'dtype': str(matrix.dtype)}
+
+    def add_file(self, name: str, source: str):
+        shutil.copyfile(source, self.path(name))
+
+    def _finish(self) -> Dict[str, Any]:
+        files = {}
+        for directory, _, names in os.walk(self.staging):
+            for filename in names:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.staging).replace(os.sep, '/')
+                _fsync_file(path)
+                files[name] = {'sha256': _sha256(path), 'bytes': os.path.getsize(path)}
+        manifest = {
+            'version': self.version,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'files': dict(sorted(files.items())),
+            'sparse': self.sparse,
+            'metadata': self.metadata
+        }
+        manifest_path = os.path.join(self.staging, MANIFEST)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync(self.staging)
+        return manifest
+
+
+class ArtifactVersion:
+    """A published, read-only version"""
+
+    def __init__(self, directory: str, manifest: Dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.files: Dict[str, Dict[str, Any]] = manifest['files']
+        self.metadata: Dict[str, Any] = manifest.get('metadata', {})
+
+    def has(self, name: str) -> bool:
+        return name in self.files or name in self.manifest.get('sparse', {})
+
+    def path(self, name: str) -> str:
+        if name not in self.files:
+            raise ArtifactError(f"{name} is not part of version {self.version}")
+        return os.path.join(self.directory, *name.split('/'))
+
+    def verify(self, mode: str = 'full'):
+        """Check every file against the manifest: ``full`` hashes, ``size`` only compares lengths"""
+        for name, entry in self.files.items():
+            path = self.path(name)
+            if not os.path.exists(path):
+                raise ArtifactError(f"{self.version}: {name} is missing")
+            if os.path.getsize(path) != entry['bytes']:
+                raise ArtifactError(f"{self.version}: {name} is {os.path.getsize(path)} bytes, expected {entry['bytes']}")
+            if mode == 'full' and _sha256(path) != entry['sha256']:
+                raise ArtifactError(f"{self.version}: {name} fails its sha256 checksum")
+
+    def load_pickle(self, name: str) -> Any:
+        with open(self.path(name), 'rb') as f:
+            return pickle.load(f)
+
+    def load_json(self, name: str) -> Any:
+        with open(self.path(name), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_sparse(self, name: str, mmap: bool = True):
+        """The CSR matrix saved as ``name``; with ``mmap`` its arrays are read-only views of the files"""
+        # numpy/scipy imported here so the keyword-only services that just resolve paths stay lean
+        import numpy as np
+        from scipy import sparse
+
+        info = self.manifest['sparse'][name]
+        parts = [np.load(self.path(f'{name}.{part}.npy'), mmap_mode='r' if mmap else None) for part in SPARSE_PARTS]
+        return sparse.csr_matrix(tuple(parts), shape=tuple(info['shape']), copy=False)
+
+
+class ArtifactStore:
+    """Versions of one lineage's artifacts under ``<models_dir>/store/<lineage>``; no lineage is the pre-lineage store"""
+
+    def __init__(self, models_dir: str, lineage: str = None):
+        if lineage is not None and lineage not in LINEAGES:
+            raise ArtifactError(f"Unknown lineage {lineage}")
+        self.models_dir = models_dir
+        self.lineage = lineage
+        self.root = os.path.join(models_dir, 'store', *([lineage] if lineage else []))
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.pointer = os.path.join(self.root, 'CURRENT')
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Manifests of every complete version, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        manifests = []
+        for name in os.listdir(self.versions_dir):
+            path = os.path.join(self.versions_dir, name, MANIFEST)
+            if not name.startswith('.') and os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda manifest: (manifest['created'], manifest['version']))
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(self.pointer, encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, version: str):
+        """Point CURRENT at ``version`` with an atomic replace"""
+        if not os.path.exists(os.path.join(self.versions_dir, version, MANIFEST)):
+            raise ArtifactError(f"No complete version {version}")
+        temporary = f'{self.pointer}.{uuid.uuid4().hex}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.pointer)
+        _fsync(self.root)
+
+    @contextmanager
+    def new_version(self, metadata: Dict[str, Any] = None, publish: bool = True):
+        """
+        Stage a version; on a clean exit it is checksummed, renamed into
+        place and, with ``publish``, made CURRENT. On an exception the
+        staging directory is removed and CURRENT is untouched.
+        """
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        staging = os.path.join(self.versions_dir, f'.staging-{version}')
+        os.makedirs(staging)
+        writer = VersionWriter(version, staging, metadata or {})
+        try:
+            yield writer
+            writer._finish()
+            os.rename(staging, os.path.join(self.versions_dir, version))
+            _fsync(self.versions_dir)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if publish:
+            self.set_current(version)
+
+    def open(self, version: str = None, verify: str = 'full') -> Optional[ArtifactVersion]:
+        """A version (default CURRENT), checked with ``verify`` (full, size or off); None when there is none"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        directory = os.path.join(self.versions_dir, version)
+        manifest_path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ArtifactError(f"No complete version {version}")
+        with open(manifest_path, encoding='utf-8') as f:
+            artifact_version = ArtifactVersion(directory, json.load(f))
+        if verify != 'off':
+            artifact_version.verify(verify)
+        return artifact_version
+
+    def rollback(self, version: str = None) -> str:
+        """Point CURRENT at ``version``, or at the version created before the current one"""
+        if version is None:
+            names = [manifest['version'] for manifest in self.versions()]
+            current = self.current_version()
+            if current not in names or names.index(current) == 0:
+                raise ArtifactError("No earlier version to roll back to")
+            version = names[names.index(current) - 1]
+        self.set_current(version)
+        return version
+
+    def prune(self, keep: int) -> List[str]:
+        """Delete all but the newest ``keep`` versions, never CURRENT; returns the removed names"""
+        current = self.current_version()
+        names = [manifest['version'] for manifest in self.versions()]
+        removed = [name for name in names[:-keep] if name != current] if keep > 0 else []
+        for name in removed:
+            shutil.rmtree(os.path.join(self.versions_dir, name))
+        return removed
+
+
+def open_current(models_dir: str, lineage: str) -> Optional[ArtifactVersion]:
+    """
+    ``lineage``'s CURRENT under ``models_dir`` verified per ARTIFACT_VERIFY
+    (full, size, off); the pre-lineage CURRENT when the lineage has never
+    been published, None without either
+    """
+    verify = os.getenv('ARTIFACT_VERIFY', 'full')
+    store = ArtifactStore(models_dir, lineage)
+    if store.current_version() is None:
+        store = ArtifactStore(models_dir)
+    return store.open(verify=verify)
+
+
+def pointer_paths(models_dir: str) -> List[str]:
+    """Every CURRENT pointer services may read; publishing or rolling back only rewrites one of these"""
+    return [ArtifactStore(models_dir, lineage).pointer for lineage in LINEAGES] + [ArtifactStore(models_dir).pointer]
+
+
+def artifact_path(models_dir: str, name: str, version: Optional[ArtifactVersion] = None) -> str:
+    """``name`` in the given store version when it has it, else the loose file in ``models_dir``"""
+    if version is not None and version.has(name):
+        return version.path(name)
+    return os.path.join(models_dir, name)
+
+
+def save_response_data(writer: VersionWriter, response_data: Dict[str, Any]):
+    """Pickle the response table without its question vectors, which go in as memory-mappable sparse parts"""
+    rest = {key: value for key, value in response_data.items() if key != 'question_vectors'}
+    writer.save_pickle('response_data.pkl', rest)
+    if response_data.get('question_vectors') is not None:
+        writer.save_sparse('question_vectors', response_data['question_vectors'])
+
+
+def load_response_data(models_dir: str, version: Optional[ArtifactVersion] = None) -> Optional[Dict[str, Any]]:
+    """The response table from the store version, or from the loose pickle; None when neither exists"""
+    if version is not None and version.has('response_data.pkl'):
+        response_data = version.load_pickle('response_data.pkl')
+        if version.has('question_vectors'):
+            response_data['question_vectors'] = version.load_sparse('question_vectors')
+        return response_data
+    path = os.path.join(models_dir, 'response_data.pkl')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def import_loose(store: ArtifactStore, publish: bool = True) -> str:
+    """Copy today's loose files of the store's lineage into a new version; response_data gets its vectors split out"""
+    with store.new_version({'source': 'import-loose'}, publish=publish) as writer:
+        for name in LINEAGES[store.lineage] if store.lineage else LOOSE_ARTIFACTS:
+            path = os.path.join(store.models_dir, name)
+            if not os.path.exists(path):
+                continue
+            if name == 'response_data.pkl':
+                save_response_data(writer, load_response_data(store.models_dir))
+            else:
+                writer.add_file(name, path)
+        if not os.listdir(writer.staging):
+            raise ArtifactError(f"No loose artifacts found in {store.models_dir}")
+    return writer.version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model artifact store")
+    parser.add_argument('--models-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+    parser.add_argument('--lineage', choices=list(LINEAGES), help="Trainer lineage (default: every lineage)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Versions, newest last; * marks CURRENT")
+    verify = commands.add_parser('verify', help="Check a version's sha256 checksums")
+    verify.add_argument('version', nargs='?')
+    rollback = commands.add_parser('rollback', help="Point CURRENT at an earlier version (needs --lineage)")
+    rollback.add_argument('version', nargs='?')
+    commands.add_parser('import-loose', help="Snapshot the loose model files as a new CURRENT version")
+    prune = commands.add_parser('prune', help="Delete old versions")
+    prune.add_argument('--keep', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'rollback' and args.lineage is None:
+        parser.error("rollback needs --lineage")
+    if args.command == 'verify' and args.version and args.lineage is None:
+        parser.error("verifying a named version needs --lineage")
+    lineages = [args.lineage] if args.lineage else list(LINEAGES)
+    try:
+        for lineage in lineages:
+            store = ArtifactStore(args.models_dir, lineage)
+            if args.command == 'list':
+                current = store.current_version()
+                print(f"{lineage}:")
+                for manifest in store.versions():
+                    size = sum(entry['bytes'] for entry in manifest['files'].values())
+                    marker = '*' if manifest['version'] == current else ' '
+                    print(f"{marker} {manifest['version']}  {manifest['created']}  "
+                          f"{len(manifest['files'])} files  {size / (1 << 20):.1f} MB")
+            elif args.command == 'verify':
+                version = store.open(args.version, verify='full')
+                if version is None:
+                    print(f"⚠️  {lineage}: no store version to verify")
+                    continue
+                print(f"✅ {lineage} {version.version}: {len(version.files)} files match their checksums")
+            elif args.command == 'rollback':
+                print(f"✅ {lineage} CURRENT -> {store.rollback(args.version)}")
+            elif args.command == 'import-loose':
+                if not any(os.path.exists(os.path.join(args.models_dir, name)) for name in LINEAGES[lineage]):
+                    print(f"⚠️  {lineage}: no loose artifacts in {args.models_dir}")
+                    continue
+                print(f"✅ Imported loose {lineage} artifacts as {import_loose(store)}")
+            elif args.command == 'prune':
+                removed = store.prune(args.keep)
+                print(f"✅ {lineage}: removed {len(removed)} version(s)" + (f": {', '.join(removed)}" if removed else ''))
+    except ArtifactError as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == '__main__':
+    main()
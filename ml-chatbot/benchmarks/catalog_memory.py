@@ -0,0 +1,173 @@
+"""
+Catalog memory report: bytes held by each service's jewelry and diamonds catalogs, before and after the compact schema
+Boots every service twice in a fresh interpreter, with COMPACT_CATALOG=0 and =1
+
+Each service keeps a DataFrame and a ColumnarCatalog copy of the columns
+its handlers read; both are counted. Frame sizes are
+``memory_usage(deep=True)``, so string columns count their Python
+objects and not just the pointers, and catalog sizes are the nbytes of
+the column arrays. RSS is the whole worker
+after boot (models, vectorizers and interpreter included). Pages freed
+when the wide boot-time frame is replaced often stay with the allocator,
+so RSS moves less than the frames; the frame bytes are what stays
+resident and grows with the catalog.
+
+Usage:
+    python benchmarks/catalog_memory.py                         # advanced, intelligent, ml_models
+    python benchmarks/catalog_memory.py advanced --output memory.json
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from engine_benchmark import ENGINES, ML_DIR
+from scaling_curve import _current_rss_mb
+
+# name -> {kind: (frame attribute, ColumnarCatalog attribute)} on the service's bot
+SERVICES = {
+    'advanced': {'jewelry': ('jewelry_df', 'jewelry_catalog'), 'diamonds': ('diamonds_df', 'diamonds_catalog')},
+    'intelligent': {'jewelry': ('jewelry_df', 'jewelry_catalog'), 'diamonds': ('diamonds_df', 'diamonds_catalog')},
+    'ml_models': {'jewelry': ('jewelry_data', 'jewelry_catalog'), 'diamonds': ('diamonds_data', None)},
+}
+MODES = {'before': '0', 'after': '1'}
+
+
+def measure(service: str) -> Dict:
+    """Boot ``service`` in this process and report its catalog frames and RSS"""
+    workdir, module_name, attr = ENGINES[service][:3]
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    sys.path.insert(0, ML_DIR)
+    from catalog_schema import memory_report
+
+    module = importlib.import_module(module_name)
+    bot = getattr(module, attr)
+    gc.collect()
+    attributes = SERVICES[service]
+    frames = memory_report({kind: getattr(bot, frame, None) for kind, (frame, _) in attributes.items()},
+                           {kind: getattr(bot, catalog, None) if catalog else None
+                            for kind, (_, catalog) in attributes.items()})
+    return {
+        'service': service,
+        'frames': frames,
+        'frame_bytes': sum(frame['bytes'] for frame in frames.values()),
+        'catalog_bytes': sum(frame['catalog_bytes'] for frame in frames.values()),
+        'resident_bytes': sum(frame['resident_bytes'] for frame in frames.values()),
+        'rss_mb': _current_rss_mb()
+    }
+
+
+def run_isolated(service: str, mode: str, verbose: bool = False) -> Dict:
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        result_path = handle.name
+
+    env = dict(os.environ)
+    env.setdefault('HOT_PATH_LOGS', '0')
+    env['COMPACT_CATALOG'] = MODES[mode]
+    command = [sys.executable, os.path.abspath(__file__), '--worker', service, '--result-file', result_path]
+    try:
+        output = None if verbose else subprocess.DEVNULL
+        completed = subprocess.run(command, cwd=ML_DIR, env=env, stdout=output, stderr=output)
+        if completed.returncode != 0:
+            return {'service': service, 'error': f'exited with {completed.returncode}'}
+        with open(result_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_path)
+
+
+def compare(before: Dict, after: Dict) -> Dict:
+    """Per-frame and total savings between two runs of one service"""
+    frames = {}
+    for name, frame in before['frames'].items():
+        compact = after['frames'].get(name)
+        if compact is None:
+            continue
+        frames[name] = {
+            'rows': frame['rows'],
+            'columns': [frame['columns'], compact['columns']],
+            'bytes': [frame['bytes'], compact['bytes']],
+            'catalog_bytes': [frame['catalog_bytes'], compact['catalog_bytes']],
+            'resident_bytes': [frame['resident_bytes'], compact['resident_bytes']],
+            'ratio': round(frame['resident_bytes'] / max(compact['resident_bytes'], 1), 1)
+        }
+    rss = [before['rss_mb'], after['rss_mb']]
+    return {
+        'frames': frames,
+        'frame_bytes': [before['frame_bytes'], after['frame_bytes']],
+        'catalog_bytes': [before['catalog_bytes'], after['catalog_bytes']],
+        'resident_bytes': [before['resident_bytes'], after['resident_bytes']],
+        'ratio': round(before['resident_bytes'] / max(after['resident_bytes'], 1), 1),
+        'rss_mb': rss,
+        'rss_saved_mb': round(rss[0] - rss[1], 1) if None not in rss else None
+    }
+
+
+def print_report(service: str, comparison: Dict):
+    print(f"\n🧮 {service}")
+    print(f"{'catalog':<10} {'rows':>8} {'cols':>7} {'frame before':>13} {'frame after':>12} "
+          f"{'columnar':>10} {'before':>10} {'after':>10} {'ratio':>6}")
+    for name, frame in comparison['frames'].items():
+        print(f"{name:<10} {frame['rows']:>8,} {frame['columns'][0]:>3}→{frame['columns'][1]:<3} "
+              f"{frame['bytes'][0] / (1 << 20):>11.2f}MB {frame['bytes'][1] / (1 << 20):>10.2f}MB "
+              f"{frame['catalog_bytes'][1] / (1 << 20):>8.2f}MB "
+              f"{frame['resident_bytes'][0] / (1 << 20):>8.2f}MB {frame['resident_bytes'][1] / (1 << 20):>8.2f}MB "
+              f"{frame['ratio']:>5.1f}x")
+    before, after = comparison['resident_bytes']
+    print(f"{'total':<10} {'':>8} {'':>7} {'':>13} {'':>12} {'':>10} "
+          f"{before / (1 << 20):>8.2f}MB {after / (1 << 20):>8.2f}MB {comparison['ratio']:>5.1f}x")
+    if comparison['rss_saved_mb'] is not None:
+        print(f"worker RSS: {comparison['rss_mb'][0]:.0f}MB → {comparison['rss_mb'][1]:.0f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog frame memory per service, before and after COMPACT_CATALOG")
+    parser.add_argument('services', nargs='*', help=f"Services to measure (default: {', '.join(SERVICES)})")
+    parser.add_argument('--output', help="Also write the JSON report here")
+    parser.add_argument('--verbose', action='store_true', help="Show the services' own output")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = measure(args.worker)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    unknown = [name for name in args.services if name not in SERVICES]
+    if unknown:
+        parser.error(f"unknown service(s): {', '.join(unknown)}")
+
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0], 'services': {}}
+    for service in args.services or list(SERVICES):
+        runs = {}
+        for mode in MODES:
+            print(f"⏱️  {service} ({mode})...", file=sys.stderr)
+            runs[mode] = run_isolated(service, mode, args.verbose)
+        failed = [run['error'] for run in runs.values() if 'error' in run]
+        if failed:
+            print(f"❌ {service}: {failed[0]}", file=sys.stderr)
+            report['services'][service] = runs
+            continue
+        comparison = compare(runs['before'], runs['after'])
+        report['services'][service] = dict(runs, comparison=comparison)
+        print_report(service, comparison)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\n✅ Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
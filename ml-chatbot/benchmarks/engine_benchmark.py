@@ -0,0 +1,202 @@
+"""
+In-process latency/throughput benchmark for every chat engine
+Drives each bot's query method over a corpus built from intents.json and training-data.json
+
+Every engine runs in its own Python process so startup and first-query
+numbers are truly cold. Pass 1 over the corpus is reported as ``cold``
+(every query is new to the engine's caches), later passes as ``warm``.
+
+Usage:
+    python benchmarks/engine_benchmark.py                      # all engines
+    python benchmarks/engine_benchmark.py advanced simple --passes 5 --output results.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_DIR = os.path.dirname(BENCH_DIR)
+REPO_DIR = os.path.dirname(ML_DIR)
+
+# name -> (working directory, module, bot attribute, query method, setup method)
+ENGINES = {
+    'advanced': (ML_DIR, 'advanced_ml_service', 'bot', 'process_query', None),
+    'intelligent': (ML_DIR, 'intelligent_ml_service', 'bot', 'process_query', None),
+    'ml_models': (REPO_DIR, 'ml_chatbot_with_models', 'chatbot', 'generate_response', None),
+    'lightweight': (ML_DIR, 'lightweight_ml_service', 'chatbot', 'generate_response', 'load_models'),
+    'comprehensive': (ML_DIR, 'comprehensive_ml_service', 'chatbot', 'generate_response', 'load_models'),
+    'simple': (ML_DIR, 'simple_ml_service', 'chatbot', 'generate_response', 'load_models'),
+}
+
+
+def load_corpus(limit: int = None) -> List[Tuple[str, str]]:
+    """(query, label) pairs: intents.json patterns labelled by intent, then training-data questions"""
+    data_dir = os.path.join(ML_DIR, 'data')
+    with open(os.path.join(data_dir, 'intents.json'), encoding='utf-8') as f:
+        intents = json.load(f)
+    with open(os.path.join(data_dir, 'training-data.json'), encoding='utf-8') as f:
+        training = json.load(f)
+
+    corpus, seen = [], set()
+    pairs = [(pattern, intent) for intent, patterns in intents.items() for pattern in patterns]
+    pairs += [(question, 'training_pair') for question, _ in training.get('training_pairs', [])]
+    for query, label in pairs:
+        key = query.strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            corpus.append((query.strip(), label))
+    return corpus[:limit] if limit else corpus
+
+
+def summarize(latencies_ms: List[float], elapsed_s: float = None) -> Dict[str, float]:
+    """p50/p95/p99/mean/max of a latency sample, plus throughput when the wall time is given"""
+    if not latencies_ms:
+        return {'count': 0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    summary = {
+        'count': int(values.size),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(values.mean()), 3),
+        'max_ms': round(float(values.max()), 3)
+    }
+    if elapsed_s:
+        summary['throughput_qps'] = round(values.size / elapsed_s, 2)
+    return summary
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def run_engine(name: str, passes: int, limit: int = None) -> Dict:
+    """Benchmark one engine in the current process; expects to run in the engine's working directory"""
+    workdir, module_name, attribute, method, setup = ENGINES[name]
+    sys.path.insert(0, ML_DIR)
+    sys.path.insert(0, workdir)
+    corpus = load_corpus(limit)
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    bot = getattr(module, attribute)
+    if setup:
+        getattr(bot, setup)()
+    startup_s = time.perf_counter() - start
+    query = getattr(bot, method)
+
+    start = time.perf_counter()
+    query(corpus[0][0])
+    first_query_ms = (time.perf_counter() - start) * 1000
+
+    cold, warm, per_intent = [], [], {}
+    cold_elapsed = warm_elapsed = 0.0
+    for pass_number in range(passes):
+        pass_start = time.perf_counter()
+        for text, label in corpus:
+            start = time.perf_counter()
+            query(text)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if pass_number == 0:
+                cold.append(elapsed_ms)
+            else:
+                warm.append(elapsed_ms)
+                per_intent.setdefault(label, []).append(elapsed_ms)
+        if pass_number == 0:
+            cold_elapsed = time.perf_counter() - pass_start
+        else:
+            warm_elapsed += time.perf_counter() - pass_start
+
+    return {
+        'engine': name,
+        'queries': len(corpus),
+        'passes': passes,
+        'startup_s': round(startup_s, 3),
+        'first_query_ms': round(first_query_ms, 3),
+        'cold': summarize(cold, cold_elapsed),
+        'warm': summarize(warm, warm_elapsed),
+        'per_intent_warm': {label: summarize(values) for label, values in sorted(per_intent.items())},
+        'max_rss_mb': _max_rss_mb()
+    }
+
+
+def run_isolated(name: str, passes: int, limit: int = None, verbose: bool = False) -> Dict:
+    """Run one engine's benchmark in a fresh interpreter and return its result"""
+    workdir = ENGINES[name][0]
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        result_path = handle.name
+
+    env = dict(os.environ)
+    env.setdefault('HOT_PATH_LOGS', '0')
+    command = [sys.executable, os.path.abspath(__file__), '--worker', name,
+               '--passes', str(passes), '--result-file', result_path]
+    if limit:
+        command += ['--limit', str(limit)]
+
+    try:
+        output = None if verbose else subprocess.DEVNULL
+        completed = subprocess.run(command, cwd=workdir, env=env, stdout=output, stderr=output)
+        if completed.returncode != 0:
+            return {'engine': name, 'error': f'benchmark process exited with {completed.returncode}'}
+        with open(result_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat engines in-process")
+    parser.add_argument('engines', nargs='*', help=f"Engines to run (default: all of {', '.join(ENGINES)})")
+    parser.add_argument('--passes', type=int, default=3, help="Passes over the corpus; pass 1 is cold")
+    parser.add_argument('--limit', type=int, help="Use only the first N corpus queries")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--verbose', action='store_true', help="Show the engines' own output")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_engine(args.worker, args.passes, args.limit)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    unknown = [name for name in args.engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+
+    results = []
+    for name in args.engines or list(ENGINES):
+        print(f"⏱️  Benchmarking {name}...", file=sys.stderr)
+        results.append(run_isolated(name, args.passes, args.limit, args.verbose))
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'corpus_size': len(load_corpus(args.limit)),
+        'results': results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"✅ Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
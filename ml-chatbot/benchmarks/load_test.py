@@ -0,0 +1,257 @@
+"""
+Concurrent load generator for the local chat services, with an SLO report
+Starts a service (or targets --url), drives /chat with pooled keep-alive sessions and checks latency/error SLOs
+
+Without --rate the test is closed-loop: ``--concurrency`` workers send
+back-to-back, which measures saturation throughput. With --rate it is
+open-loop: requests are scheduled at that arrival rate whether or not
+earlier ones have finished, and latency is measured from the scheduled
+time, so queueing behind a slow server is not hidden.
+
+Usage:
+    python benchmarks/load_test.py advanced --concurrency 8 --duration 20
+    python benchmarks/load_test.py intelligent --rate 50 --slo-p95-ms 100 --slo-error-rate 0.01
+    python benchmarks/load_test.py --url http://localhost:5000 --rate 20 --find-saturation
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from engine_benchmark import ENGINES, ML_DIR, load_corpus, summarize
+
+LAUNCHER = """
+import sys
+sys.path.insert(0, {ml_dir!r}); sys.path.insert(0, {workdir!r})
+from werkzeug.serving import WSGIRequestHandler
+WSGIRequestHandler.protocol_version = 'HTTP/1.1'  # keep-alive
+import {module} as service
+if {setup!r}:
+    getattr(service.{attribute}, {setup!r})()
+service.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_service(name: str, port: int, verbose: bool = False) -> subprocess.Popen:
+    workdir, module, attribute, _, setup = ENGINES[name]
+    code = LAUNCHER.format(ml_dir=ML_DIR, workdir=workdir, module=module, attribute=attribute, setup=setup, port=port)
+    env = dict(os.environ)
+    env.setdefault('HOT_PATH_LOGS', '0')
+    output = None if verbose else subprocess.DEVNULL
+    return subprocess.Popen([sys.executable, '-c', code], cwd=workdir, env=env, stdout=output, stderr=output)
+
+
+def wait_until_healthy(url: str, process: Optional[subprocess.Popen], timeout: float) -> float:
+    """Poll /health; returns seconds until the service answered"""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"service exited with code {process.returncode} before becoming healthy")
+        try:
+            if requests.get(f"{url}/health", timeout=2).status_code == 200:
+                return time.monotonic() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"service not healthy after {timeout:.0f}s")
+
+
+class LoadGenerator:
+    """Fires /chat requests from a worker pool; one keep-alive session per worker thread"""
+
+    def __init__(self, url: str, corpus: List[str], concurrency: int, timeout: float = 10.0):
+        self.url = f"{url}/chat"
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._local = threading.local()
+        self._messages = itertools.cycle(corpus)
+        self._message_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        return session
+
+    def _next_message(self) -> str:
+        with self._message_lock:
+            return next(self._messages)
+
+    def _fire(self, scheduled: float, results: list):
+        error = None
+        try:
+            response = self._session().post(self.url, json={'message': self._next_message()}, timeout=self.timeout)
+            if response.status_code != 200:
+                error = f"http_{response.status_code}"
+        except requests.RequestException as e:
+            error = type(e).__name__
+        results.append(((time.perf_counter() - scheduled) * 1000, error))
+
+    def run(self, duration: float, rate: Optional[float] = None, poisson: bool = False) -> Dict:
+        results: list = []
+        start = time.perf_counter()
+        end = start + duration
+
+        if rate is None:
+            def worker():
+                while time.perf_counter() < end:
+                    self._fire(time.perf_counter(), results)
+            threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                next_at = start
+                while next_at < end:
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(self._fire, next_at, results)
+                    next_at += random.expovariate(rate) if poisson else 1.0 / rate
+
+        elapsed = time.perf_counter() - start
+        latencies = [latency for latency, error in results if error is None]
+        errors: Dict[str, int] = {}
+        for _, error in results:
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+
+        report = summarize(latencies, elapsed)
+        report.update({
+            'mode': 'closed_loop' if rate is None else 'open_loop',
+            'offered_rate': rate,
+            'concurrency': self.concurrency,
+            'duration_s': round(elapsed, 2),
+            'requests': len(results),
+            'achieved_qps': round(len(results) / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(sum(errors.values()) / len(results), 4) if results else 0.0,
+            'errors': errors
+        })
+        return report
+
+
+def check_slos(report: Dict, p95_ms: float = None, p99_ms: float = None, error_rate: float = None) -> List[str]:
+    """Human-readable SLO violations; empty when every configured SLO holds"""
+    violations = []
+    if report.get('count', 0) == 0:
+        return ['no successful requests']
+    if p95_ms is not None and report['p95_ms'] > p95_ms:
+        violations.append(f"p95 {report['p95_ms']:.1f}ms > {p95_ms:g}ms")
+    if p99_ms is not None and report['p99_ms'] > p99_ms:
+        violations.append(f"p99 {report['p99_ms']:.1f}ms > {p99_ms:g}ms")
+    if error_rate is not None and report['error_rate'] > error_rate:
+        violations.append(f"error rate {report['error_rate']:.2%} > {error_rate:.2%}")
+    return violations
+
+
+def find_saturation(generator: LoadGenerator, start_rate: float, duration: float, slos: Dict,
+                    max_steps: int = 8) -> Dict:
+    """Double the open-loop rate until the server falls behind or an SLO breaks"""
+    rate, best, stages = start_rate, None, []
+    for _ in range(max_steps):
+        report = generator.run(duration, rate)
+        violations = check_slos(report, **slos)
+        keeping_up = report.get('throughput_qps', 0) >= 0.95 * rate
+        stages.append({'offered_rate': rate, 'throughput_qps': report.get('throughput_qps', 0),
+                       'p95_ms': report.get('p95_ms'), 'error_rate': report['error_rate'], 'violations': violations})
+        if violations or not keeping_up:
+            break
+        best = rate
+        rate *= 2
+    return {'saturation_rate': best, 'stages': stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a chat service with SLO checks")
+    parser.add_argument('service', nargs='?', choices=list(ENGINES), help="Service to start locally")
+    parser.add_argument('--url', help="Target an already running service instead of starting one")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds per run")
+    parser.add_argument('--rate', type=float, help="Open-loop arrival rate (req/s); closed-loop when omitted")
+    parser.add_argument('--poisson', action='store_true', help="Exponential inter-arrival times at --rate")
+    parser.add_argument('--warmup', type=int, default=20, help="Requests sent before measuring")
+    parser.add_argument('--find-saturation', action='store_true', help="Also ramp the rate to find saturation")
+    parser.add_argument('--slo-p95-ms', type=float)
+    parser.add_argument('--slo-p99-ms', type=float)
+    parser.add_argument('--slo-error-rate', type=float)
+    parser.add_argument('--startup-timeout', type=float, default=180.0)
+    parser.add_argument('--output', help="Write the JSON report here as well")
+    parser.add_argument('--verbose', action='store_true', help="Show the service's own output")
+    args = parser.parse_args()
+
+    if not args.url and not args.service:
+        parser.error("give a service to start or --url")
+
+    process, url = None, args.url
+    if not url:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        print(f"🚀 Starting {args.service} on {url}...", file=sys.stderr)
+        process = start_service(args.service, port, args.verbose)
+
+    try:
+        startup_s = wait_until_healthy(url, process, args.startup_timeout)
+        corpus = [query for query, _ in load_corpus()]
+        generator = LoadGenerator(url, corpus, args.concurrency)
+        for _ in range(args.warmup):
+            generator._fire(time.perf_counter(), [])
+
+        mode = f"{args.rate:g} req/s open-loop" if args.rate else f"closed-loop x{args.concurrency}"
+        print(f"⏱️  Running {mode} for {args.duration:g}s...", file=sys.stderr)
+        report = generator.run(args.duration, args.rate, args.poisson)
+
+        slos = {'p95_ms': args.slo_p95_ms, 'p99_ms': args.slo_p99_ms, 'error_rate': args.slo_error_rate}
+        violations = check_slos(report, **slos)
+        result = {
+            'service': args.service or url,
+            'startup_s': round(startup_s, 2),
+            'load': report,
+            'slo': {key: value for key, value in slos.items() if value is not None},
+            'violations': violations,
+            'passed': not violations
+        }
+        if args.find_saturation:
+            start_rate = args.rate or max(report.get('throughput_qps', 1.0) / 4, 1.0)
+            print(f"📈 Searching saturation from {start_rate:g} req/s...", file=sys.stderr)
+            result['saturation'] = find_saturation(generator, start_rate, args.duration, slos)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+    if violations:
+        print(f"❌ SLO violated: {'; '.join(violations)}", file=sys.stderr)
+        sys.exit(1)
+    print("✅ All SLOs met", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark regression gate
+Runs the engine benchmark and trainer timings N times, takes medians and compares them to benchmarks/baseline.json
+
+A metric regresses when its median exceeds
+``baseline * (1 + relative) + absolute``, with the relative and absolute
+tolerances picked by metric kind (startup, latency, memory, training).
+The absolute term keeps sub-millisecond jitter from failing the gate;
+the min/max spread of the repeats is reported so noisy runs stand out.
+
+Trainers are timed in their own processes. A compare run times the
+trainers the baseline recorded; --update-baseline records every trainer
+unless --trainers or --no-trainers narrows it. A trainer whose imports
+fail (e.g. a missing optional dependency) is skipped and reported, and
+its baseline metrics are marked skipped rather than failing the gate.
+
+Usage:
+    python benchmarks/regression_gate.py                    # compare, exit 1 on regression
+    python benchmarks/regression_gate.py --update-baseline  # record the current medians
+    python benchmarks/regression_gate.py --trainers keras_trainer
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from engine_benchmark import BENCH_DIR, ML_DIR, _max_rss_mb, run_isolated
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+GATED_ENGINES = ('advanced', 'ml_models')
+
+DEFAULT_TOLERANCES = {
+    'startup_s': {'relative': 0.25, 'absolute': 0.5},
+    'latency_ms': {'relative': 0.30, 'absolute': 0.5},
+    'memory_mb': {'relative': 0.15, 'absolute': 25.0},
+    'training_s': {'relative': 0.25, 'absolute': 0.5},
+}
+
+
+def metric_kind(name: str) -> str:
+    if name.endswith('startup_s'):
+        return 'startup_s'
+    if name.endswith('_ms'):
+        return 'latency_ms'
+    if name.endswith('_mb'):
+        return 'memory_mb'
+    return 'training_s'
+
+
+def flatten_engine(result: Dict) -> Dict[str, float]:
+    """Gate-relevant numbers of one engine_benchmark result, as flat ``engine.metric`` keys"""
+    engine = result['engine']
+    metrics = {
+        f'{engine}.startup_s': result['startup_s'],
+        f'{engine}.first_query_ms': result['first_query_ms'],
+        f'{engine}.warm_p50_ms': result['warm']['p50_ms'],
+        f'{engine}.warm_p95_ms': result['warm']['p95_ms'],
+        f'{engine}.max_rss_mb': result['max_rss_mb'],
+    }
+    for intent, summary in result['per_intent_warm'].items():
+        metrics[f'{engine}.intent.{intent}.p50_ms'] = summary['p50_ms']
+    return metrics
+
+
+def time_advanced_trainer() -> Dict[str, float]:
+    """Load, analyze and train with AdvancedDatasetTrainer, without saving; runs in ML_DIR"""
+    sys.path.insert(0, ML_DIR)
+    from advanced_dataset_trainer import AdvancedDatasetTrainer
+
+    trainer = AdvancedDatasetTrainer()
+    start = time.perf_counter()
+    trainer.load_datasets()
+    trainer.analyze_datasets()
+    trainer.train_advanced_models()
+    return {
+        'advanced_trainer.training_s': round(time.perf_counter() - start, 3),
+        'advanced_trainer.max_rss_mb': _max_rss_mb()
+    }
+
+
+def time_keras_trainer() -> Dict[str, float]:
+    """Fit training/train-models.py's Keras intent classifier on the bundled data, without saving; runs in ML_DIR"""
+    spec = importlib.util.spec_from_file_location('train_models', os.path.join(ML_DIR, 'training', 'train-models.py'))
+    train_models = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.dirname(spec.origin))
+    spec.loader.exec_module(train_models)
+    train_models.tf.keras.utils.set_random_seed(42)
+
+    trainer = train_models.JewelryBotTrainer()
+    start = time.perf_counter()
+    if not trainer.load_data():
+        raise RuntimeError("Keras trainer could not load data/training-data.json")
+    trainer.train_intent_classifier()
+    return {
+        'keras_trainer.training_s': round(time.perf_counter() - start, 3),
+        'keras_trainer.max_rss_mb': _max_rss_mb()
+    }
+
+
+# Trainer name (its metrics' prefix) -> timing function run in a worker process
+TRAINERS = {
+    'advanced_trainer': time_advanced_trainer,
+    'keras_trainer': time_keras_trainer,
+}
+
+
+def run_trainer_isolated(trainer: str, verbose: bool = False) -> Dict:
+    """The trainer's metrics, or ``{'skipped': reason}`` when its imports fail"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        result_path = handle.name
+    output = None if verbose else subprocess.DEVNULL
+    try:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker-trainer', trainer,
+                                    '--result-file', result_path], cwd=ML_DIR, stdout=output, stderr=output)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{trainer} benchmark exited with {completed.returncode}")
+        with open(result_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_path)
+
+
+def collect(repeats: int, passes: int, limit: int = None, trainers: List[str] = (),
+            verbose: bool = False) -> Tuple[Dict[str, List[float]], Dict[str, str]]:
+    """Every metric's value from each of ``repeats`` fresh-process runs, and the skipped trainers with why"""
+    samples: Dict[str, List[float]] = {}
+    skipped: Dict[str, str] = {}
+    for run in range(repeats):
+        print(f"⏱️  Run {run + 1}/{repeats}", file=sys.stderr)
+        for engine in GATED_ENGINES:
+            result = run_isolated(engine, passes, limit, verbose)
+            if 'error' in result:
+                raise RuntimeError(f"{engine}: {result['error']}")
+            for name, value in flatten_engine(result).items():
+                samples.setdefault(name, []).append(value)
+        for trainer in trainers:
+            if trainer in skipped:
+                continue
+            result = run_trainer_isolated(trainer, verbose)
+            if 'skipped' in result:
+                skipped[trainer] = result['skipped']
+                print(f"⚠️  Skipping {trainer}: {result['skipped']}", file=sys.stderr)
+                continue
+            for name, value in result.items():
+                samples.setdefault(name, []).append(value)
+    return samples, skipped
+
+
+def baseline_trainers(baseline: Dict) -> List[str]:
+    """Trainers a baseline was recorded with; older baselines only show them in their metric names"""
+    if 'trainers' in baseline:
+        return baseline['trainers']
+    return sorted({name.split('.')[0] for name in baseline.get('metrics', {})} & set(TRAINERS))
+
+
+def compare(medians: Dict[str, float], spreads: Dict[str, float], baseline: Dict,
+            skipped: Dict[str, str] = None) -> List[Dict]:
+    tolerances = {**DEFAULT_TOLERANCES, **baseline.get('tolerances', {})}
+    rows = []
+    for name, base in sorted(baseline['metrics'].items()):
+        reason = (skipped or {}).get(name.split('.')[0])
+        if reason is not None:
+            rows.append({'metric': name, 'baseline': base, 'status': 'skipped', 'reason': reason})
+            continue
+        if name not in medians:
+            rows.append({'metric': name, 'baseline': base, 'status': 'missing'})
+            continue
+        tolerance = tolerances[metric_kind(name)]
+        limit = base * (1 + tolerance['relative']) + tolerance['absolute']
+        current = medians[name]
+        rows.append({
+            'metric': name,
+            'baseline': base,
+            'current': current,
+            'limit': round(limit, 3),
+            'change_pct': round(100 * (current - base) / base, 1) if base else None,
+            'spread': spreads[name],
+            'status': 'regressed' if current > limit else 'ok'
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when benchmarks regress against the committed baseline")
+    parser.add_argument('--repeats', type=int, help="Fresh-process runs per metric; the median is gated")
+    parser.add_argument('--passes', type=int, help="Passes over the corpus per run")
+    parser.add_argument('--limit', type=int, help="Use only the first N corpus queries")
+    parser.add_argument('--trainers', nargs='+', choices=list(TRAINERS),
+                        help="Trainers to time (default: the baseline's; every trainer with --update-baseline)")
+    parser.add_argument('--no-trainers', action='store_true', help="Skip the trainer timings")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Write the current medians as the baseline")
+    parser.add_argument('--output', help="Write the raw samples, medians and comparison as JSON")
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--worker-trainer', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_trainer:
+        try:
+            result = TRAINERS[args.worker_trainer]()
+        except ImportError as e:
+            result = {'skipped': f"{type(e).__name__}: {e}"}
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    # Unless overridden, measure exactly the way the baseline was measured
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        parser.error(f"no baseline at {args.baseline}; create one with --update-baseline")
+    repeats = args.repeats or baseline.get('repeats', 3)
+    passes = args.passes or baseline.get('passes', 3)
+    limit = args.limit or baseline.get('limit')
+    if passes < 2:
+        parser.error("--passes must be at least 2; warm latency comes from passes after the first")
+
+    if args.no_trainers:
+        trainers = []
+    elif args.trainers:
+        trainers = args.trainers
+    else:
+        trainers = list(TRAINERS) if args.update_baseline else baseline_trainers(baseline)
+
+    samples, skipped = collect(repeats, passes, limit, trainers, args.verbose)
+    medians = {name: round(statistics.median(values), 3) for name, values in samples.items()}
+    spreads = {name: round(max(values) - min(values), 3) for name, values in samples.items()}
+
+    if args.update_baseline:
+        baseline = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'repeats': repeats,
+            'passes': passes,
+            'limit': limit,
+            'trainers': [trainer for trainer in trainers if trainer not in skipped],
+            'tolerances': DEFAULT_TOLERANCES,
+            'metrics': medians
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"✅ Baseline with {len(medians)} metrics written to {args.baseline}", file=sys.stderr)
+        return
+
+    rows = compare(medians, spreads, baseline, skipped)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'samples': samples, 'medians': medians, 'skipped': skipped, 'comparison': rows}, f, indent=2)
+
+    failed = [row for row in rows if row['status'] in ('regressed', 'missing')]
+    for row in rows:
+        marker = {'ok': '✅', 'skipped': '⚠️ '}.get(row['status'], '❌')
+        if row['status'] == 'skipped':
+            print(f"{marker} {row['metric']}: skipped ({row['reason']})")
+        elif row['status'] == 'missing':
+            print(f"{marker} {row['metric']}: missing from this run")
+        else:
+            print(f"{marker} {row['metric']}: {row['current']:g} vs {row['baseline']:g} "
+                  f"(limit {row['limit']:g}, spread {row['spread']:g})")
+
+    if failed:
+        print(f"\n❌ {len(failed)} of {len(rows)} metrics regressed", file=sys.stderr)
+        sys.exit(1)
+    gated = sum(row['status'] == 'ok' for row in rows)
+    note = f", {len(rows) - gated} skipped" if gated < len(rows) else ''
+    print(f"\n✅ No regressions across {gated} metrics{note}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Scaling-curve benchmark: boot time, memory and per-intent handler latency vs catalog size
+Boots AdvancedJewelryBot / IntelligentJewelryBot against synthetic catalogs of growing size and fits latency ~ n^k per handler
+
+Each (bot, size) runs in a fresh interpreter. The worker generates
+``size`` diamonds and ``size`` jewelry rows with catalog_generator,
+serves them to the bot's unchanged ``load_datasets`` in place of the CSV
+files (so boot covers enrichment, training and fingerprinting but not
+CSV parsing), then times every corpus query through ``process_query``
+and groups latencies by the intent the bot itself reported, i.e. by the
+handler that ran. The semantic cache is off and compiled answers never
+match a synthetic catalog, so every query reaches the live handlers.
+
+Memory: the service module boots a bot at import, which is given a tiny
+synthetic catalog so it frees next to nothing when dropped. The RSS
+baseline is taken after that and before the measured catalogs are
+generated. Each point records the absolute worker RSS and the deep bytes
+of the bot's frames plus their ColumnarCatalog copies; both are fitted
+against rows, the byte count being the allocator-independent one.
+
+The fitted exponent k comes from a least-squares line through
+log(p50 latency) vs log(rows): k ~ 0 is size-independent, k ~ 1 scans the
+catalog. A size that times out or runs out of memory is recorded and the
+larger sizes for that bot are skipped.
+
+Usage:
+    python benchmarks/scaling_curve.py                                  # both bots, 10k..10M
+    python benchmarks/scaling_curve.py intelligent --sizes 10000 100000 1000000 --output curve.json
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from engine_benchmark import ML_DIR, _max_rss_mb, load_corpus, summarize
+
+# name -> (module, bot class)
+BOTS = {
+    'advanced': ('advanced_ml_service', 'AdvancedJewelryBot'),
+    'intelligent': ('intelligent_ml_service', 'IntelligentJewelryBot'),
+}
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+CATALOG_FILES = {'jewelry_dataset.csv': 'jewelry', 'diamonds_dataset.csv': 'diamonds'}
+# Rows given to the bot each service module boots at import, which the worker then drops
+IMPORT_BOT_ROWS = 1_000
+# kind -> (frame attribute, ColumnarCatalog attribute) on both bots
+CATALOG_ATTRIBUTES = {'jewelry': ('jewelry_df', 'jewelry_catalog'), 'diamonds': ('diamonds_df', 'diamonds_catalog')}
+
+# Upper bounds on the fitted exponent for each complexity label
+COMPLEXITY_CLASSES = [(0.15, 'O(1)'), (0.6, 'sublinear'), (1.25, 'O(n)'), (float('inf'), 'superlinear')]
+
+
+def _current_rss_mb() -> Optional[float]:
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1 << 20), 1)
+
+
+def _serving(catalogs: Dict):
+    """Patch pandas.read_csv to hand out ``catalogs`` (popped, so the bot holds the only reference) for the CSV names"""
+    import pandas as pd
+    read_csv = pd.read_csv
+
+    def synthetic_read_csv(path, *args, **kwargs):
+        kind = CATALOG_FILES.get(os.path.basename(str(path)))
+        if kind is None or kind not in catalogs:
+            return read_csv(path, *args, **kwargs)
+        return catalogs.pop(kind)
+
+    pd.read_csv = synthetic_read_csv
+    return lambda: setattr(pd, 'read_csv', read_csv)
+
+
+def run_size(bot_name: str, rows: int, seed: int = 42, passes: int = 1, limit: int = None) -> Dict:
+    """Boot one bot on a ``rows``-row synthetic catalog in this process and time the corpus"""
+    sys.path.insert(0, ML_DIR)
+    from catalog_generator import generate_catalog
+    from catalog_schema import memory_report
+
+    def generate(n: int) -> Dict:
+        return {kind: generate_catalog(kind, n, seed, categorical=False) for kind in CATALOG_FILES.values()}
+
+    # The module boots a bot at import; a tiny catalog keeps it from leaving freed arenas behind
+    module_name, class_name = BOTS[bot_name]
+    restore = _serving(generate(IMPORT_BOT_ROWS))
+    try:
+        module = importlib.import_module(module_name)
+    finally:
+        restore()
+    module.bot = None
+    gc.collect()
+    rss_before = _current_rss_mb()
+
+    start = time.perf_counter()
+    catalogs = generate(rows)
+    generate_s = time.perf_counter() - start
+
+    restore = _serving(catalogs)
+    try:
+        start = time.perf_counter()
+        bot = getattr(module, class_name)()
+        boot_s = time.perf_counter() - start
+    finally:
+        restore()
+    rss_after = _current_rss_mb()
+    resident = memory_report({kind: getattr(bot, frame, None) for kind, (frame, _) in CATALOG_ATTRIBUTES.items()},
+                             {kind: getattr(bot, catalog, None) for kind, (_, catalog) in CATALOG_ATTRIBUTES.items()})
+
+    corpus = load_corpus(limit)
+    bot.process_query(corpus[0][0])
+    per_intent, latencies = {}, []
+    elapsed = 0.0
+    for _ in range(passes):
+        pass_start = time.perf_counter()
+        for text, _ in corpus:
+            start = time.perf_counter()
+            result = bot.process_query(text)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            latencies.append(elapsed_ms)
+            per_intent.setdefault(result.get('intent', 'unknown'), []).append(elapsed_ms)
+        elapsed += time.perf_counter() - pass_start
+
+    return {
+        'bot': bot_name,
+        'rows': rows,
+        'generate_s': round(generate_s, 3),
+        'boot_s': round(boot_s, 3),
+        'rss_mb': rss_after,
+        # Generated catalogs plus everything the bot builds from them
+        'boot_rss_delta_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+        'catalog_mb': round(sum(frame['resident_bytes'] for frame in resident.values()) / (1 << 20), 2),
+        'max_rss_mb': _max_rss_mb(),
+        'all': summarize(latencies, elapsed),
+        'per_intent': {intent: summarize(values) for intent, values in sorted(per_intent.items())}
+    }
+
+
+def run_isolated(bot_name: str, rows: int, seed: int, passes: int, limit: int = None,
+                 timeout: float = None, verbose: bool = False) -> Dict:
+    """One (bot, size) point in a fresh interpreter; failures come back as ``{'error': ...}``"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        result_path = handle.name
+
+    env = dict(os.environ)
+    env.setdefault('HOT_PATH_LOGS', '0')
+    env['SEMANTIC_CACHE_SIZE'] = '0'
+    command = [sys.executable, os.path.abspath(__file__), '--worker', bot_name, '--rows', str(rows),
+               '--seed', str(seed), '--passes', str(passes), '--result-file', result_path]
+    if limit:
+        command += ['--limit', str(limit)]
+
+    start = time.perf_counter()
+    try:
+        output = None if verbose else subprocess.DEVNULL
+        completed = subprocess.run(command, cwd=ML_DIR, env=env, stdout=output, stderr=output, timeout=timeout)
+        if completed.returncode != 0:
+            killed = ' (killed: out of memory?)' if completed.returncode == -9 else ''
+            return {'bot': bot_name, 'rows': rows, 'error': f'exited with {completed.returncode}{killed}'}
+        with open(result_path, encoding='utf-8') as f:
+            return json.load(f)
+    except subprocess.TimeoutExpired:
+        return {'bot': bot_name, 'rows': rows,
+                'error': f'timed out after {time.perf_counter() - start:.0f}s'}
+    finally:
+        os.unlink(result_path)
+
+
+def fit_complexity(points: List[Tuple[int, float]]) -> Optional[Dict]:
+    """Exponent k of value ~ rows^k by least squares in log-log space, with its complexity label"""
+    points = [(rows, value) for rows, value in points if value and value > 0]
+    if len(points) < 2:
+        return None
+    log_rows = np.log([rows for rows, _ in points])
+    log_values = np.log([value for _, value in points])
+    exponent = float(np.polyfit(log_rows, log_values, 1)[0])
+    label = next(name for bound, name in COMPLEXITY_CLASSES if exponent < bound)
+    return {'exponent': round(exponent, 2), 'class': label, 'points': len(points)}
+
+
+def fit_report(results: List[Dict]) -> Dict:
+    """Complexity fits for boot time, memory and each handler's p50 latency, from one bot's results"""
+    ok = [result for result in results if 'error' not in result]
+    fits = {
+        'boot_s': fit_complexity([(result['rows'], result['boot_s']) for result in ok]),
+        'rss_mb': fit_complexity([(result['rows'], result['rss_mb']) for result in ok]),
+        'catalog_mb': fit_complexity([(result['rows'], result['catalog_mb']) for result in ok]),
+        'handlers': {}
+    }
+    intents = sorted({intent for result in ok for intent in result['per_intent']})
+    for intent in intents:
+        points = [(result['rows'], result['per_intent'][intent]['p50_ms'])
+                  for result in ok if intent in result['per_intent']]
+        fit = fit_complexity(points)
+        if fit is not None:
+            fit['p50_ms_at_largest'] = points[-1][1]
+            fits['handlers'][intent] = fit
+    return fits
+
+
+def print_report(bot_name: str, results: List[Dict], fits: Dict):
+    print(f"\n📈 {bot_name}")
+    ok = [result for result in results if 'error' not in result]
+    intents = sorted({intent for result in ok for intent in result['per_intent']})
+    header = f"{'rows':>11} {'boot s':>8} {'RSS MB':>8} {'cat MB':>8} {'all p50':>8}" + ''.join(f" {intent[:12]:>12}" for intent in intents)
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        if 'error' in result:
+            print(f"{result['rows']:>11,} ❌ {result['error']}")
+            continue
+        cells = ''.join(f" {result['per_intent'][intent]['p50_ms']:>12.3f}" if intent in result['per_intent']
+                        else f" {'-':>12}" for intent in intents)
+        print(f"{result['rows']:>11,} {result['boot_s']:>8.2f} {result['rss_mb'] or 0:>8.0f} {result['catalog_mb']:>8.1f} "
+              f"{result['all']['p50_ms']:>8.3f}{cells}")
+
+    print(f"\n{'fit (p50 ~ rows^k)':<24} {'k':>6}  class")
+    rows = [('boot time', fits['boot_s']), ('worker RSS', fits['rss_mb']), ('catalog bytes', fits['catalog_mb'])]
+    rows += sorted(fits['handlers'].items(), key=lambda item: -item[1]['exponent'])
+    for name, fit in rows:
+        if fit is None:
+            print(f"{name:<24} {'-':>6}  (needs two sizes)")
+        else:
+            flag = ' ⚠️' if fit['class'] in ('O(n)', 'superlinear') else ''
+            print(f"{name:<24} {fit['exponent']:>6.2f}  {fit['class']}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Handler latency, boot time and memory vs catalog size")
+    parser.add_argument('bots', nargs='*', help=f"Bots to run (default: {', '.join(BOTS)})")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="catalog rows (each of diamonds and jewelry)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--passes', type=int, default=1, help="timed passes over the corpus")
+    parser.add_argument('--limit', type=int, help="Use only the first N corpus queries")
+    parser.add_argument('--timeout', type=float, default=900, help="seconds per (bot, size) before giving up")
+    parser.add_argument('--output', help="Also write the JSON report here")
+    parser.add_argument('--verbose', action='store_true', help="Show the bots' own output")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_size(args.worker, args.rows, args.seed, args.passes, args.limit)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    unknown = [name for name in args.bots if name not in BOTS]
+    if unknown:
+        parser.error(f"unknown bot(s): {', '.join(unknown)}")
+
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+              'sizes': sorted(args.sizes), 'bots': {}}
+    for bot_name in args.bots or list(BOTS):
+        results = []
+        for rows in sorted(args.sizes):
+            print(f"⏱️  {bot_name} @ {rows:,} rows...", file=sys.stderr)
+            result = run_isolated(bot_name, rows, args.seed, args.passes, args.limit, args.timeout, args.verbose)
+            results.append(result)
+            if 'error' in result:
+                print(f"❌ {bot_name} @ {rows:,}: {result['error']}; skipping larger sizes", file=sys.stderr)
+                break
+        fits = fit_report(results)
+        report['bots'][bot_name] = {'results': results, 'fits': fits}
+        print_report(bot_name, results, fits)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\n✅ Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Cold-start profiler for the chat services
+Runs each service's import + init under ``python -X importtime`` in a fresh interpreter and breaks the time down by module and package
+
+The service modules build their bot at import time, so the service
+module's own ("self") time is its init work, while everything beneath it
+is imports. Timings come from a fresh process every run; the first run
+after a source change also includes bytecode compilation.
+
+Usage:
+    python benchmarks/startup_profile.py                    # every service, top 15 imports
+    python benchmarks/startup_profile.py ml_models advanced --top 25 --json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from engine_benchmark import ENGINES, ML_DIR
+
+HEAVY_MODULES = ('tensorflow', 'keras', 'sklearn', 'pandas', 'scipy', 'matplotlib', 'seaborn', 'flask')
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {ml_dir!r}); sys.path.insert(0, {workdir!r})
+start = time.perf_counter()
+import {module} as service
+imported = time.perf_counter()
+if {setup!r}:
+    getattr(service.{attribute}, {setup!r})()
+done = time.perf_counter()
+from lazy_imports import is_loaded
+import resource
+with open({result_path!r}, 'w') as f:
+    json.dump({{'import_init_s': done - start, 'setup_s': done - imported,
+               'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10),
+               'loaded': [name for name in {heavy!r} if is_loaded(name)]}}, f)
+"""
+
+
+def parse_importtime(text: str) -> List[Dict]:
+    """``-X importtime`` stderr lines as dicts with self/cumulative microseconds and nesting depth"""
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us)
+        })
+    return entries
+
+
+def profile_service(name: str, top: int = 15, verbose: bool = False) -> Dict:
+    """Import + init one service under -X importtime and summarize where the time went"""
+    workdir, module, attribute, _, setup = ENGINES[name]
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        result_path = handle.name
+    code = PROBE.format(ml_dir=ML_DIR, workdir=workdir, module=module, attribute=attribute, setup=setup,
+                        result_path=result_path, heavy=HEAVY_MODULES)
+
+    env = dict(os.environ)
+    env.setdefault('HOT_PATH_LOGS', '0')
+    try:
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=workdir, env=env,
+                                   stdout=None if verbose else subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   text=True)
+        if completed.returncode != 0:
+            tail = completed.stderr.strip().splitlines()[-1:] or ['']
+            return {'service': name, 'error': f'exited with {completed.returncode}: {tail[0]}'}
+        with open(result_path, encoding='utf-8') as f:
+            probe = json.load(f)
+    finally:
+        os.unlink(result_path)
+
+    entries = parse_importtime(completed.stderr)
+    service_entry = next((entry for entry in entries if entry['module'] == module), None)
+    init_s = service_entry['self_us'] / 1e6 if service_entry else 0.0
+
+    packages: Dict[str, int] = {}
+    for entry in entries:
+        if entry['module'] != module:
+            root = entry['module'].split('.')[0]
+            packages[root] = packages.get(root, 0) + entry['self_us']
+
+    slowest = sorted((entry for entry in entries if entry['module'] != module),
+                     key=lambda entry: entry['cumulative_us'], reverse=True)
+    return {
+        'service': name,
+        'import_init_s': round(probe['import_init_s'], 3),
+        'imports_s': round(max(probe['import_init_s'] - probe['setup_s'] - init_s, 0.0), 3),
+        'init_s': round(init_s + probe['setup_s'], 3),
+        'modules_imported': len(entries),
+        'heavy_loaded': probe['loaded'],
+        'max_rss_mb': round(probe['max_rss_mb'], 1),
+        'top_packages': [{'package': package, 'self_ms': round(us / 1000, 1)}
+                         for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]],
+        'top_imports': [{'module': entry['module'], 'cumulative_ms': round(entry['cumulative_us'] / 1000, 1),
+                         'self_ms': round(entry['self_us'] / 1000, 1)} for entry in slowest[:top]]
+    }
+
+
+def print_report(report: Dict):
+    if 'error' in report:
+        print(f"❌ {report['service']}: {report['error']}")
+        return
+    print(f"\n🚀 {report['service']}: {report['import_init_s']:.2f}s import + init "
+          f"({report['imports_s']:.2f}s imports, {report['init_s']:.2f}s init, "
+          f"{report['modules_imported']} modules, {report['max_rss_mb']:g} MB)")
+    print(f"   heavy modules loaded: {', '.join(report['heavy_loaded']) or 'none'}")
+    print("   by package (self ms):  " + ', '.join(f"{row['package']} {row['self_ms']:g}"
+                                                   for row in report['top_packages']))
+    print("   slowest imports (cumulative ms):")
+    for row in report['top_imports']:
+        print(f"     {row['cumulative_ms']:>9.1f}  {row['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down each service's cold start with -X importtime")
+    parser.add_argument('services', nargs='*', help=f"Services to profile (default: all of {', '.join(ENGINES)})")
+    parser.add_argument('--top', type=int, default=15, help="Rows in the package and import tables")
+    parser.add_argument('--json', action='store_true', help="Print the reports as JSON")
+    parser.add_argument('--verbose', action='store_true', help="Show the services' own output")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.services if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown service(s): {', '.join(unknown)}")
+
+    reports = []
+    for name in args.services or list(ENGINES):
+        print(f"⏱️  Profiling {name}...", file=sys.stderr)
+        reports.append(profile_service(name, args.top, args.verbose))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+
+
+if __name__ == '__main__':
+    main()
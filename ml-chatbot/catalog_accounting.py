@@ -0,0 +1,276 @@
+"""
+Opt-in catalog access accounting for the chat handlers
+Counts rows touched, pandas and catalog operations and tracemalloc growth per handler call and exports them to /metrics
+
+Enabled with CATALOG_ACCOUNTING=1; CATALOG_ACCOUNTING_ALLOC=0 skips the
+tracemalloc part, which slows every allocation in the process. When
+disabled nothing is wrapped and the handlers run untouched.
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import tracemalloc
+from typing import Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+from catalog_core import ROWS_VISITED, ColumnarCatalog
+from service_metrics import REGISTRY
+
+BYTE_BUCKETS = (1 << 10, 16 << 10, 128 << 10, 1 << 20, 8 << 20, 64 << 20, 256 << 20)
+ROW_BUCKETS = (0, 10, 100, 1000, 5000, 20000, 60000, 250000, 1000000)
+
+CALLS = REGISTRY.counter('catalog_handler_calls_total', 'Accounted handler invocations', ['handler'])
+ROWS = REGISTRY.counter('catalog_rows_touched_total', 'Catalog rows touched by pandas operations', ['handler'])
+OPS = REGISTRY.counter('catalog_pandas_ops_total', 'Pandas and ColumnarCatalog operations executed on the catalog',
+                       ['handler', 'op'])
+ROWS_PER_CALL = REGISTRY.histogram('catalog_rows_per_call', 'Rows touched per handler call', ['handler'],
+                                   buckets=ROW_BUCKETS)
+ALLOC_BYTES = REGISTRY.histogram('catalog_alloc_bytes', 'Peak traced allocation growth per handler call', ['handler'],
+                                 buckets=BYTE_BUCKETS)
+
+_current = contextvars.ContextVar('catalog_invocation', default=None)
+# ColumnarCatalog method name -> signature, to find each call's ``rows`` argument
+_SIGNATURES: Dict[str, inspect.Signature] = {}
+
+
+class _Invocation:
+    __slots__ = ('handler', 'rows', 'ops')
+
+    def __init__(self, handler: str):
+        self.handler = handler
+        self.rows = 0
+        self.ops: Dict[str, int] = {}
+
+    def record(self, op: str, rows: int):
+        self.rows += rows
+        self.ops[op] = self.ops.get(op, 0) + 1
+
+
+def _unwrap(value):
+    if isinstance(value, AccountedFrame):
+        return value._obj
+    if isinstance(value, tuple):
+        return tuple(_unwrap(item) for item in value)
+    if isinstance(value, list):
+        return [_unwrap(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _unwrap(item) for key, item in value.items()}
+    return value
+
+
+def _is_pandas(value) -> bool:
+    module = type(value).__module__
+    return module == 'pandas' or module.startswith('pandas.')
+
+
+class AccountedFrame:
+    """
+    Transparent proxy over a pandas object (frame, series, index, accessor,
+    groupby, indexer). Every method call, item access or operator is
+    charged to the running handler with the row count of the operand, and
+    pandas results come back wrapped so chained calls are charged too.
+    Scalars, dicts and lists come back as-is.
+    """
+
+    __slots__ = ('_obj', '_label', '_rows')
+
+    def __init__(self, obj, label: str = None, rows: Optional[int] = None):
+        object.__setattr__(self, '_obj', obj)
+        object.__setattr__(self, '_label', label or type(obj).__name__)
+        object.__setattr__(self, '_rows', rows if rows is not None else self._size(obj))
+
+    @staticmethod
+    def _size(obj) -> int:
+        try:
+            return len(obj)
+        except TypeError:
+            return 0
+
+    def _charge(self, op: str):
+        invocation = _current.get()
+        if invocation is not None:
+            invocation.record(f'{self._label}.{op}', self._rows)
+
+    def _wrap(self, value, label: str = None):
+        if isinstance(value, AccountedFrame) or not _is_pandas(value):
+            return value
+        if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+            return AccountedFrame(value)
+        return AccountedFrame(value, label, self._rows)
+
+    def _call(self, op: str, *args, **kwargs):
+        self._charge(op)
+        return self._wrap(getattr(self._obj, op)(*_unwrap(args), **_unwrap(kwargs)))
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if callable(attr) and not _is_pandas(attr):
+            @functools.wraps(attr)
+            def method(*args, **kwargs):
+                self._charge(name)
+                return self._wrap(attr(*_unwrap(args), **_unwrap(kwargs)))
+            return method
+        return self._wrap(attr, f'{self._label}.{name}')
+
+    def __setattr__(self, name, value):
+        setattr(self._obj, name, _unwrap(value))
+
+    def __getitem__(self, key):
+        return self._call('__getitem__', key)
+
+    def __setitem__(self, key, value):
+        self._call('__setitem__', key, value)
+
+    def __len__(self):
+        return len(self._obj)
+
+    def __iter__(self):
+        return iter(self._obj)
+
+    def __contains__(self, item):
+        return _unwrap(item) in self._obj
+
+    def __array__(self, *args, **kwargs):
+        self._charge('__array__')
+        return self._obj.__array__(*args, **kwargs)
+
+    def __bool__(self):
+        return bool(self._obj)
+
+    def __repr__(self):
+        return repr(self._obj)
+
+    def __str__(self):
+        return str(self._obj)
+
+    def __format__(self, spec):
+        return format(self._obj, spec)
+
+
+def _operator(name):
+    def op(self, *args):
+        return self._call(name, *args)
+    op.__name__ = name
+    return op
+
+
+for _name in ('__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__',
+              '__and__', '__or__', '__xor__', '__invert__', '__neg__', '__abs__',
+              '__add__', '__sub__', '__mul__', '__truediv__', '__floordiv__', '__mod__', '__pow__',
+              '__radd__', '__rsub__', '__rmul__', '__rtruediv__', '__rand__', '__ror__'):
+    setattr(AccountedFrame, _name, _operator(_name))
+AccountedFrame.__hash__ = None
+
+
+class AccountedCatalog:
+    """
+    Proxy over a ColumnarCatalog. Every public method call is charged to
+    the running handler: filters with the rows they report walking (a
+    clustered run, or the whole selection when masking), other methods
+    with the size of their ``rows`` selection (the whole catalog when it
+    is ``None``); ``record`` counts one row.
+    """
+
+    __slots__ = ('_catalog', '_label')
+
+    def __init__(self, catalog: ColumnarCatalog, label: str = 'catalog'):
+        object.__setattr__(self, '_catalog', catalog)
+        object.__setattr__(self, '_label', label)
+
+    def _rows(self, method, args, kwargs) -> int:
+        if method.__name__ == 'record':
+            return 1
+        signature = _SIGNATURES.get(method.__name__)
+        if signature is None:
+            signature = _SIGNATURES[method.__name__] = inspect.signature(method)
+        try:
+            rows = signature.bind(*args, **kwargs).arguments.get('rows')
+        except TypeError:
+            rows = None
+        return len(self._catalog) if rows is None else len(rows)
+
+    def __getattr__(self, name):
+        attr = getattr(self._catalog, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def method(*args, **kwargs):
+            invocation = _current.get()
+            if invocation is None:
+                return attr(*args, **kwargs)
+            visits = []
+            token = ROWS_VISITED.set(visits)
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                ROWS_VISITED.reset(token)
+                invocation.record(f'{self._label}.{name}',
+                                  sum(visits) if visits else self._rows(attr, args, kwargs))
+        return method
+
+    def __setattr__(self, name, value):
+        setattr(self._catalog, name, value)
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def __repr__(self):
+        return repr(self._catalog)
+
+
+class CatalogAccountant:
+    """Wraps a bot's catalog frames and handler methods and aggregates per handler"""
+
+    def __init__(self, track_allocations: bool = True):
+        self.track_allocations = track_allocations
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """Account one handler; calls nested inside another accounted handler count toward the outer one"""
+        @functools.wraps(fn)
+        def accounted(*args, **kwargs):
+            if _current.get() is not None:
+                return fn(*args, **kwargs)
+
+            invocation = _Invocation(name)
+            token = _current.set(invocation)
+            if self.track_allocations:
+                start, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current.reset(token)
+                CALLS.inc(handler=name)
+                ROWS.inc(invocation.rows, handler=name)
+                ROWS_PER_CALL.observe(invocation.rows, handler=name)
+                for op, count in invocation.ops.items():
+                    OPS.inc(count, handler=name, op=op)
+                if self.track_allocations:
+                    _, peak = tracemalloc.get_traced_memory()
+                    ALLOC_BYTES.observe(max(peak - start, 0), handler=name)
+        return accounted
+
+    def instrument(self, bot, frames: Iterable[str], handlers: Callable[[str], bool]):
+        """Replace ``bot.<frame>`` (DataFrame or ColumnarCatalog) with proxies and every method whose name passes ``handlers`` with a wrapper"""
+        for attribute in frames:
+            frame = getattr(bot, attribute, None)
+            if isinstance(frame, ColumnarCatalog):
+                setattr(bot, attribute, AccountedCatalog(frame, attribute))
+            elif frame is not None and not isinstance(frame, (AccountedFrame, AccountedCatalog)):
+                setattr(bot, attribute, AccountedFrame(frame))
+
+        for name in dir(type(bot)):
+            if handlers(name) and callable(getattr(type(bot), name)):
+                setattr(bot, name, self.wrap(name, getattr(bot, name)))
+
+
+def accountant_from_env() -> Optional[CatalogAccountant]:
+    if os.getenv('CATALOG_ACCOUNTING', '0').lower() not in ('1', 'true', 'on', 'yes'):
+        return None
+    return CatalogAccountant(track_allocations=os.getenv('CATALOG_ACCOUNTING_ALLOC', '1') != '0')
@@ -0,0 +1,411 @@
+"""
+NumPy-backed catalog for the request path
+Contiguous column arrays plus code tables, with vectorized filter, top-k, group-stat and row-materialize operations
+
+Built once from the loaded (and compacted) DataFrame; handlers query it
+instead of masking, sorting and iterating pandas objects per request.
+Pandas stays in training, enrichment and analytics, where per-call
+overhead does not matter.
+
+A selection of rows is a ``range`` (a contiguous run, sliced without
+copying), an ascending array of row positions, or ``None`` for the whole
+catalog. Filters take a selection and return a narrower one, so they
+chain. String columns are int codes into a code table: categoricals keep
+their own categories, other strings get their sorted distinct values.
+
+Clustering: ``cluster_by`` physically sorts the rows by a composite key,
+string columns first and optionally one numeric column last, e.g.
+category, metal, price. An offsets table maps every key prefix to its
+run of rows, so ``contains``/``equals`` on the key columns return runs
+instead of scanning, and ``between`` on the numeric key is a
+``searchsorted`` inside a run fixed on all string keys. Row positions
+then refer to the clustered order; the source order is kept so ties and
+``head`` still follow the file, as pandas would: top-k and arg-min/max
+keep the first row, mode and value counts prefer the earlier category.
+
+Filters report the rows they actually walked (the returned run on the
+offsets and ``searchsorted`` paths, the whole selection when masking) to
+``ROWS_VISITED`` when a caller such as catalog_accounting is counting.
+"""
+
+import contextvars
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+INCLUSIVE = ('both', 'neither', 'left', 'right')
+
+Rows = Union[None, range, np.ndarray]
+
+# List that filter calls append their walked row counts to; None when nobody is counting
+ROWS_VISITED = contextvars.ContextVar('catalog_rows_visited', default=None)
+
+# Composite storage keys; CATALOG_CLUSTER_<KIND>=col,col,... overrides, CATALOG_CLUSTER=0 keeps file order
+CLUSTER_KEYS = {
+    'jewelry': ['category', 'metal', 'price'],
+    'diamonds': ['cut', 'color', 'clarity', 'price'],
+}
+
+
+def cluster_keys(kind: str) -> Optional[List[str]]:
+    """Storage order for ``kind`` from the environment, ``None`` when clustering is off"""
+    if os.getenv('CATALOG_CLUSTER', '1').lower() in ('0', 'false', 'off', 'no'):
+        return None
+    override = os.getenv(f'CATALOG_CLUSTER_{kind.upper()}')
+    if override is not None:
+        return [column.strip() for column in override.split(',') if column.strip()] or None
+    return CLUSTER_KEYS.get(kind)
+
+
+def _narrow_codes(codes: np.ndarray, categories: int) -> np.ndarray:
+    dtype = np.int8 if categories < 127 else np.int16 if categories < 32767 else np.int32
+    return np.ascontiguousarray(codes, dtype=dtype)
+
+
+def _visit(count: int):
+    visits = ROWS_VISITED.get()
+    if visits is not None:
+        visits.append(count)
+
+
+def _intersect(run: Tuple[int, int], rows: Optional[range]) -> range:
+    start, stop = run
+    if rows is not None:
+        start, stop = max(start, rows.start), min(stop, rows.stop)
+    return range(start, max(start, stop))
+
+
+class ColumnarCatalog:
+    """Read-only columnar copy of a catalog frame"""
+
+    def __init__(self, numeric: Dict[str, np.ndarray], codes: Dict[str, np.ndarray],
+                 categories: Dict[str, List[str]], columns: List[str], rows: int):
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = categories
+        self.columns = columns
+        self.rows = rows
+        self._code_of = {column: {value: code for code, value in enumerate(values)}
+                         for column, values in categories.items()}
+        # Code -1 (missing) indexes the trailing None
+        self._labels = {column: np.array(values + [None], dtype=object) for column, values in categories.items()}
+        # Set by cluster(): source row of each position, key columns and their offsets tables
+        self.source_rows: Rows = None
+        self.cluster_by: List[str] = []
+        self.offsets: List[Dict[Tuple[int, ...], Tuple[int, int]]] = []
+        self._sorted_by: Optional[str] = None
+
+    @classmethod
+    def from_frame(cls, df: Optional[pd.DataFrame], columns: Iterable[str] = None,
+                   cluster_by: Iterable[str] = None) -> Optional['ColumnarCatalog']:
+        if df is None:
+            return None
+        numeric, codes, categories = {}, {}, {}
+        columns = list(columns) if columns is not None else list(df.columns)
+        for column in columns:
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = [str(value) for value in series.cat.categories]
+                codes[column] = _narrow_codes(series.cat.codes.to_numpy(), len(values))
+                categories[column] = values
+            elif series.dtype.kind in 'biuf':
+                numeric[column] = np.ascontiguousarray(series.to_numpy())
+            else:
+                column_codes, uniques = pd.factorize(series, sort=True)
+                categories[column] = [str(value) for value in uniques]
+                codes[column] = _narrow_codes(column_codes, len(uniques))
+        catalog = cls(numeric, codes, categories, columns, len(df))
+        if cluster_by:
+            catalog.cluster([column for column in cluster_by if column in columns])
+        return catalog
+
+    def cluster(self, keys: List[str]):
+        """Sort the rows by ``keys`` (string columns, then at most one numeric column) and build the offsets tables"""
+        string_keys = [key for key in keys if key in self.codes]
+        if keys[:len(string_keys)] != string_keys or len(keys) > len(string_keys) + 1:
+            raise ValueError(f"cluster keys must be string columns then at most one numeric column: {keys}")
+        if not keys:
+            return
+        # lexsort is stable and takes the primary key last
+        order = np.lexsort([self.numeric[key] if key in self.numeric else self.codes[key] for key in reversed(keys)])
+        self.numeric = {name: values[order] for name, values in self.numeric.items()}
+        self.codes = {name: values[order] for name, values in self.codes.items()}
+        self.source_rows = order if self.source_rows is None else self.source_rows[order]
+        self.cluster_by = string_keys
+
+        # offsets[level][(code, ..., code)] -> (start, stop) for every prefix of the string keys
+        change = np.zeros(self.rows, dtype=bool)
+        change[:1] = True
+        self.offsets = []
+        for level, key in enumerate(string_keys):
+            change[1:] |= self.codes[key][1:] != self.codes[key][:-1]
+            starts = np.flatnonzero(change)
+            stops = np.append(starts[1:], self.rows)
+            prefixes = zip(*(self.codes[prefix_key][starts].tolist() for prefix_key in string_keys[:level + 1]))
+            self.offsets.append({prefix: (int(start), int(stop))
+                                 for prefix, start, stop in zip(prefixes, starts, stops)})
+
+        sort_key = keys[-1] if keys[-1] in self.numeric else None
+        if sort_key is not None and not np.isnan(self.numeric[sort_key].astype(np.float64)).any():
+            # Runs fixed on every string key are sorted by the numeric key
+            self._sorted_by = sort_key
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def nbytes(self) -> int:
+        """Bytes of the column arrays and the cluster order; category labels and offsets tables are per key, not per row"""
+        arrays = list(self.numeric.values()) + list(self.codes.values())
+        if self.source_rows is not None:
+            arrays.append(self.source_rows)
+        return int(sum(values.nbytes for values in arrays))
+
+    @staticmethod
+    def _index(rows: Rows):
+        return slice(rows.start, rows.stop) if isinstance(rows, range) else rows
+
+    def _positions(self, rows: Rows) -> np.ndarray:
+        if rows is None:
+            return np.arange(self.rows)
+        if isinstance(rows, range):
+            return np.arange(rows.start, rows.stop)
+        return rows
+
+    def column(self, name: str, rows: Rows = None) -> np.ndarray:
+        """Numeric values of ``name`` for the selection; a view for ranges"""
+        values = self.numeric[name]
+        return values if rows is None else values[self._index(rows)]
+
+    def _codes(self, name: str, rows: Rows) -> np.ndarray:
+        codes = self.codes[name]
+        return codes if rows is None else codes[self._index(rows)]
+
+    @staticmethod
+    def _select(mask: np.ndarray, rows: Rows) -> np.ndarray:
+        if rows is None:
+            return np.flatnonzero(mask)
+        if isinstance(rows, range):
+            return np.flatnonzero(mask) + rows.start
+        return rows[mask]
+
+    def _run_prefix(self, rows: Rows, level: int) -> Optional[Tuple[int, ...]]:
+        """Codes of the first ``level`` string keys shared by every row of ``rows``, if it is such a run"""
+        if level == 0:
+            return () if rows is None or isinstance(rows, range) else None
+        if not isinstance(rows, range) or len(rows) == 0:
+            return None
+        keys = self.cluster_by[:level]
+        first = tuple(int(self.codes[key][rows.start]) for key in keys)
+        last = tuple(int(self.codes[key][rows.stop - 1]) for key in keys)
+        # Rows are sorted by the keys, so equal ends mean the whole run shares them
+        return first if first == last else None
+
+    def _clustered_select(self, name: str, matching: np.ndarray, rows: Rows) -> Optional[Rows]:
+        """Rows whose ``name`` code is in ``matching``, from the offsets table; ``None`` when it does not apply"""
+        if name not in self.cluster_by:
+            return None
+        level = self.cluster_by.index(name)
+        prefix = self._run_prefix(rows, level)
+        if prefix is None:
+            return None
+        table = self.offsets[level]
+        runs = [_intersect(table[prefix + (int(code),)], rows) for code in matching
+                if prefix + (int(code),) in table]
+        runs = [run for run in runs if len(run)]
+        if not runs:
+            return range(0)
+        merged = [runs[0]]
+        for run in runs[1:]:
+            if run.start == merged[-1].stop:
+                merged[-1] = range(merged[-1].start, run.stop)
+            else:
+                merged.append(run)
+        if len(merged) == 1:
+            return merged[0]
+        return np.concatenate([np.arange(run.start, run.stop) for run in merged])
+
+    # Filters
+
+    def contains(self, name: str, pattern: str, rows: Rows = None) -> Rows:
+        """Rows whose ``name`` matches the regex ``pattern`` anywhere, ignoring case (``str.contains(case=False)``)"""
+        matcher = re.compile(pattern, re.IGNORECASE)
+        # One entry per code, plus a trailing False that missing values (code -1) pick up
+        matches = np.array([matcher.search(value) is not None for value in self.categories[name]] + [False])
+        clustered = self._clustered_select(name, np.flatnonzero(matches[:-1]), rows)
+        if clustered is not None:
+            _visit(len(clustered))
+            return clustered
+        codes = self._codes(name, rows)
+        _visit(len(codes))
+        return self._select(matches[codes], rows)
+
+    def equals(self, name: str, value, rows: Rows = None) -> Rows:
+        code = self._code_of[name].get(value)
+        if code is None:
+            _visit(0)
+            return range(0)
+        clustered = self._clustered_select(name, np.array([code]), rows)
+        if clustered is not None:
+            _visit(len(clustered))
+            return clustered
+        codes = self._codes(name, rows)
+        _visit(len(codes))
+        return self._select(codes == code, rows)
+
+    def between(self, name: str, low=None, high=None, rows: Rows = None, inclusive: str = 'both') -> Rows:
+        """Rows with ``low <= name <= high``; a missing bound is open, ``inclusive`` as in ``Series.between``"""
+        if inclusive not in INCLUSIVE:
+            raise ValueError(f"inclusive must be one of {INCLUSIVE}")
+        if name == self._sorted_by and self._run_prefix(rows, len(self.cluster_by)) is not None:
+            run = range(self.rows) if rows is None else rows
+            values = self.column(name, run)
+            start = 0 if low is None else int(np.searchsorted(
+                values, low, side='left' if inclusive in ('both', 'left') else 'right'))
+            stop = len(values) if high is None else int(np.searchsorted(
+                values, high, side='right' if inclusive in ('both', 'right') else 'left'))
+            _visit(max(0, stop - start))
+            return range(run.start + start, run.start + max(start, stop))
+        values = self.column(name, rows)
+        _visit(len(values))
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low if inclusive in ('both', 'left') else values > low
+        if high is not None:
+            mask &= values <= high if inclusive in ('both', 'right') else values < high
+        return self._select(mask, rows)
+
+    def head(self, rows: Rows = None, n: int = 5) -> np.ndarray:
+        """The first ``n`` rows of the selection in source (file) order"""
+        positions = self._positions(rows)
+        if self.source_rows is None or len(positions) == 0:
+            return positions[:n]
+        source = self.source_rows[positions]
+        if n < len(positions):
+            first = np.argpartition(source, n - 1)[:n]
+            return positions[first[np.argsort(source[first])]]
+        return positions[np.argsort(source)]
+
+    # Ranking
+
+    def top_k(self, name: str, k: int, rows: Rows = None, largest: bool = False) -> np.ndarray:
+        """Positions of the ``k`` smallest (or largest) values, first row first among ties, missing values skipped"""
+        positions = self._positions(rows)
+        values = self.column(name, rows).astype(np.float64)
+        present = ~np.isnan(values)
+        if not present.all():
+            positions, values = positions[present], values[present]
+        if largest:
+            values = -values
+        if k < len(values):
+            kth = np.partition(values, k - 1)[k - 1]
+            candidates = np.flatnonzero(values <= kth)
+        else:
+            candidates = np.arange(len(values))
+        if self.source_rows is None:
+            order = candidates[np.argsort(values[candidates], kind='stable')[:k]]
+        else:
+            # Ties go to the earlier source row, whatever the storage order
+            order = candidates[np.lexsort((self.source_rows[positions[candidates]], values[candidates]))[:k]]
+        return positions[order]
+
+    def argmin(self, name: str, rows: Rows = None) -> Optional[int]:
+        best = self.top_k(name, 1, rows)
+        return int(best[0]) if len(best) else None
+
+    def argmax(self, name: str, rows: Rows = None) -> Optional[int]:
+        best = self.top_k(name, 1, rows, largest=True)
+        return int(best[0]) if len(best) else None
+
+    # Statistics
+
+    def mean(self, name: str, rows: Rows = None) -> float:
+        values = self.column(name, rows)
+        return float(np.nanmean(values, dtype=np.float64)) if len(values) else float('nan')
+
+    def min(self, name: str, rows: Rows = None):
+        values = self.column(name, rows)
+        return np.nanmin(values).item() if len(values) else float('nan')
+
+    def max(self, name: str, rows: Rows = None):
+        values = self.column(name, rows)
+        return np.nanmax(values).item() if len(values) else float('nan')
+
+    def _counts(self, name: str, rows: Rows) -> np.ndarray:
+        codes = self._codes(name, rows)
+        return np.bincount(codes[codes >= 0], minlength=len(self.categories[name]))
+
+    def value_counts(self, name: str, rows: Rows = None, top: int = None) -> List[Tuple[str, int]]:
+        """(value, count) for the values present, most frequent first"""
+        counts = self._counts(name, rows)
+        order = np.argsort(-counts, kind='stable')[:np.count_nonzero(counts)]
+        values = self.categories[name]
+        return [(values[code], int(counts[code])) for code in order[:top]]
+
+    def mode(self, name: str, rows: Rows = None) -> Optional[str]:
+        """Most frequent value, ``None`` for an empty selection"""
+        counts = self._counts(name, rows)
+        if not counts.any():
+            return None
+        return self.categories[name][int(np.argmax(counts))]
+
+    def nunique(self, name: str, rows: Rows = None) -> int:
+        return int(np.count_nonzero(self._counts(name, rows)))
+
+    def group_stats(self, by: str, name: str, rows: Rows = None) -> Dict[str, Dict[str, float]]:
+        """count/mean/min/max of ``name`` per value of ``by``, for the values present, in code order"""
+        codes = self._codes(by, rows)
+        values = self.column(name, rows).astype(np.float64)
+        keep = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[keep].astype(np.intp), values[keep]
+        groups = len(self.categories[by])
+        counts = np.bincount(codes, minlength=groups)
+        sums = np.bincount(codes, weights=values, minlength=groups)
+        minimums = np.full(groups, np.inf)
+        maximums = np.full(groups, -np.inf)
+        np.minimum.at(minimums, codes, values)
+        np.maximum.at(maximums, codes, values)
+        return {
+            self.categories[by][code]: {
+                'count': int(counts[code]),
+                'mean': float(sums[code] / counts[code]),
+                'min': float(minimums[code]),
+                'max': float(maximums[code])
+            }
+            for code in np.flatnonzero(counts)
+        }
+
+    def group_counts(self, names: List[str], rows: Rows = None) -> Dict[Tuple[str, ...], int]:
+        """Row count per combination of ``names`` values present, in code order"""
+        key = np.zeros(self.rows if rows is None else len(rows), dtype=np.int64)
+        valid = np.ones(len(key), dtype=bool)
+        sizes = [len(self.categories[name]) for name in names]
+        for name, size in zip(names, sizes):
+            codes = self._codes(name, rows)
+            valid &= codes >= 0
+            key = key * size + codes
+        counts = np.bincount(key[valid], minlength=int(np.prod(sizes)))
+        groups = {}
+        for combined in np.flatnonzero(counts):
+            values, rest = [], int(combined)
+            for name, size in zip(reversed(names), reversed(sizes)):
+                rest, code = divmod(rest, size)
+                values.append(self.categories[name][code])
+            groups[tuple(reversed(values))] = int(counts[combined])
+        return groups
+
+    # Materialization
+
+    def record(self, position: int, columns: Iterable[str] = None) -> Dict:
+        """One row as a dict of plain Python values; missing strings are ``None``"""
+        return self.records([position], columns)[0]
+
+    def records(self, rows, columns: Iterable[str] = None) -> List[Dict]:
+        """Rows as dicts, in selection order (``to_dict('records')``)"""
+        columns = list(columns) if columns is not None else self.columns
+        rows = np.asarray(rows, dtype=np.intp)
+        data = [self.numeric[name][rows].tolist() if name in self.numeric
+                else self._labels[name][self.codes[name][rows]].tolist() for name in columns]
+        return [dict(zip(columns, values)) for values in zip(*data)]
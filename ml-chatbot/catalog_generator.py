@@ -0,0 +1,277 @@
+"""
+Synthetic catalog generator for load and scale testing
+Produces diamonds and jewelry rows in the services' CSV schema with vectorized NumPy sampling and chunked, streaming writes
+
+Every chunk draws from its own generator seeded by (seed, kind, chunk
+index), so the same seed and chunk size always give the same rows and
+memory stays bounded by one chunk however many rows are written. Formats:
+
+    csv       the schema the services load today
+    npy       a directory with one .npy file per column plus schema.json;
+              categorical columns are int8 codes, and everything loads
+              memory-mapped
+    parquet   needs pyarrow
+
+Usage:
+    python catalog_generator.py diamonds 1000000 -o /tmp/diamonds_1m.csv
+    python catalog_generator.py jewelry 10000000 -o /tmp/jewelry_10m --format npy --seed 7
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ('csv', 'npy', 'parquet')
+DEFAULT_CHUNK_ROWS = 1_000_000
+SCHEMA = 'schema.json'
+
+# Base price scales with carat squared; 1ct mid-grade lands near the real dataset's ~$5k
+PRICE_PER_SQUARE_CARAT = 4000.0
+
+# Price multipliers per grade, in grade order (best first)
+CUT_MULTIPLIERS = {'Ideal': 1.2, 'Premium': 1.15, 'Very Good': 1.1, 'Good': 1.0, 'Fair': 0.9}
+COLOR_MULTIPLIERS = {'D': 1.3, 'E': 1.25, 'F': 1.2, 'G': 1.15, 'H': 1.1, 'I': 1.0, 'J': 0.95}
+CLARITY_MULTIPLIERS = {'FL': 1.5, 'IF': 1.4, 'VVS1': 1.3, 'VVS2': 1.2, 'VS1': 1.1, 'VS2': 1.0, 'SI1': 0.9, 'SI2': 0.8}
+
+JEWELRY_CATEGORIES = {
+    'ring': {
+        'types': ['engagement', 'wedding', 'cocktail', 'statement', 'eternity'],
+        'metals': ['gold', 'platinum', 'silver', 'white gold', 'rose gold'],
+        'stones': ['diamond', 'sapphire', 'emerald', 'ruby', 'pearl'],
+        'price_range': (500, 50000),
+        'size_range': (5, 12)
+    },
+    'necklace': {
+        'types': ['chain', 'pendant', 'choker', 'tennis', 'statement'],
+        'metals': ['gold', 'platinum', 'silver', 'white gold'],
+        'stones': ['diamond', 'pearl', 'gemstone', 'none'],
+        'price_range': (200, 30000),
+        'size_range': (10, 30)
+    },
+    'earrings': {
+        'types': ['stud', 'drop', 'hoop', 'chandelier', 'huggie'],
+        'metals': ['gold', 'platinum', 'silver', 'white gold'],
+        'stones': ['diamond', 'pearl', 'gemstone', 'none'],
+        'price_range': (150, 15000),
+        'size_range': (10, 30)
+    },
+    'bracelet': {
+        'types': ['tennis', 'chain', 'bangle', 'charm', 'cuff'],
+        'metals': ['gold', 'platinum', 'silver', 'white gold'],
+        'stones': ['diamond', 'gemstone', 'none'],
+        'price_range': (300, 20000),
+        'size_range': (10, 30)
+    }
+}
+BRANDS = ['luxury', 'designer', 'classic', 'modern', 'vintage']
+
+COLUMNS = {
+    'diamonds': ['carat', 'cut', 'color', 'clarity', 'depth', 'table', 'price', 'x', 'y', 'z'],
+    'jewelry': ['category', 'type', 'metal', 'stone', 'weight', 'size', 'brand', 'price']
+}
+KIND_IDS = {'diamonds': 0, 'jewelry': 1}
+
+
+def _codes_table(option_lists: List[List[str]]):
+    """Shared vocabulary plus a padded (group, option) -> code table and per-group option counts"""
+    vocabulary = list(dict.fromkeys(option for options in option_lists for option in options))
+    table = np.zeros((len(option_lists), max(len(options) for options in option_lists)), dtype=np.int8)
+    for group, options in enumerate(option_lists):
+        table[group, :len(options)] = [vocabulary.index(option) for option in options]
+    counts = np.array([len(options) for options in option_lists])
+    return vocabulary, table, counts
+
+
+_CATEGORY_NAMES = list(JEWELRY_CATEGORIES)
+_OPTION_TABLES = {field: _codes_table([details[field] for details in JEWELRY_CATEGORIES.values()])
+                  for field in ('types', 'metals', 'stones')}
+_PRICE_RANGES = np.array([details['price_range'] for details in JEWELRY_CATEGORIES.values()], dtype=float)
+_SIZE_RANGES = np.array([details['size_range'] for details in JEWELRY_CATEGORIES.values()], dtype=float)
+
+
+def _categorical(codes: np.ndarray, categories: List[str]) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes.astype(np.int8), categories=categories)
+
+
+def diamonds_chunk(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    """``rows`` diamonds priced from carat weight and the cut, color and clarity multipliers"""
+    cut = rng.integers(0, len(CUT_MULTIPLIERS), rows)
+    color = rng.integers(0, len(COLOR_MULTIPLIERS), rows)
+    clarity = rng.integers(0, len(CLARITY_MULTIPLIERS), rows)
+    # Carat skews small like the real diamonds data (median ~0.7ct), capped at 5ct
+    carat = np.clip(rng.lognormal(np.log(0.7), 0.55, rows), 0.2, 5.0)
+
+    price = PRICE_PER_SQUARE_CARAT * carat ** 2
+    price *= np.fromiter(CUT_MULTIPLIERS.values(), float)[cut]
+    price *= np.fromiter(COLOR_MULTIPLIERS.values(), float)[color]
+    price *= np.fromiter(CLARITY_MULTIPLIERS.values(), float)[clarity]
+    price = np.maximum(200, price + rng.normal(0, 1, rows) * price * 0.1)
+
+    return pd.DataFrame({
+        'carat': carat.round(2),
+        'cut': _categorical(cut, list(CUT_MULTIPLIERS)),
+        'color': _categorical(color, list(COLOR_MULTIPLIERS)),
+        'clarity': _categorical(clarity, list(CLARITY_MULTIPLIERS)),
+        'depth': rng.uniform(50, 80, rows).round(1),
+        'table': rng.uniform(50, 70, rows).round(1),
+        'price': price.round().astype(np.int64),
+        'x': rng.uniform(3, 10, rows).round(2),
+        'y': rng.uniform(3, 10, rows).round(2),
+        'z': rng.uniform(2, 7, rows).round(2)
+    })
+
+
+def jewelry_chunk(rng: np.random.Generator, rows: int, start: int = 0) -> pd.DataFrame:
+    """``rows`` jewelry items; categories rotate by row number so every category gets an equal share"""
+    category = (start + np.arange(rows)) % len(_CATEGORY_NAMES)
+    columns = {'category': _categorical(category, _CATEGORY_NAMES)}
+    for field, column in (('types', 'type'), ('metals', 'metal'), ('stones', 'stone')):
+        vocabulary, table, counts = _OPTION_TABLES[field]
+        # Uniform pick among the category's own options: floor(u * count) indexes the padded table
+        option = (rng.random(rows) * counts[category]).astype(np.int64)
+        columns[column] = _categorical(table[category, option], vocabulary)
+
+    low, high = _SIZE_RANGES[category].T
+    columns['weight'] = rng.uniform(1, 50, rows).round(2)
+    columns['size'] = (low + rng.random(rows) * (high - low)).round(2)
+    columns['brand'] = _categorical(rng.integers(0, len(BRANDS), rows), BRANDS)
+    low, high = _PRICE_RANGES[category].T
+    columns['price'] = (low + rng.random(rows) * (high - low)).round(2)
+    return pd.DataFrame(columns)
+
+
+def iter_chunks(kind: str, rows: int, seed: int = 42,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """The catalog as DataFrames of at most ``chunk_rows`` rows"""
+    if kind not in COLUMNS:
+        raise ValueError(f"Unknown catalog kind {kind!r}; expected one of {', '.join(COLUMNS)}")
+    for index, start in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, KIND_IDS[kind], index])
+        size = min(chunk_rows, rows - start)
+        yield diamonds_chunk(rng, size) if kind == 'diamonds' else jewelry_chunk(rng, size, start)
+
+
+def generate_catalog(kind: str, rows: int, seed: int = 42, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                     categorical: bool = True) -> pd.DataFrame:
+    """The whole catalog in memory; ``categorical=False`` gives the string columns ``pd.read_csv`` would"""
+    frame = pd.concat(iter_chunks(kind, rows, seed, chunk_rows), ignore_index=True)
+    if not categorical:
+        for column in frame.columns:
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(str)
+    return frame
+
+
+def _write_csv(chunks: Iterator[pd.DataFrame], path: str):
+    for index, chunk in enumerate(chunks):
+        chunk.to_csv(path, mode='w' if index == 0 else 'a', header=index == 0, index=False)
+
+
+def _write_npy(chunks: Iterator[pd.DataFrame], path: str, rows: int, meta: Dict):
+    os.makedirs(path, exist_ok=True)
+    arrays, schema = {}, {}
+    offset = 0
+    for chunk in chunks:
+        if not arrays:
+            for column in chunk.columns:
+                dtype = chunk[column].dtype
+                if isinstance(dtype, pd.CategoricalDtype):
+                    schema[column] = {'dtype': 'int8', 'categories': list(dtype.categories)}
+                    dtype = np.int8
+                else:
+                    schema[column] = {'dtype': str(dtype)}
+                arrays[column] = np.lib.format.open_memmap(os.path.join(path, f'{column}.npy'), mode='w+',
+                                                           dtype=dtype, shape=(rows,))
+        for column, array in arrays.items():
+            values = chunk[column]
+            array[offset:offset + len(chunk)] = values.cat.codes if 'categories' in schema[column] \
+                else values.to_numpy()
+        offset += len(chunk)
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(path, SCHEMA), 'w', encoding='utf-8') as f:
+        json.dump(dict(meta, columns=schema), f, indent=2)
+
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], path: str):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("❌ parquet output needs pyarrow (pip install pyarrow); use --format csv or npy")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_catalog(kind: str, rows: int, path: str, fmt: str = 'csv', seed: int = 42,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict:
+    """Stream the catalog to ``path`` one chunk at a time; returns rows, seconds and bytes written"""
+    start = time.perf_counter()
+    chunks = iter_chunks(kind, rows, seed, chunk_rows)
+    if fmt == 'csv':
+        _write_csv(chunks, path)
+    elif fmt == 'npy':
+        _write_npy(chunks, path, rows, {'kind': kind, 'rows': rows, 'seed': seed, 'chunk_rows': chunk_rows})
+    elif fmt == 'parquet':
+        _write_parquet(chunks, path)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+    if os.path.isdir(path):
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    else:
+        size = os.path.getsize(path)
+    return {'kind': kind, 'rows': rows, 'format': fmt, 'path': path, 'bytes': size,
+            'seconds': round(time.perf_counter() - start, 3)}
+
+
+def load_catalog(path: str, mmap: bool = True) -> pd.DataFrame:
+    """A catalog written by ``write_catalog``; npy directories load memory-mapped with categorical columns"""
+    if os.path.isdir(path):
+        with open(os.path.join(path, SCHEMA), encoding='utf-8') as f:
+            schema = json.load(f)['columns']
+        columns = {}
+        for column, info in schema.items():
+            values = np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r' if mmap else None)
+            columns[column] = pd.Categorical.from_codes(values, categories=info['categories']) \
+                if 'categories' in info else values
+        return pd.DataFrame(columns, copy=False)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic diamonds or jewelry catalog")
+    parser.add_argument('kind', choices=list(COLUMNS))
+    parser.add_argument('rows', type=int)
+    parser.add_argument('-o', '--output', required=True, help="file (csv, parquet) or directory (npy)")
+    parser.add_argument('--format', choices=FORMATS, help="default: from the output extension, else csv")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="rows generated and written per step; bounds memory")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or {'.parquet': 'parquet', '.csv': 'csv'}.get(os.path.splitext(args.output)[1],
+                                                                    'npy' if os.path.isdir(args.output) else 'csv')
+    result = write_catalog(args.kind, args.rows, args.output, fmt, args.seed, args.chunk_rows)
+    print(f"✅ {result['rows']:,} {args.kind} rows -> {result['path']} ({fmt}, "
+          f"{result['bytes'] / (1 << 20):.1f} MB) in {result['seconds']:.1f}s "
+          f"({result['rows'] / max(result['seconds'], 1e-9):,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
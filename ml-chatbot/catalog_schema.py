@@ -0,0 +1,101 @@
+"""
+Compact in-memory schema for the jewelry and diamonds catalogs
+Categorical codes for the string columns, float32 / small ints for numbers, and no columns a service never reads
+
+Every worker holds its own copy of the catalog, so bytes per row are
+paid once per process. ``compact_frame`` casts a loaded (and enriched)
+frame to the dtypes below; a cast that would change a value is skipped,
+so integers only narrow when the column holds whole numbers in range.
+Categories are the sorted distinct values, which keeps sort order and
+comparisons with plain strings unchanged. Money that can carry cents
+stays float64. COMPACT_CATALOG=0 turns it off.
+"""
+
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = 'category'
+
+SCHEMAS = {
+    'jewelry': {
+        'category': CATEGORY, 'type': CATEGORY, 'metal': CATEGORY, 'stone': CATEGORY, 'brand': CATEGORY,
+        'weight': 'float32', 'size': 'float32',
+        # enrichment
+        'price_category': CATEGORY, 'price_segment': CATEGORY, 'style': CATEGORY, 'value_score': 'float32'
+    },
+    'diamonds': {
+        'carat': 'float32', 'cut': CATEGORY, 'color': CATEGORY, 'clarity': CATEGORY,
+        'depth': 'float32', 'table': 'float32', 'price': 'int32', 'x': 'float32', 'y': 'float32', 'z': 'float32',
+        # enrichment: the 4C scores are small whole numbers
+        'cut_score': 'int8', 'color_score': 'int8', 'clarity_score': 'int8',
+        'quality_score': 'float32', 'price_per_carat': 'float32', 'size_category': CATEGORY
+    }
+}
+
+# Columns only training reads; services that never use them drop them after boot
+TRAINING_ONLY = {'diamonds': ['depth', 'table', 'x', 'y', 'z']}
+
+
+def compact_enabled() -> bool:
+    return os.getenv('COMPACT_CATALOG', '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+def _narrow_int(series: pd.Series, dtype: str) -> pd.Series:
+    values = series.to_numpy()
+    info = np.iinfo(dtype)
+    if not np.issubdtype(values.dtype, np.number) or np.isnan(values.astype(np.float64)).any():
+        return series
+    if values.size and (values.min() < info.min or values.max() > info.max or (values != np.round(values)).any()):
+        return series
+    return series.astype(dtype)
+
+
+def compact_frame(df: Optional[pd.DataFrame], kind: str, drop: Iterable[str] = ()) -> Optional[pd.DataFrame]:
+    """``df`` with the compact dtypes for ``kind`` and the ``drop`` columns removed"""
+    if df is None:
+        return None
+    df = df.drop(columns=[column for column in drop if column in df.columns])
+    for column, dtype in SCHEMAS[kind].items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        if dtype == CATEGORY:
+            df[column] = df[column].astype(CATEGORY)
+        elif dtype.startswith('int'):
+            df[column] = _narrow_int(df[column], dtype)
+        elif np.issubdtype(df[column].dtype, np.floating) or np.issubdtype(df[column].dtype, np.integer):
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def frame_bytes(df: Optional[pd.DataFrame]) -> int:
+    """Deep memory of a frame, strings included"""
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+def memory_report(frames: Dict[str, Optional[pd.DataFrame]], catalogs: Dict[str, Any] = None) -> Dict[str, Dict]:
+    """
+    Rows, columns and bytes per frame, plus the largest columns. ``catalogs``
+    are the ColumnarCatalog copies the services keep next to the frames;
+    their arrays count towards ``resident_bytes``.
+    """
+    report = {}
+    for name, df in frames.items():
+        if df is None:
+            continue
+        usage = df.memory_usage(deep=True, index=False).sort_values(ascending=False)
+        catalog = (catalogs or {}).get(name)
+        catalog_bytes = catalog.nbytes() if catalog is not None else 0
+        report[name] = {
+            'rows': len(df),
+            'columns': len(df.columns),
+            'bytes': frame_bytes(df),
+            'bytes_per_row': round(frame_bytes(df) / max(len(df), 1), 1),
+            'largest_columns': {column: int(size) for column, size in usage.head(5).items()},
+            'catalog_columns': len(catalog.columns) if catalog is not None else 0,
+            'catalog_bytes': catalog_bytes,
+            'resident_bytes': frame_bytes(df) + catalog_bytes
+        }
+    return report
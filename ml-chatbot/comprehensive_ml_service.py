@@ -4,11 +4,15 @@ Handles ALL website content and jewelry inquiries intelligently
 """
 import os
 import json
-import pickle
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import re
 from datetime import datetime
+from artifact_store import load_response_data, open_current
+from service_logging import configure_logging, hot_logger
+
+configure_logging('comprehensive_ml_service')
+request_log = hot_logger('request')
 
 app = Flask(__name__)
 CORS(app)
@@ -25,15 +29,13 @@ class ComprehensiveJewelryChatbot:
             models_dir = os.path.join(os.path.dirname(__file__), 'models')
             
             # Try to load response data if available
-            response_path = os.path.join(models_dir, 'response_data.pkl')
-            if os.path.exists(response_path):
-                try:
-                    with open(response_path, 'rb') as f:
-                        response_data = pickle.load(f)
-                        self.response_patterns = response_data
-                        print("✓ Response patterns loaded from ML model")
-                except Exception as e:
-                    print(f"Could not load response data: {e}")
+            try:
+                response_data = load_response_data(models_dir, open_current(models_dir, 'basic'))
+                if response_data is not None:
+                    self.response_patterns = response_data
+                    print("✓ Response patterns loaded from ML model")
+            except Exception as e:
+                print(f"Could not load response data: {e}")
             
             # Setup comprehensive intent keywords
             self.setup_comprehensive_intents()
@@ -257,7 +259,7 @@ def chat():
         result = chatbot.generate_response(user_message)
         
         # Log the request for debugging
-        print(f"📝 Request: '{user_message}' -> Intent: {result['intent']}, Confidence: {result['confidence']}")
+        request_log.info("📝 Request: %r -> Intent: %s, Confidence: %s", user_message, result['intent'], result['confidence'])
         
         return jsonify(result)
         
@@ -0,0 +1,106 @@
+"""
+Deadline-aware engine routing for the chat services
+Tries answer engines in priority order and falls back in-process before the request budget runs out
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+
+
+class EngineRouter:
+    """
+    Route a request through named engines within a latency budget.
+
+    Every engine but the last runs on a worker thread and gets the budget
+    left after reserving ``reserve_ms`` for the engines behind it. An engine
+    that times out, raises or returns ``None`` hands over to the next one;
+    the last engine always runs inline, so a request never ends without an
+    answer. Timed-out calls cannot be cancelled and finish in the
+    background, so when every worker is still busy the engine is skipped.
+    """
+
+    def __init__(self, default_deadline_ms: int = 2000, reserve_ms: int = 100, max_workers: int = 4):
+        self.default_deadline_ms = default_deadline_ms
+        self.reserve_ms = reserve_ms
+        self._engines: List[tuple] = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='engine')
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self.answered: Dict[str, int] = {}
+        self.fallbacks: Dict[str, int] = {}
+
+    def register(self, name: str, engine: Callable[[str], Optional[Dict[str, Any]]]):
+        """Append an engine; engines are tried in registration order"""
+        self._engines.append((name, engine))
+
+    def _count(self, counter: Dict[str, int], key: str):
+        with self._lock:
+            counter[key] = counter.get(key, 0) + 1
+
+    def _run_bounded(self, engine, message, timeout_s):
+        if not self._slots.acquire(blocking=False):
+            return None, 'saturated'
+
+        def call():
+            try:
+                return engine(message)
+            finally:
+                self._slots.release()
+
+        # Run in a copy of the caller's context so request traces follow the engine
+        future = self._executor.submit(contextvars.copy_context().run, call)
+        try:
+            result = future.result(timeout=max(timeout_s, 0))
+        except FutureTimeout:
+            return None, 'deadline_exceeded'
+        except Exception:
+            return None, 'error'
+        if result is None:
+            return None, 'unavailable'
+        return result, None
+
+    def route(self, message: str, deadline_ms: Optional[float] = None) -> Dict[str, Any]:
+        budget_ms = float(deadline_ms) if deadline_ms else float(self.default_deadline_ms)
+        start = time.monotonic()
+
+        def remaining_ms():
+            return budget_ms - (time.monotonic() - start) * 1000
+
+        fallback_reason = None
+
+        for position, (name, engine) in enumerate(self._engines):
+            last = position == len(self._engines) - 1
+            if last:
+                result = engine(message)
+            else:
+                timeout_ms = remaining_ms() - self.reserve_ms * (len(self._engines) - 1 - position)
+                if timeout_ms <= 0:
+                    result, reason = None, 'deadline_exceeded'
+                else:
+                    result, reason = self._run_bounded(engine, message, timeout_ms / 1000)
+                if result is None:
+                    fallback_reason = f'{name}_{reason}'
+                    self._count(self.fallbacks, fallback_reason)
+                    continue
+
+            self._count(self.answered, name)
+            answer = dict(result)
+            answer.setdefault('engine', name)
+            if fallback_reason and 'fallback_reason' not in answer:
+                answer['fallback_reason'] = fallback_reason
+            answer['budget_ms'] = round(budget_ms, 1)
+            answer['budget_remaining_ms'] = round(remaining_ms(), 1)
+            return answer
+
+        raise RuntimeError("No engines registered")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'default_deadline_ms': self.default_deadline_ms,
+                'answered': dict(self.answered),
+                'fallbacks': dict(self.fallbacks)
+            }
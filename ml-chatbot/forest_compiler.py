@@ -0,0 +1,223 @@
+"""
+Flat-array compiler for fitted scikit-learn random forests
+Evaluates every tree of the forest for a whole batch with vectorized NumPy traversal
+"""
+
+import json
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted ``RandomForestClassifier`` flattened into contiguous arrays.
+
+    All trees share one node table (feature, threshold, left/right child and
+    per-leaf class probabilities); ``roots`` holds the offset of each tree.
+    Prediction walks every (sample, tree) pair one level per step, so the
+    per-call cost is ``max_depth`` vectorized gathers instead of 100 Python-
+    level tree calls.
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf_proba, roots, classes, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.n_trees = len(roots)
+
+        # Only the columns used by some split are ever read
+        self.used_features = np.unique(feature[feature >= 0])
+        self._column_map = np.full(n_features, -1, dtype=np.int64)
+        self._column_map[self.used_features] = np.arange(len(self.used_features))
+        # Leaves compare column 0 against +inf and so always "go left" to themselves
+        self._node_column = np.where(feature >= 0, self._column_map[np.maximum(feature, 0)], 0)
+        # Inputs are float32, so x <= t is exactly x <= (largest float32 <= t);
+        # comparing in float32 halves the memory traffic of the decision pass
+        node_threshold = np.where(feature >= 0, threshold, np.inf)
+        threshold32 = node_threshold.astype(np.float32)
+        rounded_up = threshold32.astype(np.float64) > node_threshold
+        threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+        self._node_threshold = threshold32
+        self._left_minus_right = (left - right).astype(np.int32)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'CompiledForest':
+        """Flatten the estimators of a fitted forest classifier"""
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, -1, tree.feature))
+            thresholds.append(tree.threshold)
+            # Leaves point at themselves so finished walks stay put
+            node_ids = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(value / normalizer)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            leaf_proba=np.concatenate(probas),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=forest.classes_,
+            max_depth=max_depth,
+            n_features=forest.n_features_in_
+        )
+
+    def _gather_features(self, X) -> np.ndarray:
+        """Dense float32 block of the split columns (sparse or dense input)"""
+        if hasattr(X, 'tocsr'):
+            X = X.tocsr()
+            block = np.zeros((X.shape[0], len(self.used_features)), dtype=np.float32)
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            columns = self._column_map[X.indices]
+            keep = columns >= 0
+            block[rows[keep], columns[keep]] = X.data[keep]
+            return block
+        # sklearn compares float32 inputs against float64 thresholds
+        return np.asarray(X, dtype=np.float32)[:, self.used_features]
+
+    def apply(self, X, chunk_size: int = 16) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_samples, n_trees)"""
+        values = self._gather_features(X)
+        if values.shape[0] <= chunk_size:
+            return self._apply_block(values)
+        return np.vstack([
+            self._apply_block(values[start:start + chunk_size])
+            for start in range(0, values.shape[0], chunk_size)
+        ])
+
+    def _apply_block(self, values: np.ndarray) -> np.ndarray:
+        n_samples = values.shape[0]
+        n_nodes = len(self.feature)
+
+        # Decide every split for every sample up front, then the walk is a
+        # single gather per level: node -> next node
+        go_left = values[:, self._node_column] <= self._node_threshold
+        base = (np.arange(n_samples, dtype=np.int32) * np.int32(n_nodes))[:, None]
+        next_node = go_left * self._left_minus_right
+        next_node += self.right
+        next_node += base
+        next_node = next_node.ravel()
+
+        nodes = (base + self.roots).ravel()
+        depth = 0
+        while depth < self.max_depth:
+            # Most walks end far above max_depth; stop once every one is at a leaf
+            for _ in range(min(8, self.max_depth - depth)):
+                nodes = next_node[nodes]
+            depth += 8
+            if np.array_equal(next_node[nodes], nodes):
+                break
+
+        return nodes.reshape(n_samples, self.n_trees) - base
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Mean of the per-tree class probabilities"""
+        nodes = self.apply(X)
+        # Sum over the leading tree axis accumulates tree by tree, in the same
+        # order as the forest itself, so ties resolve identically
+        proba = self.leaf_proba[nodes.T].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def check_parity(forest, compiled: CompiledForest, X) -> Dict[str, Any]:
+    """Compare compiled predictions against ``forest.predict`` on ``X``"""
+    expected = forest.predict(X)
+    actual = compiled.predict(X)
+    mismatches = int(np.sum(expected != actual))
+    max_proba_diff = float(np.max(np.abs(forest.predict_proba(X) - compiled.predict_proba(X))))
+    return {
+        'samples': int(X.shape[0]),
+        'mismatches': mismatches,
+        'max_proba_diff': max_proba_diff,
+        'ok': mismatches == 0
+    }
+
+
+def benchmark(forest, compiled: CompiledForest, X, repeats: int = 200) -> Dict[str, Any]:
+    """Single-row and batch latency of ``forest.predict`` vs the compiled forest"""
+    single_rows = [X[i:i + 1] for i in range(X.shape[0])]
+
+    def time_per_call(fn):
+        timings = []
+        for i in range(repeats):
+            row = single_rows[i % len(single_rows)]
+            start = time.perf_counter()
+            fn(row)
+            timings.append(time.perf_counter() - start)
+        return {
+            'p50_us': round(float(np.percentile(timings, 50)) * 1e6, 1),
+            'p95_us': round(float(np.percentile(timings, 95)) * 1e6, 1)
+        }
+
+    results = {
+        'single_row': {
+            'sklearn': time_per_call(forest.predict),
+            'compiled': time_per_call(compiled.predict)
+        }
+    }
+
+    start = time.perf_counter()
+    forest.predict(X)
+    sklearn_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    compiled.predict(X)
+    compiled_batch = time.perf_counter() - start
+    results['batch'] = {
+        'rows': int(X.shape[0]),
+        'sklearn_ms': round(sklearn_batch * 1e3, 2),
+        'compiled_ms': round(compiled_batch * 1e3, 2)
+    }
+    results['single_row_speedup'] = round(
+        results['single_row']['sklearn']['p50_us'] / max(results['single_row']['compiled']['p50_us'], 1e-3), 1
+    )
+    return results
+
+
+if __name__ == '__main__':
+    # Parity check and latency benchmark against the live service's classifier
+    from advanced_ml_service import bot
+
+    queries = []
+    for intent, data in bot.intent_categories.items():
+        for keyword in data['keywords']:
+            queries.append(f"{keyword} an engagement ring in platinum")
+            queries.append(f"could you {keyword} some diamond earrings")
+    X_queries = bot.tfidf_vectorizer.transform([bot._clean_message(q) for q in queries])
+
+    report = {
+        'trees': bot.compiled_intent_classifier.n_trees,
+        'nodes': int(len(bot.compiled_intent_classifier.feature)),
+        'parity': check_parity(bot.intent_classifier, bot.compiled_intent_classifier, X_queries),
+        'latency': benchmark(bot.intent_classifier, bot.compiled_intent_classifier, X_queries)
+    }
+    print(json.dumps(report, indent=2))
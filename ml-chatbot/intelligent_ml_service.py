@@ -6,7 +6,7 @@ Deep dataset understanding with intelligent query processing
 import os
 import pandas as pd
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import pickle
 import re
@@ -14,16 +14,30 @@ import logging
 from datetime import datetime
 import json
 from typing import Dict, List, Tuple, Any
+from answer_compiler import dataset_version, load_compiled_answers
+from single_flight import SingleFlight
+from service_logging import configure_logging, logging_stats
+from live_profiler import install_profile_endpoint
+from catalog_accounting import accountant_from_env
+from slow_requests import annotate, install_slow_request_endpoint, watchdog_from_env
+from streaming_catalog import catalog_path
+from catalog_schema import TRAINING_ONLY, compact_enabled, compact_frame
+from catalog_core import ColumnarCatalog, cluster_keys
+from service_metrics import (REGISTRY, REQUESTS, REQUEST_SECONDS, ERRORS, PROMETHEUS_CONTENT_TYPE,
+                             stage, stats_collector)
 import warnings
 warnings.filterwarnings('ignore')
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging('intelligent_ml_service')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
+# Identical in-flight /chat messages share one computation
+chat_flight = SingleFlight()
+
 class IntelligentJewelryBot:
     def __init__(self):
         """Initialize the intelligent jewelry bot with deep dataset understanding"""
@@ -33,6 +47,8 @@ class IntelligentJewelryBot:
         # Load datasets
         self.jewelry_df = None
         self.diamonds_df = None
+        self.jewelry_catalog = None
+        self.diamonds_catalog = None
         self.analytics = {}
         
         # Website structure knowledge
@@ -61,7 +77,12 @@ class IntelligentJewelryBot:
         
         # Initialize system
         self.load_datasets()
+        # Handlers query the NumPy catalogs; the frames stay for analytics and fingerprinting
+        self.jewelry_catalog = ColumnarCatalog.from_frame(self.jewelry_df, cluster_by=cluster_keys('jewelry'))
+        self.diamonds_catalog = ColumnarCatalog.from_frame(self.diamonds_df, cluster_by=cluster_keys('diamonds'))
         self.load_analytics()
+        self.dataset_version = dataset_version(self)
+        self.compiled_answers = load_compiled_answers(self, self.dataset_version)
         
         logger.info(f"🚀 {self.app_name} v{self.version} initialized successfully!")
         logger.info(f"📊 Loaded {len(self.jewelry_df) if self.jewelry_df is not None else 0} jewelry items")
@@ -74,20 +95,24 @@ class IntelligentJewelryBot:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             
             # Load jewelry dataset
-            jewelry_path = os.path.join(base_dir, "datasets", "jewelry_dataset.csv")
+            jewelry_path = catalog_path("jewelry_dataset.csv", os.path.join(base_dir, "datasets", "jewelry_dataset.csv"))
             if os.path.exists(jewelry_path):
                 self.jewelry_df = pd.read_csv(jewelry_path)
                 logger.info(f"✅ Loaded jewelry dataset: {len(self.jewelry_df)} items")
                 self._enrich_jewelry_data()
+                if compact_enabled():
+                    self.jewelry_df = compact_frame(self.jewelry_df, 'jewelry')
             else:
                 logger.warning(f"⚠️ Jewelry dataset not found at {jewelry_path}")
                 
             # Load diamonds dataset
-            diamonds_path = os.path.join(base_dir, "datasets", "diamonds_dataset.csv")
+            diamonds_path = catalog_path("diamonds_dataset.csv", os.path.join(base_dir, "datasets", "diamonds_dataset.csv"))
             if os.path.exists(diamonds_path):
                 self.diamonds_df = pd.read_csv(diamonds_path)
                 logger.info(f"✅ Loaded diamonds dataset: {len(self.diamonds_df)} items")
                 self._enrich_diamond_data()
+                if compact_enabled():
+                    self.diamonds_df = compact_frame(self.diamonds_df, 'diamonds', drop=TRAINING_ONLY['diamonds'])
             else:
                 logger.warning(f"⚠️ Diamonds dataset not found at {diamonds_path}")
                 
@@ -155,7 +180,8 @@ class IntelligentJewelryBot:
         try:
             # Get the base directory
             base_dir = os.path.dirname(os.path.abspath(__file__))
-            analytics_path = os.path.join(base_dir, "models", "dataset_analytics.json")
+            # The streamed catalog's analytics with SERVING_CATALOG=1, else the trainer's
+            analytics_path = catalog_path("dataset_analytics.json", os.path.join(base_dir, "models", "dataset_analytics.json"))
             
             if os.path.exists(analytics_path):
                 with open(analytics_path, 'r', encoding='utf-8') as f:
@@ -196,16 +222,27 @@ class IntelligentJewelryBot:
         """Process user query with intelligent understanding"""
         try:
             # Clean and analyze message
-            cleaned_message = self._clean_message(message)
+            with stage('clean'):
+                cleaned_message = self._clean_message(message)
             
             # Classify intent
-            intent = self._classify_intent(cleaned_message)
+            with stage('classify'):
+                intent = self._classify_intent(cleaned_message)
             
             # Extract entities
-            entities = self._extract_entities(cleaned_message)
+            with stage('extract'):
+                entities = self._extract_entities(cleaned_message)
+            annotate(intent, entities)
             
-            # Generate intelligent response
-            response = self._generate_response(intent, entities, cleaned_message)
+            # Answer from the compiled table, falling back to the live handlers
+            response, engine = None, 'compiled'
+            if self.compiled_answers is not None:
+                with stage('compiled_lookup'):
+                    response = self.compiled_answers.lookup(intent, entities, cleaned_message)
+            if response is None:
+                with stage('respond'):
+                    response, engine = self._generate_response(intent, entities, cleaned_message), 'handlers'
+            REQUESTS.inc(intent=intent, engine=engine)
             
             return {
                 'response': response,
@@ -218,6 +255,7 @@ class IntelligentJewelryBot:
             
         except Exception as e:
             logger.error(f"Error processing query: {e}")
+            REQUESTS.inc(intent='error', engine='error_fallback')
             return {
                 'response': "I apologize for the technical issue. Let me help you with your jewelry inquiry. What would you like to know?",
                 'intent': 'error',
@@ -337,10 +375,11 @@ class IntelligentJewelryBot:
             
             if 'budget' in message or 'affordable' in message:
                 # Find budget-friendly options from data
-                if self.jewelry_df is not None:
-                    budget_items = self.jewelry_df[self.jewelry_df['price'] < 5000]
-                    if not budget_items.empty:
-                        best_value = budget_items.loc[budget_items['value_score'].idxmax()]
+                catalog = self.jewelry_catalog
+                if catalog is not None:
+                    budget_items = catalog.between('price', high=5000, inclusive='neither')
+                    if len(budget_items):
+                        best_value = catalog.record(catalog.argmax('value_score', budget_items))
                         recommendations.append(f"For great value, consider {best_value['metal']} {best_value['category']}s with {best_value['stone']}s starting around ${best_value['price']:,.0f}.")
             
             # Add trending information
@@ -364,16 +403,17 @@ class IntelligentJewelryBot:
         """Compare products using real dataset insights"""
         comparison = [f"Comparing {' vs '.join(products)} from our collection:"]
         
-        if self.jewelry_df is not None:
+        catalog = self.jewelry_catalog
+        if catalog is not None:
             for product in products:
                 # Get data for this product type
-                product_data = self.jewelry_df[self.jewelry_df['category'].str.contains(product, case=False, na=False)]
+                product_data = catalog.contains('category', product)
                 
-                if not product_data.empty:
-                    avg_price = product_data['price'].mean()
-                    price_range = (product_data['price'].min(), product_data['price'].max())
-                    popular_metal = product_data['metal'].mode().iloc[0] if not product_data['metal'].mode().empty else 'gold'
-                    popular_stone = product_data['stone'].mode().iloc[0] if not product_data['stone'].mode().empty else 'diamond'
+                if len(product_data):
+                    avg_price = catalog.mean('price', product_data)
+                    price_range = (catalog.min('price', product_data), catalog.max('price', product_data))
+                    popular_metal = catalog.mode('metal', product_data) or 'gold'
+                    popular_stone = catalog.mode('stone', product_data) or 'diamond'
                     
                     comparison.append(f"\n**{product.title()}s in our collection:**")
                     comparison.append(f"• Average price: ${avg_price:,.0f}")
@@ -389,14 +429,15 @@ class IntelligentJewelryBot:
         """Compare materials using dataset pricing"""
         comparison = [f"Material comparison from our collection data:"]
         
-        if self.jewelry_df is not None:
+        catalog = self.jewelry_catalog
+        if catalog is not None:
             for material in materials:
-                material_data = self.jewelry_df[self.jewelry_df['metal'].str.contains(material.replace('_', ' '), case=False, na=False)]
+                material_data = catalog.contains('metal', material.replace('_', ' '))
                 
-                if not material_data.empty:
-                    avg_price = material_data['price'].mean()
+                if len(material_data):
+                    avg_price = catalog.mean('price', material_data)
                     count = len(material_data)
-                    popular_category = material_data['category'].mode().iloc[0] if not material_data['category'].mode().empty else 'rings'
+                    popular_category = catalog.mode('category', material_data) or 'rings'
                     
                     comparison.append(f"\n**{material.replace('_', ' ').title()}:**")
                     comparison.append(f"• Average price: ${avg_price:,.0f}")
@@ -450,21 +491,22 @@ class IntelligentJewelryBot:
         # Budget analysis
         budget_mentioned = any(word in message for word in ['budget', 'cheap', 'affordable', 'expensive'])
         
-        if self.jewelry_df is not None:
+        catalog = self.jewelry_catalog
+        if catalog is not None:
             if budget_mentioned:
                 # Budget recommendations
-                budget_pieces = self.jewelry_df[self.jewelry_df['price'] < 5000]
-                if not budget_pieces.empty:
-                    best_value = budget_pieces.loc[budget_pieces['value_score'].idxmax()]
+                budget_pieces = catalog.between('price', high=5000, inclusive='neither')
+                if len(budget_pieces):
+                    best_value = catalog.record(catalog.argmax('value_score', budget_pieces))
                     recommendations.append(f"\n**Best Value Pick**: {best_value['metal'].title()} {best_value['category']} with {best_value['stone']} - ${best_value['price']:,.0f}")
             
             # Category recommendations
             if entities.get('products'):
                 product = entities['products'][0]
-                product_data = self.jewelry_df[self.jewelry_df['category'].str.contains(product, case=False, na=False)]
-                if not product_data.empty:
-                    top_pick = product_data.loc[product_data['price'].idxmin()]  # Most affordable
-                    premium_pick = product_data.loc[product_data['price'].idxmax()]  # Most premium
+                product_data = catalog.contains('category', product)
+                if len(product_data):
+                    top_pick = catalog.record(catalog.argmin('price', product_data))  # Most affordable
+                    premium_pick = catalog.record(catalog.argmax('price', product_data))  # Most premium
                     
                     recommendations.append(f"\n**{product.title()} Recommendations:**")
                     recommendations.append(f"• **Accessible option**: {top_pick['metal']} with {top_pick['stone']} - ${top_pick['price']:,.0f}")
@@ -489,24 +531,25 @@ class IntelligentJewelryBot:
         if entities.get('products'):
             product = entities['products'][0]
             
-            if self.jewelry_df is not None:
-                product_data = self.jewelry_df[self.jewelry_df['category'].str.contains(product, case=False, na=False)]
+            catalog = self.jewelry_catalog
+            if catalog is not None:
+                product_data = catalog.contains('category', product)
                 
-                if not product_data.empty:
+                if len(product_data):
                     response_parts.append(f"\n**{product.title()}s in our collection:**")
                     response_parts.append(f"• Total pieces: {len(product_data)}")
-                    response_parts.append(f"• Price range: ${product_data['price'].min():,.0f} - ${product_data['price'].max():,.0f}")
-                    response_parts.append(f"• Average price: ${product_data['price'].mean():,.0f}")
+                    response_parts.append(f"• Price range: ${catalog.min('price', product_data):,.0f} - ${catalog.max('price', product_data):,.0f}")
+                    response_parts.append(f"• Average price: ${catalog.mean('price', product_data):,.0f}")
                     
                     # Popular combinations
-                    popular_metal = product_data['metal'].mode().iloc[0] if not product_data['metal'].mode().empty else 'gold'
-                    popular_stone = product_data['stone'].mode().iloc[0] if not product_data['stone'].mode().empty else 'diamond'
+                    popular_metal = catalog.mode('metal', product_data) or 'gold'
+                    popular_stone = catalog.mode('stone', product_data) or 'diamond'
                     response_parts.append(f"• Most popular: {popular_metal} with {popular_stone}")
                     
                     # Style breakdown
-                    style_counts = product_data['style'].value_counts() if 'style' in product_data.columns else None
-                    if style_counts is not None and not style_counts.empty:
-                        top_style = style_counts.index[0]
+                    style_counts = catalog.value_counts('style', product_data, top=1) if 'style' in catalog.columns else None
+                    if style_counts:
+                        top_style = style_counts[0][0]
                         response_parts.append(f"• Trending style: {top_style}")
         
         # Add collection information
@@ -539,19 +582,19 @@ class IntelligentJewelryBot:
             response_parts.append(f"• Average size: {diamond_data['avg_carat']:.2f} carats")
         
         # Detailed pricing if specific product mentioned
-        if entities.get('products') and self.jewelry_df is not None:
+        catalog = self.jewelry_catalog
+        if entities.get('products') and catalog is not None:
             product = entities['products'][0]
-            product_data = self.jewelry_df[self.jewelry_df['category'].str.contains(product, case=False, na=False)]
+            product_data = catalog.contains('category', product)
             
-            if not product_data.empty:
+            if len(product_data):
                 response_parts.append(f"\n**{product.title()} Pricing:**")
                 
                 # Price segments
-                price_segments = product_data['price_category'].value_counts() if 'price_category' in product_data.columns else None
-                if price_segments is not None:
-                    for category, count in price_segments.items():
-                        segment_data = product_data[product_data['price_category'] == category]
-                        avg_price = segment_data['price'].mean()
+                if 'price_category' in catalog.columns:
+                    segment_prices = catalog.group_stats('price_category', 'price', product_data)
+                    for category, count in catalog.value_counts('price_category', product_data):
+                        avg_price = segment_prices[category]['mean']
                         response_parts.append(f"• {category}: {count} pieces, avg ${avg_price:,.0f}")
         
         response_parts.extend([
@@ -714,6 +757,17 @@ What specific jewelry topic would you like to learn more about?"""
 # Initialize the bot
 bot = IntelligentJewelryBot()
 
+REGISTRY.register_collector(stats_collector('chat_single_flight', chat_flight.stats))
+REGISTRY.register_collector(stats_collector('chat_logging', logging_stats))
+if bot.compiled_answers is not None:
+    REGISTRY.register_collector(stats_collector('chat_compiled_answers', bot.compiled_answers.stats))
+
+# Opt-in rows/allocation accounting per handler call (CATALOG_ACCOUNTING=1)
+catalog_accountant = accountant_from_env()
+if catalog_accountant is not None:
+    catalog_accountant.instrument(bot, ('jewelry_df', 'diamonds_df', 'jewelry_catalog', 'diamonds_catalog'),
+                                  lambda name: name.startswith('_handle_') or name == '_generate_personal_recommendation')
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Main chat endpoint"""
@@ -728,12 +782,15 @@ def chat():
             }), 400
         
         # Process query with intelligent bot
-        result = bot.process_query(message)
+        with REQUEST_SECONDS.time(), slow_watchdog.track(message):
+            key = (bot.dataset_version, bot._clean_message(message))
+            result = chat_flight.do(key, lambda: bot.process_query(message))
         
         return jsonify(result)
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
+        ERRORS.inc(stage='endpoint', type=type(e).__name__)
         return jsonify({
             'response': 'I apologize for the technical issue. Please try rephrasing your question, and I\'ll be happy to help!',
             'error': str(e),
@@ -752,9 +809,23 @@ def health():
             'jewelry_items': len(bot.jewelry_df) if bot.jewelry_df is not None else 0,
             'diamond_items': len(bot.diamonds_df) if bot.diamonds_df is not None else 0,
             'analytics_loaded': bool(bot.analytics)
-        }
+        },
+        'compiled_answers': bot.compiled_answers.stats() if bot.compiled_answers is not None else None,
+        'single_flight': chat_flight.stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint with per-stage chat latency histograms"""
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+# Token-guarded POST /debug/profile; idle until called
+install_profile_endpoint(app)
+
+# Requests over SLOW_REQUEST_MS, readable at GET /debug/slow
+slow_watchdog = watchdog_from_env()
+install_slow_request_endpoint(app, slow_watchdog)
+
 @app.route('/analytics', methods=['GET'])
 def analytics():
     """Analytics endpoint"""
@@ -765,6 +836,7 @@ if __name__ == '__main__':
     logger.info("🔗 Available endpoints:")
     logger.info("   POST /chat - Intelligent chat interface")
     logger.info("   GET /health - Service health check")
+    logger.info("   GET /metrics - Prometheus metrics")
     logger.info("   GET /analytics - Dataset analytics")
     
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
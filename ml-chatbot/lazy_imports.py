@@ -0,0 +1,41 @@
+"""
+Deferred imports for heavy dependencies
+The module is located when requested but only executed on first attribute access, so a service that never uses it never pays its import time
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Optional
+
+
+def lazy_module(name: str) -> Optional[ModuleType]:
+    """
+    ``name`` as a lazily executed module, or None when it is not installed.
+
+    Only the spec lookup happens here. Errors raised while the module
+    itself imports (ABI mismatches, missing native libraries) surface at
+    the first attribute access, so callers keep that in a try block.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.loader is None:
+        return None
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """Whether ``name`` has actually been executed, not just registered lazily"""
+    module = sys.modules.get(name)
+    # type() does not go through the lazy module's __getattribute__, so this never triggers the load
+    return module is not None and type(module).__name__ != '_LazyModule'
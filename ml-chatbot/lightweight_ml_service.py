@@ -4,11 +4,14 @@ Simplified version that loads trained models and provides intelligent responses
 """
 import os
 import json
-import pickle
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import re
 from datetime import datetime
+from artifact_store import load_response_data, open_current
+from service_logging import configure_logging
+
+configure_logging('lightweight_ml_service')
 
 app = Flask(__name__)
 CORS(app)
@@ -25,15 +28,13 @@ class LightweightJewelryChatbot:
             models_dir = os.path.join(os.path.dirname(__file__), 'models')
             
             # Try to load response data if available
-            response_path = os.path.join(models_dir, 'response_data.pkl')
-            if os.path.exists(response_path):
-                try:
-                    with open(response_path, 'rb') as f:
-                        response_data = pickle.load(f)
-                        self.response_patterns = response_data
-                        print("✓ Response patterns loaded from ML model")
-                except Exception as e:
-                    print(f"Could not load response data: {e}")
+            try:
+                response_data = load_response_data(models_dir, open_current(models_dir, 'basic'))
+                if response_data is not None:
+                    self.response_patterns = response_data
+                    print("✓ Response patterns loaded from ML model")
+            except Exception as e:
+                print(f"Could not load response data: {e}")
             
             # Setup intent keywords for classification
             self.setup_intent_keywords()
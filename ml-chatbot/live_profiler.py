@@ -0,0 +1,161 @@
+"""
+On-demand sampling profiler for the live chat services
+POST /debug/profile samples every thread's stack for a few seconds and returns hot functions and collapsed stacks
+
+Nothing runs until a profile is requested: the sampler thread only exists
+for the duration of one capture. The endpoint answers 404 unless
+PROFILE_TOKEN is set, and every call must send it in ``X-Debug-Token``.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from flask import Response, jsonify, request
+
+MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '30'))
+DEFAULT_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+
+# CPU time a thread must burn between ticks to count as running in cpu mode;
+# filters out the short wake-ups of threads parked in select() or recv()
+MIN_CPU_SECONDS = 0.0002
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_cpu_time(thread_id: int) -> Optional[float]:
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError, OverflowError):
+        return None
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over ``sys._current_frames()``.
+
+    ``wall`` mode records every thread's stack on each tick, including threads
+    blocked on I/O or locks. ``cpu`` mode only records a thread when its
+    CPU clock advanced by ``MIN_CPU_SECONDS`` since the previous tick, so
+    idle threads drop out; without per-thread CPU clocks it behaves like wall.
+    """
+
+    def __init__(self, mode: str = 'cpu', interval_ms: float = DEFAULT_INTERVAL_MS):
+        if mode not in ('cpu', 'wall'):
+            raise ValueError("mode must be 'cpu' or 'wall'")
+        self.mode = mode
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self.cpu_clock = hasattr(time, 'pthread_getcpuclockid')
+
+    def _sample(self, own_id: int, cpu_seen: Dict[int, float]):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            if self.mode == 'cpu' and self.cpu_clock:
+                cpu = _thread_cpu_time(thread_id)
+                previous = cpu_seen.get(thread_id)
+                if cpu is not None:
+                    cpu_seen[thread_id] = cpu
+                    if previous is None or cpu - previous < MIN_CPU_SECONDS:
+                        continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def run(self, seconds: float):
+        """Sample on a private thread for ``seconds`` and wait for it to finish"""
+        def loop():
+            own_id = threading.get_ident()
+            cpu_seen: Dict[int, float] = {}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                self._sample(own_id, cpu_seen)
+                self.ticks += 1
+                time.sleep(self.interval)
+
+        sampler = threading.Thread(target=loop, name='profile-sampler', daemon=True)
+        sampler.start()
+        sampler.join()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, as read by flamegraph.pl and speedscope"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 25):
+        samples = sum(self.stacks.values())
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+
+        return [{
+            'function': function,
+            'self': self_counts[function],
+            'total': total,
+            'self_pct': round(100 * self_counts[function] / samples, 2) if samples else 0.0,
+            'total_pct': round(100 * total / samples, 2) if samples else 0.0
+        } for function, total in sorted(total_counts.items(), key=lambda item: (-self_counts[item[0]], -item[1]))[:limit]]
+
+
+_capture_lock = threading.Lock()
+
+
+def debug_authorized() -> bool:
+    """True when PROFILE_TOKEN is set and the request carries it in X-Debug-Token"""
+    token = os.getenv('PROFILE_TOKEN')
+    supplied = request.headers.get('X-Debug-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def install_profile_endpoint(app):
+    """Register ``POST /debug/profile?seconds=N&mode=cpu|wall[&format=collapsed]`` on a Flask app"""
+
+    @app.route('/debug/profile', methods=['POST'])
+    def debug_profile():
+        if not debug_authorized():
+            return jsonify({'error': 'Not found'}), 404
+
+        try:
+            seconds = float(request.args.get('seconds', '5'))
+            interval_ms = float(request.args.get('interval_ms', DEFAULT_INTERVAL_MS))
+            profiler = SamplingProfiler(request.args.get('mode', 'cpu'), interval_ms)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not 0 < seconds <= MAX_SECONDS:
+            return jsonify({'error': f'seconds must be in (0, {MAX_SECONDS:g}]'}), 400
+
+        if not _capture_lock.acquire(blocking=False):
+            return jsonify({'error': 'A profile is already running'}), 409
+        try:
+            profiler.run(seconds)
+        finally:
+            _capture_lock.release()
+
+        if request.args.get('format') == 'collapsed':
+            return Response(profiler.collapsed(), content_type='text/plain; charset=utf-8')
+
+        return jsonify({
+            'mode': profiler.mode,
+            'cpu_clock': profiler.cpu_clock,
+            'seconds': seconds,
+            'interval_ms': profiler.interval * 1000,
+            'ticks': profiler.ticks,
+            'samples': sum(profiler.stacks.values()),
+            'top': profiler.top(),
+            'collapsed': profiler.collapsed()
+        })
+
+    return debug_profile
@@ -0,0 +1,114 @@
+"""
+Progressive startup for the chat services
+Tracks per-component load progress and runs the heavy loading on a background thread while the server already answers
+
+With PROGRESSIVE_BOOT=1 a service publishes a minimal bot immediately and
+its loader publishes more capable ones as components finish. Publishing
+is a single reference assignment, so a request sees either the old bot or
+the new one, never a half-loaded mix. The service is *live* as soon as it
+serves and *ready* once every component has loaded.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable
+
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED, SKIPPED = 'pending', 'loading', 'ready', 'failed', 'skipped'
+
+
+class BootProgress:
+    """Load state, timing and a short note for each named startup component"""
+
+    def __init__(self, components: Iterable[str]):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._finished = None
+        self._components: Dict[str, Dict[str, Any]] = {name: {'state': PENDING} for name in components}
+
+    def _update(self, name: str, **fields):
+        with self._lock:
+            self._components[name].update(fields)
+            if self._finished is None and all(component['state'] not in (PENDING, LOADING)
+                                              for component in self._components.values()):
+                self._finished = time.time()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark ``name`` loading for the duration of the block, then ready, or failed if it raises"""
+        start = time.perf_counter()
+        self._update(name, state=LOADING, started_at=time.time())
+        try:
+            yield
+        except Exception as e:
+            self._update(name, state=FAILED, seconds=round(time.perf_counter() - start, 3),
+                         error=f'{type(e).__name__}: {e}')
+            raise
+        self._update(name, state=READY, seconds=round(time.perf_counter() - start, 3))
+
+    def note(self, name: str, detail: str):
+        self._update(name, detail=detail)
+
+    def skip_pending(self, reason: str):
+        """Mark every component that never started as skipped, e.g. after an earlier stage failed"""
+        with self._lock:
+            pending = [name for name, component in self._components.items() if component['state'] == PENDING]
+        for name in pending:
+            self._update(name, state=SKIPPED, detail=reason)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(component['state'] == READY for component in self._components.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(component) for name, component in self._components.items()}
+            finished = self._finished
+        done = sum(component['state'] == READY for component in components.values())
+        return {
+            'ready': done == len(components),
+            'progress': round(done / len(components), 2) if components else 1.0,
+            'elapsed_s': round((finished or time.time()) - self._started, 3),
+            'components': components
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot()
+        return {'ready': int(snapshot['ready']), 'progress': snapshot['progress'], 'elapsed_s': snapshot['elapsed_s']}
+
+
+def progressive_boot_enabled() -> bool:
+    return os.getenv('PROGRESSIVE_BOOT', '0').lower() in ('1', 'true', 'on', 'yes')
+
+
+def start_background(progress: BootProgress, loader: Callable[[], None]) -> threading.Thread:
+    """Run ``loader`` on a daemon thread; a failure is logged and the components it never reached are skipped"""
+    def run():
+        try:
+            loader()
+        except Exception:
+            logger.exception("Background boot failed; serving with what has loaded so far")
+            progress.skip_pending('earlier component failed')
+
+    thread = threading.Thread(target=run, name='progressive-boot', daemon=True)
+    thread.start()
+    return thread
+
+
+def install_health_endpoints(app, progress: BootProgress):
+    """GET /health/live (200 while serving) and GET /health/ready (503 until every component loaded)"""
+    @app.route('/health/live', methods=['GET'])
+    def health_live():
+        return jsonify({'live': True})
+
+    @app.route('/health/ready', methods=['GET'])
+    def health_ready():
+        snapshot = progress.snapshot()
+        return jsonify(snapshot), 200 if snapshot['ready'] else 503
@@ -0,0 +1,129 @@
+"""
+Near-duplicate answer cache for chat queries
+SimHash fingerprints over TF-IDF vectors, indexed with banded LSH and bounded by LRU eviction
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class SimHashCache:
+    """
+    Cache answers by the SimHash of a query's TF-IDF vector.
+
+    Each fingerprint bit is the sign of a random +/-1 projection of the
+    vector, so paraphrases sharing most weighted terms land a few bits
+    apart. Fingerprints are split into ``bands`` equal slices and indexed
+    per slice; as long as ``max_distance < bands`` any entry within
+    ``max_distance`` shares at least one slice with the query, so banding
+    never loses a hit. A hit additionally needs an identical ``guard``
+    (predicted intent, extracted entities, ...).
+    """
+
+    def __init__(self, n_features: int, bits: int = 64, bands: int = 8, max_distance: int = 3,
+                 max_entries: int = 2048, seed: int = 42):
+        if bits % bands:
+            raise ValueError("bits must be a multiple of bands")
+        if max_distance >= bands:
+            raise ValueError("max_distance must be smaller than bands for exact LSH recall")
+
+        rng = np.random.default_rng(seed)
+        self.planes = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(n_features, bits))
+        self.bits = bits
+        self.bands = bands
+        self.band_bits = bits // bands
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[tuple, Any]' = OrderedDict()  # (fingerprint, guard) -> value
+        self._buckets: Dict[tuple, set] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def fingerprint(self, X) -> Optional[int]:
+        """SimHash of a single-row (sparse) TF-IDF matrix; None for an empty vector"""
+        if X.shape[0] != 1 or getattr(X, 'nnz', 1) == 0:
+            return None
+        projection = np.asarray(X @ self.planes).ravel()
+        return int.from_bytes(np.packbits(projection > 0).tobytes(), 'big')
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        return [(band, (fingerprint >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+
+    def get(self, fingerprint: Optional[int], guard: Hashable) -> Optional[Any]:
+        if fingerprint is None:
+            return None
+
+        with self._lock:
+            self.lookups += 1
+            best, best_distance = None, self.max_distance + 1
+            candidates = set()
+            for key in self._band_keys(fingerprint):
+                candidates.update(self._buckets.get(key, ()))
+
+            for candidate in candidates:
+                candidate_fingerprint, candidate_guard = candidate
+                distance = (candidate_fingerprint ^ fingerprint).bit_count()
+                if distance < best_distance and candidate_guard == guard:
+                    best, best_distance = candidate, distance
+
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best]
+
+    def put(self, fingerprint: Optional[int], guard: Hashable, value: Any):
+        if fingerprint is None or self.max_entries <= 0:
+            return
+
+        entry = (fingerprint, guard)
+        with self._lock:
+            if entry not in self._entries:
+                for key in self._band_keys(fingerprint):
+                    self._buckets.setdefault(key, set()).add(entry)
+            self._entries[entry] = value
+            self._entries.move_to_end(entry)
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                for key in self._band_keys(evicted[0]):
+                    bucket = self._buckets[key]
+                    bucket.discard(evicted)
+                    if not bucket:
+                        del self._buckets[key]
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'max_distance': self.max_distance,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+
+def cache_from_env(n_features: int) -> Optional[SimHashCache]:
+    """
+    Build a cache sized by SEMANTIC_CACHE_SIZE (default 2048, 0 disables)
+    with SEMANTIC_CACHE_DISTANCE as the Hamming threshold (default 3).
+    """
+    max_entries = int(os.getenv('SEMANTIC_CACHE_SIZE', '2048'))
+    if max_entries <= 0 or n_features <= 0:
+        return None
+    return SimHashCache(
+        n_features,
+        max_distance=int(os.getenv('SEMANTIC_CACHE_DISTANCE', '3')),
+        max_entries=max_entries
+    )
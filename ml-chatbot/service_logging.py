@@ -0,0 +1,163 @@
+"""
+Logging setup for the chat services
+Optional background writer with JSON records, plus sampling and a kill switch for hot-path loggers
+
+Environment:
+    LOG_MODE          sync (default) writes on the calling thread, async hands
+                      records to a queue drained by a background thread
+    LOG_FORMAT        text (default) or json
+    LOG_QUEUE_SIZE    async queue bound; records are dropped, never waited on (default 10000)
+    HOT_PATH_LOGS     0 silences every hot-path logger (default 1)
+    LOG_SAMPLE_RATES  per-logger keep rates, e.g. "chat.hot.ml_prediction=0.1,werkzeug=0.01"
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
+
+HOT_PREFIX = 'chat.hot.'
+
+# Per-request loggers outside our code that are treated as hot-path too
+EXTERNAL_HOT_LOGGERS = ('werkzeug',)
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_FIELDS = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+
+_state = {'configured': False, 'service': None, 'listener': None, 'handler': None}
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra={...}`` fields become top-level keys"""
+
+    def __init__(self, service: str = None):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if self.service:
+            payload['service'] = self.service
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep roughly ``rate`` of the records passing through"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops and counts records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            print(f"⚠️ Ignoring bad LOG_SAMPLE_RATES entry: {item}")
+    return rates
+
+
+def _apply_hot_path_policy(logger: logging.Logger):
+    """Disable or sample a hot-path logger according to the environment"""
+    if os.getenv('HOT_PATH_LOGS', '1').lower() in ('0', 'false', 'off', 'no'):
+        logger.disabled = True
+        return
+
+    rate = _parse_rates(os.getenv('LOG_SAMPLE_RATES', '')).get(logger.name)
+    for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+        logger.removeFilter(existing)
+    if rate is not None and rate < 1.0:
+        logger.addFilter(SamplingFilter(rate))
+
+
+def configure_logging(service: str, level: int = logging.INFO) -> None:
+    """Install the root handler for this process; later calls are no-ops"""
+    with _lock:
+        if _state['configured']:
+            return
+
+        formatter = JsonFormatter(service) if os.getenv('LOG_FORMAT', 'text').lower() == 'json' \
+            else logging.Formatter(logging.BASIC_FORMAT)
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(formatter)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+
+        if os.getenv('LOG_MODE', 'sync').lower() == 'async':
+            log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+            handler = DroppingQueueHandler(log_queue)
+            listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            _state['listener'] = listener
+        else:
+            handler = stream_handler
+
+        root.addHandler(handler)
+        _state.update(configured=True, service=service, handler=handler)
+
+    for name in EXTERNAL_HOT_LOGGERS:
+        _apply_hot_path_policy(logging.getLogger(name))
+
+
+def hot_logger(name: str) -> logging.Logger:
+    """
+    Logger for per-request messages, named ``chat.hot.<name>``.
+    Pass values as arguments or ``extra`` rather than pre-formatted strings
+    so a disabled or sampled-out record costs almost nothing.
+    """
+    logger = logging.getLogger(HOT_PREFIX + name)
+    _apply_hot_path_policy(logger)
+    return logger
+
+
+def logging_stats() -> Dict[str, object]:
+    handler = _state['handler']
+    stats = {
+        'mode': 'async' if _state['listener'] is not None else 'sync',
+        'hot_path_logs': os.getenv('HOT_PATH_LOGS', '1').lower() not in ('0', 'false', 'off', 'no')
+    }
+    if isinstance(handler, DroppingQueueHandler):
+        stats.update(enqueued=handler.enqueued, dropped=handler.dropped, queued=handler.queue.qsize())
+    return stats
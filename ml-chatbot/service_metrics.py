@@ -0,0 +1,227 @@
+"""
+In-process metrics for the chat services
+Counters and fixed-bucket histograms rendered in the Prometheus text exposition format
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram:
+    """Fixed-bucket histogram; observations are in seconds by convention"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, **labels) -> 'Timer':
+        return Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {values[-2]!r}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {values[-1]}')
+        return lines
+
+
+class Timer:
+    """
+    Context manager observing the monotonic duration of its block.
+    With ``errors`` set, an exception leaving the block is also counted
+    there by stage and exception type.
+    """
+
+    __slots__ = ('histogram', 'labels', 'errors', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str], errors: 'Counter' = None):
+        self.histogram = histogram
+        self.labels = labels
+        self.errors = errors
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None and self.errors is not None:
+            self.errors.inc(stage=self.labels.get('stage', ''), type=exc_type.__name__)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus collector callbacks for values owned elsewhere.
+
+    A collector returns ``(name, type, help, [(labels_dict, value), ...])``
+    tuples and is called on every render, e.g. to export cache statistics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def _get_or_create(self, cls, name, documentation, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labels, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labels, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception:
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    names = sorted(labels)
+                    lines.append(f'{name}{_format_labels(names, [labels[n] for n in names])} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = MetricsRegistry()
+
+# Shared chat pipeline metrics; every service reports under the same names
+STAGE_SECONDS = REGISTRY.histogram('chat_stage_seconds', 'Time spent in each chat pipeline stage', ['stage'])
+REQUEST_SECONDS = REGISTRY.histogram('chat_request_seconds', 'End-to-end /chat handling time')
+REQUESTS = REGISTRY.counter('chat_requests_total', 'Answered chat requests by intent and engine', ['intent', 'engine'])
+ERRORS = REGISTRY.counter('chat_errors_total', 'Chat errors by stage and exception type', ['stage', 'type'])
+
+
+# Per-request trace (see slow_requests.py) told about every stage the request runs
+REQUEST_TRACE = contextvars.ContextVar('request_trace', default=None)
+
+
+class StageTimer(Timer):
+    """Timer that also reports the stage to the current request trace, if any"""
+
+    __slots__ = ('trace',)
+
+    def __enter__(self):
+        self.trace = REQUEST_TRACE.get()
+        if self.trace is not None:
+            self.trace.enter_stage(self.labels['stage'])
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.trace is not None:
+            self.trace.exit_stage(self.labels['stage'], time.perf_counter() - self.start)
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+def stage(name: str) -> Timer:
+    """``with stage('classify'): ...`` records the block in chat_stage_seconds"""
+    return StageTimer(STAGE_SECONDS, {'stage': name}, ERRORS)
+
+
+def stats_collector(prefix: str, source: Callable[[], dict]) -> Callable[[], List[tuple]]:
+    """Export the numeric fields of a ``stats()`` dict as gauges named ``<prefix>_<field>``"""
+    def collect():
+        stats = source() or {}
+        return [
+            (f'{prefix}_{field}', 'gauge', f'{prefix.replace("_", " ")} {field.replace("_", " ")}', [({}, value)])
+            for field, value in stats.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+    return collect
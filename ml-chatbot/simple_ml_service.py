@@ -11,12 +11,15 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import re
 from datetime import datetime
-from sklearn.metrics.pairwise import cosine_similarity
+from artifact_store import artifact_path, load_response_data, open_current
+from service_logging import configure_logging
 
 # Add the current directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
+configure_logging('simple_ml_service')
+
 app = Flask(__name__)
 CORS(app)
 
@@ -31,20 +34,21 @@ class SimplifiedJewelryChatbot:
         """Load vectorizer and response data"""
         try:
             models_dir = os.path.join(current_dir, 'models')
+            # The basic trainer's CURRENT store version if published, else the loose files
+            version = open_current(models_dir, 'basic')
             
             # Load vectorizer
-            vectorizer_path = os.path.join(models_dir, 'vectorizer.pkl')
+            vectorizer_path = artifact_path(models_dir, 'vectorizer.pkl', version)
             if os.path.exists(vectorizer_path):
                 with open(vectorizer_path, 'rb') as f:
                     self.vectorizer = pickle.load(f)
                     print("✓ Vectorizer loaded")
             
             # Load response data
-            response_path = os.path.join(models_dir, 'response_data.pkl')
-            if os.path.exists(response_path):
-                with open(response_path, 'rb') as f:
-                    self.response_data = pickle.load(f)
-                    print("✓ Response data loaded")
+            # Question vectors come memory-mapped from a store version
+            self.response_data = load_response_data(models_dir, version)
+            if self.response_data is not None:
+                print("✓ Response data loaded")
             
             # Check if we have enough to work
             if self.vectorizer and self.response_data:
@@ -78,7 +82,9 @@ class SimplifiedJewelryChatbot:
             processed_input = self.preprocess_text(user_input)
             input_vector = self.vectorizer.transform([processed_input])
             
-            # Calculate similarities
+            # Calculate similarities; imported here because sklearn.metrics
+            # costs ~2s of startup and is only needed once models are loaded
+            from sklearn.metrics.pairwise import cosine_similarity
             similarities = cosine_similarity(
                 input_vector, 
                 self.response_data['question_vectors']
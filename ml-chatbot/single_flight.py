@@ -0,0 +1,68 @@
+"""
+Request coalescing for the chat services
+Concurrent callers asking for the same key share a single computation
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key.
+
+    The first caller for a key (the leader) runs ``fn``; callers arriving
+    while it is still running wait and receive the same result, or the same
+    exception. Nothing is cached: once the leader finishes, the next call
+    for that key computes again. Results are shared objects, so callers
+    must treat them as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests, coalesced, in_flight = self.requests, self.coalesced, len(self._calls)
+        return {
+            'requests': requests,
+            'coalesced': coalesced,
+            'in_flight': in_flight,
+            'coalescing_rate': round(coalesced / requests, 4) if requests else 0.0
+        }
@@ -0,0 +1,182 @@
+"""
+Slow-request watchdog for the chat services
+Records requests over a latency threshold with their stage timings and a stack snapshot taken while still slow
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import jsonify
+
+from live_profiler import debug_authorized
+from service_metrics import REQUEST_TRACE
+
+MAX_STACK_FRAMES = 40
+
+
+class RequestTrace:
+    """What one request did so far; mutated by its stages, read by the watchdog"""
+
+    def __init__(self, message: str):
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now().isoformat()
+        self.message_sha256 = hashlib.sha256(message.encode('utf-8')).hexdigest()[:16]
+        self.message_length = len(message)
+        self.intent: Optional[str] = None
+        self.entities: Optional[Dict[str, Any]] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.open_stages: Dict[int, str] = {}
+        self.threads = {threading.get_ident()}
+        self.stacks: Optional[Dict[str, Any]] = None
+
+    def enter_stage(self, name: str):
+        thread_id = threading.get_ident()
+        self.threads.add(thread_id)
+        self.open_stages[thread_id] = name
+
+    def exit_stage(self, name: str, seconds: float):
+        self.open_stages.pop(threading.get_ident(), None)
+        self.stages.append({'stage': name, 'ms': round(seconds * 1000, 3)})
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def snapshot(self):
+        """Capture the current stack of every thread working on this request"""
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.stacks = {
+            'taken_at_ms': round(self.elapsed_ms(), 1),
+            'threads': [{
+                'thread': names.get(thread_id, str(thread_id)),
+                'stage': self.open_stages.get(thread_id),
+                'stack': traceback.format_stack(frames[thread_id])[-MAX_STACK_FRAMES:]
+            } for thread_id in list(self.threads) if thread_id in frames]
+        }
+
+    def to_dict(self, elapsed_ms: float, completed: bool) -> Dict[str, Any]:
+        return {
+            'timestamp': self.timestamp,
+            'message_sha256': self.message_sha256,
+            'message_length': self.message_length,
+            'elapsed_ms': round(elapsed_ms, 1),
+            'completed': completed,
+            'intent': self.intent,
+            'entities': self.entities,
+            'stages': list(self.stages),
+            'snapshot': self.stacks
+        }
+
+
+class SlowRequestWatchdog:
+    """
+    Keep the last ``capacity`` requests slower than ``threshold_ms``.
+
+    A daemon thread, started on the first tracked request, polls in-flight
+    requests and snapshots the stacks of any that crossed the threshold, so
+    the record shows where the time went rather than where it ended.
+    Messages are stored only as a truncated SHA-256.
+    """
+
+    def __init__(self, threshold_ms: float = 1000, capacity: int = 50):
+        self.threshold_ms = threshold_ms
+        self.poll_interval = min(max(threshold_ms / 4000, 0.01), 0.25)
+        self.records = deque(maxlen=capacity)
+        self.recorded = 0
+        self._active: Dict[int, RequestTrace] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._watch, name='slow-request-watchdog', daemon=True)
+                    self._thread.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                active = list(self._active.values())
+            for trace in active:
+                if trace.stacks is None and trace.elapsed_ms() >= self.threshold_ms:
+                    trace.snapshot()
+
+    @contextmanager
+    def track(self, message: str):
+        if not self.enabled:
+            yield None
+            return
+
+        self._ensure_thread()
+        trace = RequestTrace(message)
+        token = REQUEST_TRACE.set(trace)
+        with self._lock:
+            self._active[id(trace)] = trace
+        try:
+            yield trace
+        finally:
+            REQUEST_TRACE.reset(token)
+            with self._lock:
+                del self._active[id(trace)]
+            elapsed_ms = trace.elapsed_ms()
+            if elapsed_ms >= self.threshold_ms:
+                with self._lock:
+                    self.records.append(trace.to_dict(elapsed_ms, completed=True))
+                    self.recorded += 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(reversed(self.records))
+            in_flight = [trace.to_dict(trace.elapsed_ms(), completed=False)
+                         for trace in self._active.values() if trace.stacks is not None]
+        return {
+            'threshold_ms': self.threshold_ms,
+            'recorded': self.recorded,
+            'in_flight': in_flight,
+            'slow': records
+        }
+
+
+def annotate(intent: str = None, entities: Dict[str, Any] = None):
+    """Attach the detected intent and entities to the current request, if traced"""
+    trace = REQUEST_TRACE.get()
+    if trace is None:
+        return
+    if intent is not None:
+        trace.intent = intent
+    if entities is not None:
+        trace.entities = entities
+
+
+def watchdog_from_env() -> SlowRequestWatchdog:
+    """SLOW_REQUEST_MS threshold (default 1000, 0 disables) and SLOW_REQUEST_BUFFER size (default 50)"""
+    return SlowRequestWatchdog(
+        threshold_ms=float(os.getenv('SLOW_REQUEST_MS', '1000')),
+        capacity=int(os.getenv('SLOW_REQUEST_BUFFER', '50'))
+    )
+
+
+def install_slow_request_endpoint(app, watchdog: SlowRequestWatchdog):
+    """Register ``GET /debug/slow``, guarded like /debug/profile"""
+
+    @app.route('/debug/slow', methods=['GET'])
+    def debug_slow():
+        if not debug_authorized():
+            return jsonify({'error': 'Not found'}), 404
+        return jsonify(watchdog.report())
+
+    return debug_slow
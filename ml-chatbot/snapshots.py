@@ -0,0 +1,218 @@
+"""
+Immutable serving snapshots with atomic hot reload
+Datasets, derived indexes and models are built into one object off the request path and swapped in with a single reference assignment
+
+A request pins the snapshot that was current when it started (through a
+context variable, so engine worker threads see the same one) and finishes
+on it even if a reload lands meanwhile. A replaced snapshot is retired;
+once its last request releases it, the manager drops its reference and
+collects, so the old frames and models are freed instead of lingering.
+Snapshot versions are unique per swap, which makes them safe cache keys.
+"""
+
+import contextvars
+import functools
+import gc
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_pinned = contextvars.ContextVar('serving_snapshot', default=None)
+
+
+class Snapshot:
+    """One published value with its version and in-flight request count"""
+
+    def __init__(self, version: str, value: Any, reason: str):
+        self.version = version
+        self.value = value
+        self.reason = reason
+        self.published_at = time.time()
+        self.retired_at: Optional[float] = None
+        self.inflight = 0
+
+
+class SnapshotManager:
+    """
+    Holds the current snapshot, pins it per request and releases retired ones once drained.
+
+    Values must not be mutated after ``publish``; build a new one instead.
+    ``prepare`` may wrap a value before it is published and ``on_publish``
+    is told about every value that goes live.
+    """
+
+    def __init__(self, prepare: Callable[[Any], Any] = None, on_publish: Callable[[Any], None] = None,
+                 history: int = 20):
+        self.prepare = prepare
+        self.on_publish = on_publish
+        self._lock = threading.Lock()
+        self._current: Optional[Snapshot] = None
+        self._generation = 0
+        self._draining: Dict[str, Snapshot] = {}
+        self._released = deque(maxlen=history)
+        self._reload_thread: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_reload: Dict[str, Any] = {}
+
+    @property
+    def current(self) -> Any:
+        snapshot = self._current
+        return snapshot.value if snapshot is not None else None
+
+    @property
+    def version(self) -> str:
+        snapshot = _pinned.get() or self._current
+        return snapshot.version if snapshot is not None else ''
+
+    def publish(self, value: Any, reason: str = 'boot') -> str:
+        """Swap ``value`` in; requests already running keep the snapshot they pinned"""
+        if self.prepare is not None:
+            value = self.prepare(value)
+        with self._lock:
+            self._generation += 1
+            snapshot = Snapshot(f'v{self._generation}', value, reason)
+            previous, self._current = self._current, snapshot
+            drained = None
+            if previous is not None:
+                previous.retired_at = time.time()
+                if previous.inflight:
+                    self._draining[previous.version] = previous
+                else:
+                    drained = previous
+        # Rebind the globals first so the released value has no live references left when it is collected
+        if self.on_publish is not None:
+            self.on_publish(value)
+        del previous
+        if drained is not None:
+            self._release(drained)
+        logger.info("📦 Snapshot %s published (%s)", snapshot.version, reason)
+        return snapshot.version
+
+    @contextmanager
+    def use(self):
+        """Pin the request's snapshot for the block; nested uses (engine threads) share the outer pin"""
+        with self._lock:
+            snapshot = _pinned.get() or self._current
+            if snapshot is None:
+                raise RuntimeError("No snapshot published")
+            snapshot.inflight += 1
+        token = _pinned.set(snapshot)
+        try:
+            yield snapshot.value
+        finally:
+            _pinned.reset(token)
+            with self._lock:
+                snapshot.inflight -= 1
+                drained = snapshot.retired_at is not None and snapshot.inflight == 0 and \
+                    self._draining.pop(snapshot.version, None) is not None
+            if drained:
+                self._release(snapshot)
+
+    def bound(self, fn: Callable) -> Callable:
+        """``fn(value, *args)`` as ``fn(*args)`` running on the pinned snapshot"""
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            with self.use() as value:
+                return fn(value, *args, **kwargs)
+        return call
+
+    def _release(self, snapshot: Snapshot):
+        # Collect off the request path: a full collection over pandas/Keras graphs is not free
+        def collect():
+            value, snapshot.value = snapshot.value, None
+            try:
+                ref = weakref.ref(value)
+            except TypeError:
+                ref = None
+            del value
+            gc.collect()
+            with self._lock:
+                self._released.append({
+                    'version': snapshot.version,
+                    'drained_s': round(time.time() - snapshot.retired_at, 3),
+                    'ref': ref
+                })
+            logger.info("🧹 Snapshot %s drained and released", snapshot.version)
+
+        threading.Thread(target=collect, name=f'snapshot-release-{snapshot.version}', daemon=True).start()
+
+    def reload_async(self, build: Callable[[], Any], reason: str) -> bool:
+        """Build a new snapshot on a background thread and publish it; False if a reload is already running"""
+        with self._lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+
+            def run():
+                start = time.perf_counter()
+                try:
+                    value = build()
+                except Exception as e:
+                    logger.exception("Snapshot reload (%s) failed; keeping %s", reason, self.version)
+                    with self._lock:
+                        self.reload_failures += 1
+                        self.last_reload = {'reason': reason, 'ok': False, 'error': f'{type(e).__name__}: {e}',
+                                            'seconds': round(time.perf_counter() - start, 3)}
+                    return
+                version = self.publish(value, reason)
+                with self._lock:
+                    self.reloads += 1
+                    self.last_reload = {'reason': reason, 'ok': True, 'version': version,
+                                        'seconds': round(time.perf_counter() - start, 3)}
+
+            self._reload_thread = threading.Thread(target=run, name='snapshot-reload', daemon=True)
+            self._reload_thread.start()
+        return True
+
+    def watch(self, fingerprint: Callable[[], Hashable], build: Callable[[], Any],
+              interval_s: float) -> threading.Thread:
+        """
+        Poll ``fingerprint()`` every ``interval_s`` and reload when it changes.
+
+        A change must read the same on two consecutive polls before it
+        triggers, so a file still being copied is not loaded half-written.
+        """
+        def run():
+            seen, candidate = fingerprint(), None
+            while True:
+                time.sleep(interval_s)
+                try:
+                    latest = fingerprint()
+                except OSError:
+                    continue
+                if latest == seen:
+                    candidate = None
+                elif latest != candidate:
+                    candidate = latest
+                elif self.reload_async(build, 'file change'):
+                    seen, candidate = latest, None
+
+        thread = threading.Thread(target=run, name='snapshot-watch', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            current = self._current
+            released = list(self._released)
+            stats = {
+                'version': current.version if current else '',
+                'published_at': current.published_at if current else None,
+                'reason': current.reason if current else None,
+                'inflight': current.inflight if current else 0,
+                'draining': {version: snapshot.inflight for version, snapshot in self._draining.items()},
+                'reloading': self._reload_thread is not None and self._reload_thread.is_alive(),
+                'reloads': self.reloads,
+                'reload_failures': self.reload_failures,
+                'last_reload': dict(self.last_reload)
+            }
+        # A released snapshot whose weakref still resolves is being kept alive by something else: a leak
+        stats['released'] = [{'version': entry['version'], 'drained_s': entry['drained_s'],
+                              'freed': entry['ref'] is None or entry['ref']() is None} for entry in released]
+        return stats
@@ -0,0 +1,575 @@
+"""
+Out-of-core catalog ingestion
+Streams a jewelry/diamonds catalog through a chunked generator pipeline and keeps only what serving needs
+
+    read_chunks -> enrich -> aggregate (cube + moments) + serving sample
+
+Memory is bounded by one chunk plus a few small accumulators, so the
+catalog can be far larger than RAM. Each chunk gets the same enrichment
+columns the services and AdvancedDatasetTrainer compute (price segment,
+style, quality scores, price per carat, size category), and is then
+folded into:
+
+- an aggregate cube: count, sums, min and max at the finest grain of the
+  categorical dimensions. Every groupby in the trainer's analytics is a
+  roll-up of it, so counts, means, modes and quality figures are exact.
+- running moments for the numeric columns (exact min/max/mean/std).
+- a serving sample: a uniform bottom-k sample by random key, plus the
+  first few rows of every cube cell so no filter combination disappears.
+  Medians come from this sample and are approximate.
+
+``ingest`` writes dataset_analytics.json in the trainer's format, the
+cubes, and the serving samples as CSVs in the catalog schema, all under
+models/serving/ so the committed models/dataset_analytics.json is never
+touched. Kinds that were not streamed keep their analytics from the
+previous ingest, or from models/dataset_analytics.json on the first one.
+With SERVING_CATALOG=1 the advanced and intelligent services load the
+samples instead of the full CSVs, and the intelligent service loads the
+ingested analytics.
+
+Usage:
+    python streaming_catalog.py --jewelry feed/jewelry.csv --diamonds feed/diamonds.csv
+    python streaming_catalog.py --diamonds /tmp/diamonds_50m --chunk-rows 250000 --sample-rows 200000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+SERVING_DIR = os.path.join(MODELS_DIR, 'serving')
+DEFAULT_CHUNK_ROWS = 500_000
+DEFAULT_SAMPLE_ROWS = 100_000
+MIN_ROWS_PER_CELL = 5
+
+CUT_SCORES = {'Ideal': 5, 'Premium': 4, 'Very Good': 3, 'Good': 2, 'Fair': 1}
+COLOR_SCORES = {'D': 7, 'E': 6, 'F': 5, 'G': 4, 'H': 3, 'I': 2, 'J': 1}
+CLARITY_SCORES = {'FL': 8, 'IF': 7, 'VVS1': 6, 'VVS2': 5, 'VS1': 4, 'VS2': 3, 'SI1': 2, 'SI2': 1}
+
+# Bins and labels as in AdvancedDatasetTrainer
+PRICE_SEGMENT_BINS = [0, 5000, 15000, 30000, 50000, float('inf')]
+PRICE_SEGMENT_LABELS = ['Budget', 'Mid-range', 'Luxury', 'Ultra-luxury', 'Exclusive']
+SIZE_BINS = [0, 0.5, 1.0, 1.5, 2.0, float('inf')]
+SIZE_LABELS = ['Small', 'Medium', 'Large', 'Very Large', 'Exceptional']
+
+KINDS = {
+    'jewelry': {
+        'columns': ['category', 'type', 'metal', 'stone', 'weight', 'size', 'brand', 'price'],
+        'dimensions': ['category', 'type', 'metal', 'stone', 'brand', 'style', 'price_segment'],
+        'measures': {'price': ('sum', 'min', 'max'), 'weight': ('sum',)},
+        'moments': ['price', 'weight', 'size']
+    },
+    'diamonds': {
+        'columns': ['carat', 'cut', 'color', 'clarity', 'depth', 'table', 'price', 'x', 'y', 'z'],
+        'dimensions': ['cut', 'color', 'clarity', 'size_category'],
+        'measures': {'price': ('sum', 'min', 'max'), 'price_per_carat': ('sum',), 'value_score': ('sum',)},
+        'moments': ['carat', 'price', 'x', 'y', 'z', 'volume', 'length_width_ratio', 'depth', 'table']
+    }
+}
+
+
+def serving_catalog_enabled() -> bool:
+    return os.getenv('SERVING_CATALOG', '0').lower() in ('1', 'true', 'on', 'yes')
+
+
+def catalog_path(filename: str, default: str) -> str:
+    """The ingested serving sample for ``filename`` when SERVING_CATALOG is on and it exists, else ``default``"""
+    if serving_catalog_enabled():
+        path = os.path.join(SERVING_DIR, filename)
+        if os.path.exists(path):
+            return path
+    return default
+
+
+# ---------------------------------------------------------------------------
+# Pipeline stages
+# ---------------------------------------------------------------------------
+
+def read_chunks(path: str, kind: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """A CSV file or a catalog_generator npy directory as DataFrames of at most ``chunk_rows`` rows"""
+    columns = KINDS[kind]['columns']
+    if os.path.isdir(path):
+        from catalog_generator import load_catalog
+        catalog = load_catalog(path, mmap=True)
+        for start in range(0, len(catalog), chunk_rows):
+            yield catalog.iloc[start:start + chunk_rows][columns].reset_index(drop=True)
+        return
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+
+def _as_str(series: pd.Series) -> pd.Series:
+    return series.astype(str) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def enrich_jewelry(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Price segment, value score and style, vectorized"""
+    chunk = chunk.copy()
+    chunk['price_segment'] = pd.cut(chunk['price'], bins=PRICE_SEGMENT_BINS, labels=PRICE_SEGMENT_LABELS)
+    chunk['value_score'] = chunk['weight'] / chunk['price'] * 1000
+    chunk['style'] = np.select(
+        [_as_str(chunk['type']).isin(['engagement', 'wedding']), _as_str(chunk['brand']) == 'vintage',
+         _as_str(chunk['stone']).isin(['diamond', 'emerald'])],
+        ['Bridal', 'Vintage', 'Classic'], default='Contemporary')
+    return chunk
+
+
+def enrich_diamonds(chunk: pd.DataFrame) -> pd.DataFrame:
+    """4C scores, overall quality, price per carat, value score, size category and proportions"""
+    chunk = chunk.copy()
+    chunk['cut_score'] = _as_str(chunk['cut']).map(CUT_SCORES).fillna(2)
+    chunk['color_score'] = _as_str(chunk['color']).map(COLOR_SCORES).fillna(4)
+    chunk['clarity_score'] = _as_str(chunk['clarity']).map(CLARITY_SCORES).fillna(3)
+    chunk['overall_quality'] = (chunk['cut_score'] + chunk['color_score'] + chunk['clarity_score']) / 3
+    chunk['price_per_carat'] = chunk['price'] / chunk['carat']
+    chunk['value_score'] = chunk['carat'] * chunk['overall_quality'] / chunk['price'] * 10000
+    chunk['size_category'] = pd.cut(chunk['carat'], bins=SIZE_BINS, labels=SIZE_LABELS)
+    chunk['volume'] = chunk['x'] * chunk['y'] * chunk['z']
+    chunk['length_width_ratio'] = chunk['x'] / chunk['y']
+    return chunk
+
+
+ENRICH = {'jewelry': enrich_jewelry, 'diamonds': enrich_diamonds}
+
+
+# ---------------------------------------------------------------------------
+# Accumulators
+# ---------------------------------------------------------------------------
+
+class Moments:
+    """Exact count/min/max/mean/std of numeric columns, merged chunk by chunk (Chan et al.); NaNs skipped like pandas"""
+
+    def __init__(self, columns: Iterable[str]):
+        self.columns = list(columns)
+        self.count = np.zeros(len(self.columns))
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros(len(self.columns))
+        self.min = np.full(len(self.columns), np.inf)
+        self.max = np.full(len(self.columns), -np.inf)
+
+    def update(self, chunk: pd.DataFrame):
+        values = chunk[self.columns].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=0)
+        if not n.any():
+            return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, np.nansum(values, axis=0) / n, 0.0)
+            m2 = np.nansum((values - mean) ** 2, axis=0)
+            total = self.count + n
+            delta = mean - self.mean
+            self.mean = np.where(n > 0, self.mean + delta * n / total, self.mean)
+            self.m2 = np.where(n > 0, self.m2 + m2 + delta ** 2 * self.count * n / total, self.m2)
+        self.count = total
+        self.min = np.fmin(self.min, np.nanmin(np.where(valid, values, np.inf), axis=0))
+        self.max = np.fmax(self.max, np.nanmax(np.where(valid, values, -np.inf), axis=0))
+
+    def stat(self, column: str, name: str) -> float:
+        i = self.columns.index(column)
+        if name == 'std':
+            return float(np.sqrt(self.m2[i] / (self.count[i] - 1))) if self.count[i] > 1 else float('nan')
+        return float(getattr(self, name)[i])
+
+
+class CubeAccumulator:
+    """count plus per-measure sum/min/max at the finest grain of ``dimensions``"""
+
+    def __init__(self, dimensions: List[str], measures: Dict[str, tuple]):
+        self.dimensions = dimensions
+        self.measures = measures
+        self.cube: Optional[pd.DataFrame] = None
+
+    def _partial(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        keys = [_as_str(chunk[dimension]).rename(dimension) for dimension in self.dimensions]
+        grouped = chunk.groupby(keys, observed=True, sort=False)
+        partial = grouped.size().to_frame('count')
+        for column, aggregations in self.measures.items():
+            for aggregation in aggregations:
+                partial[f'{column}_{aggregation}'] = grouped[column].agg(aggregation)
+        return partial
+
+    def update(self, chunk: pd.DataFrame):
+        partial = self._partial(chunk)
+        if self.cube is None:
+            self.cube = partial
+            return
+        combined = pd.concat([self.cube, partial])
+        grouped = combined.groupby(level=self.dimensions, sort=False)
+        merged = grouped[['count'] + [column for column in combined.columns if column.endswith('_sum')]].sum()
+        for column in combined.columns:
+            if column.endswith('_min'):
+                merged[column] = grouped[column].min()
+            elif column.endswith('_max'):
+                merged[column] = grouped[column].max()
+        self.cube = merged[combined.columns]
+
+    def frame(self) -> pd.DataFrame:
+        return self.cube.sort_index().reset_index() if self.cube is not None else pd.DataFrame()
+
+
+class ServingSample:
+    """
+    Uniform bottom-k sample by random key, unioned with the ``per_cell``
+    lowest-key rows of each cube cell so rare combinations stay findable.
+    """
+
+    def __init__(self, rows: int, cell_columns: List[str], per_cell: int = MIN_ROWS_PER_CELL, seed: int = 0):
+        self.rows = rows
+        self.cell_columns = cell_columns
+        self.per_cell = per_cell
+        self.rng = np.random.default_rng(seed)
+        self.kept: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame):
+        chunk = chunk.assign(_key=self.rng.random(len(chunk)))
+        candidates = chunk if self.kept is None else pd.concat([self.kept, chunk], ignore_index=True)
+        threshold = np.partition(candidates['_key'].to_numpy(), self.rows - 1)[self.rows - 1] \
+            if len(candidates) > self.rows else np.inf
+        keys = [_as_str(candidates[column]) for column in self.cell_columns]
+        cell_rank = candidates.groupby(keys, observed=True, sort=False)['_key'].rank(method='first')
+        keep = (candidates['_key'] <= threshold) | (cell_rank <= self.per_cell)
+        self.kept = candidates[keep.to_numpy()].reset_index(drop=True)
+
+    def frame(self, columns: List[str]) -> pd.DataFrame:
+        if self.kept is None:
+            return pd.DataFrame(columns=columns)
+        return self.kept.sort_values('_key')[columns].reset_index(drop=True)
+
+    def uniform(self) -> pd.DataFrame:
+        """Only the bottom-k rows: an unbiased sample for quantiles"""
+        if self.kept is None:
+            return pd.DataFrame()
+        return self.kept.nsmallest(self.rows, '_key')
+
+
+class CatalogAggregator:
+    """Everything one catalog kind contributes to serving, built from a stream of enriched chunks"""
+
+    def __init__(self, kind: str, sample_rows: int = DEFAULT_SAMPLE_ROWS, seed: int = 0):
+        spec = KINDS[kind]
+        self.kind = kind
+        self.cube = CubeAccumulator(spec['dimensions'], spec['measures'])
+        self.moments = Moments(spec['moments'])
+        self.sample = ServingSample(sample_rows, spec['dimensions'], seed=seed)
+        self.rows = 0
+        self.chunks = 0
+
+    def update(self, chunk: pd.DataFrame):
+        self.cube.update(chunk)
+        self.moments.update(chunk)
+        self.sample.update(chunk)
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def median(self, column: str) -> float:
+        return float(self.sample.uniform()[column].median())
+
+
+def aggregate(chunks: Iterable[pd.DataFrame], kind: str, sample_rows: int = DEFAULT_SAMPLE_ROWS,
+              seed: int = 0, progress: bool = False) -> CatalogAggregator:
+    """Run raw chunks through enrichment into a CatalogAggregator"""
+    aggregator = CatalogAggregator(kind, sample_rows, seed)
+    start = time.perf_counter()
+    for chunk in map(ENRICH[kind], chunks):
+        aggregator.update(chunk)
+        if progress:
+            print(f"  {kind}: {aggregator.rows:,} rows ({aggregator.rows / (time.perf_counter() - start):,.0f} rows/s)",
+                  file=sys.stderr)
+    return aggregator
+
+
+# ---------------------------------------------------------------------------
+# Analytics, in AdvancedDatasetTrainer's format, rolled up from the cube
+# ---------------------------------------------------------------------------
+
+def _rollup(cube: pd.DataFrame, by, column: str = 'count', how: str = 'sum') -> pd.Series:
+    return cube.groupby(by, observed=True)[column].agg(how)
+
+
+def _mean_by(cube: pd.DataFrame, by, column: str) -> pd.Series:
+    sums = cube.groupby(by, observed=True)[[f'{column}_sum', 'count']].sum()
+    return sums[f'{column}_sum'] / sums['count']
+
+
+def _mode_by(cube: pd.DataFrame, by: str, column: str) -> Dict:
+    """Most frequent ``column`` value per ``by`` value; ties go to the first in sort order like Series.mode"""
+    counts = cube.groupby([by, column], observed=True)['count'].sum().sort_index()
+    return counts.groupby(level=0, sort=False).idxmax().map(lambda key: key[1]).to_dict()
+
+
+def jewelry_analytics(aggregator: CatalogAggregator) -> Dict:
+    cube, moments = aggregator.cube.frame(), aggregator.moments
+    price_by_category = _rollup(cube, 'category', 'price_min', 'min').to_frame('min')
+    price_by_category['max'] = _rollup(cube, 'category', 'price_max', 'max')
+    segment_counts = _rollup(cube, 'price_segment').reindex(PRICE_SEGMENT_LABELS, fill_value=0)
+    segment_modes = _mode_by(cube, 'price_segment', 'category')
+
+    def top(by, n=None):
+        counts = _rollup(cube, by).sort_values(ascending=False, kind='stable')
+        return (counts.head(n) if n else counts).to_dict()
+
+    return {
+        'basic_stats': {
+            'total_items': aggregator.rows,
+            'unique_categories': int(cube['category'].nunique()),
+            'unique_types': int(cube['type'].nunique()),
+            'unique_metals': int(cube['metal'].nunique()),
+            'unique_stones': int(cube['stone'].nunique()),
+            'unique_brands': int(cube['brand'].nunique()),
+            'price_range': {'min': moments.stat('price', 'min'), 'max': moments.stat('price', 'max'),
+                            'mean': moments.stat('price', 'mean'), 'median': aggregator.median('price'),
+                            'std': moments.stat('price', 'std')},
+            'weight_range': {name: moments.stat('weight', name) for name in ('min', 'max', 'mean')},
+            'size_range': {name: moments.stat('size', name) for name in ('min', 'max', 'mean')}
+        },
+        'categories': {
+            'distribution': top('category'),
+            'avg_price_by_category': _mean_by(cube, 'category', 'price').to_dict(),
+            'price_range_by_category': price_by_category.to_dict()
+        },
+        'materials': {
+            'distribution': top('metal'),
+            'avg_price_by_metal': _mean_by(cube, 'metal', 'price').to_dict(),
+            'premium_materials': _mean_by(cube, 'metal', 'price').sort_values(ascending=False).head(3).to_dict()
+        },
+        'stones': {
+            'distribution': top('stone'),
+            'avg_price_by_stone': _mean_by(cube, 'stone', 'price').to_dict(),
+            'precious_stones': _mean_by(cube, 'stone', 'price').sort_values(ascending=False).head(5).to_dict()
+        },
+        'brands': {
+            'distribution': top('brand'),
+            'avg_price_by_brand': _mean_by(cube, 'brand', 'price').to_dict(),
+            'luxury_brands': _mean_by(cube, 'brand', 'price').sort_values(ascending=False).to_dict()
+        },
+        'price_segments': {
+            'distribution': segment_counts.sort_values(ascending=False, kind='stable').to_dict(),
+            'category_by_segment': {segment: segment_modes[segment] for segment in PRICE_SEGMENT_LABELS
+                                    if segment in segment_modes}
+        },
+        'popular_combinations': {
+            'metal_stone': top(['metal', 'stone'], 10),
+            'category_metal': top(['category', 'metal'], 10),
+            'type_stone': top(['type', 'stone'], 10)
+        }
+    }
+
+
+def diamonds_analytics(aggregator: CatalogAggregator) -> Dict:
+    cube, moments = aggregator.cube.frame(), aggregator.moments
+    quality = (cube['cut'].map(CUT_SCORES).fillna(2) + cube['color'].map(COLOR_SCORES).fillna(4)
+               + cube['clarity'].map(CLARITY_SCORES).fillna(3)) / 3
+    n = cube['count'].sum()
+    quality_mean = float((quality * cube['count']).sum() / n)
+    # corr(quality, price) from cube sums: quality is constant within a cell
+    price_mean, price_std = moments.stat('price', 'mean'), moments.stat('price', 'std')
+    covariance = ((quality * cube['price_sum']).sum() - n * quality_mean * price_mean) / (n - 1)
+    quality_std = np.sqrt(((quality - quality_mean) ** 2 * cube['count']).sum() / (n - 1))
+    sizes = _rollup(cube, 'size_category').reindex(SIZE_LABELS).dropna().astype(int)
+
+    def distribution(column):
+        return _rollup(cube, column).sort_values(ascending=False, kind='stable').to_dict()
+
+    return {
+        'basic_stats': {
+            'total_diamonds': aggregator.rows,
+            'unique_cuts': int(cube['cut'].nunique()),
+            'unique_colors': int(cube['color'].nunique()),
+            'unique_clarities': int(cube['clarity'].nunique()),
+            'carat_range': {'min': moments.stat('carat', 'min'), 'max': moments.stat('carat', 'max'),
+                            'mean': moments.stat('carat', 'mean'), 'median': aggregator.median('carat')},
+            'price_range': {'min': moments.stat('price', 'min'), 'max': moments.stat('price', 'max'),
+                            'mean': price_mean, 'median': aggregator.median('price')}
+        },
+        '4cs_analysis': {
+            'cut_distribution': distribution('cut'),
+            'color_distribution': distribution('color'),
+            'clarity_distribution': distribution('clarity'),
+            'cut_price_impact': _mean_by(cube, 'cut', 'price').to_dict(),
+            'color_price_impact': _mean_by(cube, 'color', 'price').to_dict(),
+            'clarity_price_impact': _mean_by(cube, 'clarity', 'price').to_dict()
+        },
+        'size_analysis': {
+            'size_distribution': sizes.sort_values(ascending=False, kind='stable').to_dict(),
+            'avg_price_by_size': _mean_by(cube, 'size_category', 'price').reindex(sizes.index).to_dict(),
+            'size_quality_correlation': {column: _mode_by(cube, 'size_category', column)
+                                         for column in ('cut', 'color', 'clarity')}
+        },
+        'price_analysis': {
+            'avg_price_per_carat': float(cube['price_per_carat_sum'].sum() / n),
+            'price_per_carat_by_cut': _mean_by(cube, 'cut', 'price_per_carat').to_dict(),
+            'price_per_carat_by_color': _mean_by(cube, 'color', 'price_per_carat').to_dict(),
+            'price_per_carat_by_clarity': _mean_by(cube, 'clarity', 'price_per_carat').to_dict()
+        },
+        'quality_analysis': {
+            'avg_quality_score': quality_mean,
+            'high_quality_count': int(cube['count'][quality >= 4.5].sum()),
+            'excellent_quality_count': int(cube['count'][quality >= 5.5].sum()),
+            'quality_price_correlation': float(covariance / (quality_std * price_std))
+        },
+        'dimension_analysis': {
+            'avg_dimensions': {'length': moments.stat('x', 'mean'), 'width': moments.stat('y', 'mean'),
+                               'depth': moments.stat('z', 'mean'), 'volume': moments.stat('volume', 'mean')},
+            'proportion_analysis': {
+                'avg_length_width_ratio': moments.stat('length_width_ratio', 'mean'),
+                'avg_depth_percentage': moments.stat('depth', 'mean'),
+                'avg_table_percentage': moments.stat('table', 'mean')
+            }
+        }
+    }
+
+
+def cross_insights(jewelry: Optional[CatalogAggregator], diamonds: Optional[CatalogAggregator]) -> Dict:
+    """The trainer's market_trends and value_analysis sentences"""
+    trends, value = [], []
+    if jewelry is not None and diamonds is not None:
+        jewelry_price, diamond_price = jewelry.moments, diamonds.moments
+        trends.append(f"Average jewelry piece costs ${jewelry_price.stat('price', 'mean'):,.0f} while average "
+                      f"diamond costs ${diamond_price.stat('price', 'mean'):,.0f}")
+        overlap_min = max(jewelry_price.stat('price', 'min'), diamond_price.stat('price', 'min'))
+        overlap_max = min(jewelry_price.stat('price', 'max'), diamond_price.stat('price', 'max'))
+        if overlap_min < overlap_max:
+            trends.append(f"Price overlap exists between ${overlap_min:,.0f} and ${overlap_max:,.0f}")
+
+    if jewelry is not None:
+        cube = jewelry.cube.frame()
+        trends.extend([
+            f"Most popular jewelry category: {_rollup(cube, 'category').idxmax()}",
+            f"Most expensive metal on average: {_mean_by(cube, 'metal', 'price').idxmax()}",
+            f"Most popular stone: {_rollup(cube, 'stone').idxmax()}"
+        ])
+        category_value = _mean_by(cube, 'category', 'weight') / _mean_by(cube, 'category', 'price') * 1000
+        value.append(f"Best value jewelry category: {category_value.sort_values(ascending=False).index[0]}")
+
+    if diamonds is not None:
+        cube = diamonds.cube.frame()
+        trends.extend([f"Most popular diamond {column}: {_rollup(cube, column).idxmax()}"
+                       for column in ('cut', 'color', 'clarity')])
+        value.append(f"Best value diamond cut: {_mean_by(cube, 'cut', 'value_score').idxmax()}")
+
+    return {'market_trends': trends, 'value_analysis': value}
+
+
+def build_analytics(jewelry: Optional[CatalogAggregator], diamonds: Optional[CatalogAggregator],
+                    previous: Optional[Dict] = None) -> Dict:
+    """
+    Analytics of the streamed kinds, on top of ``previous`` (an earlier
+    dataset_analytics.json): a kind that was not streamed keeps its section,
+    and correlations and patterns, which the stream cannot compute, are kept.
+    Cross-catalog insights need both kinds, so they are only recomputed when
+    both were streamed or there is nothing to keep.
+    """
+    analytics = dict(previous or {})
+    analytics.setdefault('correlations', {})
+    analytics.setdefault('patterns', {})
+    if jewelry is not None:
+        analytics['jewelry'] = jewelry_analytics(jewelry)
+    if diamonds is not None:
+        analytics['diamonds'] = diamonds_analytics(diamonds)
+    if (jewelry is not None and diamonds is not None) or not analytics.get('insights'):
+        analytics['insights'] = cross_insights(jewelry, diamonds)
+    analytics.setdefault('jewelry', {})
+    analytics.setdefault('diamonds', {})
+    return analytics
+
+
+def _previous_analytics(out_dir: str) -> Optional[Dict]:
+    """The last ingest's analytics in ``out_dir``, else the trainer's, else None"""
+    for path in (os.path.join(out_dir, 'dataset_analytics.json'), os.path.join(MODELS_DIR, 'dataset_analytics.json')):
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def _jsonable(data):
+    if isinstance(data, dict):
+        return {str(key): _jsonable(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_jsonable(item) for item in data]
+    if isinstance(data, np.generic):
+        return data.item()
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Ingest
+# ---------------------------------------------------------------------------
+
+def ingest(sources: Dict[str, str], out_dir: str = SERVING_DIR, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+           sample_rows: int = DEFAULT_SAMPLE_ROWS, seed: int = 0, progress: bool = False) -> Dict:
+    """
+    Stream each ``{kind: path}`` source and write the serving artifacts under ``out_dir``:
+    dataset_analytics.json, catalog_cube_<kind>.csv and <kind>_dataset.csv.
+    """
+    start = time.perf_counter()
+    aggregators = {kind: aggregate(read_chunks(path, kind, chunk_rows), kind, sample_rows, seed, progress)
+                   for kind, path in sources.items()}
+    previous = _previous_analytics(out_dir)
+    analytics = build_analytics(aggregators.get('jewelry'), aggregators.get('diamonds'), previous)
+    streamed_rows = dict((previous or {}).get('ingest', {}).get('rows', {}))
+    streamed_rows.update({kind: aggregator.rows for kind, aggregator in aggregators.items()})
+    analytics['ingest'] = {
+        'streamed': True,
+        'rows': streamed_rows,
+        'chunk_rows': chunk_rows,
+        'median': f'approximate, from a uniform sample of {sample_rows:,} rows'
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for kind, aggregator in aggregators.items():
+        for path, frame in ((os.path.join(out_dir, f'catalog_cube_{kind}.csv'), aggregator.cube.frame()),
+                            (os.path.join(out_dir, f'{kind}_dataset.csv'),
+                             aggregator.sample.frame(KINDS[kind]['columns']))):
+            frame.to_csv(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+            written.append(path)
+    path = os.path.join(out_dir, 'dataset_analytics.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(_jsonable(analytics), f, indent=2, default=str)
+    os.replace(path + '.tmp', path)
+    written.append(path)
+
+    return {
+        'rows': {kind: aggregator.rows for kind, aggregator in aggregators.items()},
+        'cube_cells': {kind: len(aggregator.cube.frame()) for kind, aggregator in aggregators.items()},
+        'serving_rows': {kind: len(aggregator.sample.kept) for kind, aggregator in aggregators.items()},
+        'files': written,
+        'seconds': round(time.perf_counter() - start, 2),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss /
+                            (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Stream a catalog into analytics, cubes and a serving sample")
+    parser.add_argument('--jewelry', help="jewelry CSV or npy catalog directory")
+    parser.add_argument('--diamonds', help="diamonds CSV or npy catalog directory")
+    parser.add_argument('--out-dir', default=SERVING_DIR,
+                        help="where the analytics, cubes and samples go (default: models/serving, "
+                             "which SERVING_CATALOG=1 reads)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--sample-rows', type=int, default=DEFAULT_SAMPLE_ROWS,
+                        help="uniform serving sample size per catalog")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sources = {kind: path for kind, path in (('jewelry', args.jewelry), ('diamonds', args.diamonds)) if path}
+    if not sources:
+        parser.error("give --jewelry and/or --diamonds")
+    result = ingest(sources, args.out_dir, args.chunk_rows, args.sample_rows, args.seed, progress=True)
+    for kind, rows in result['rows'].items():
+        print(f"✅ {kind}: {rows:,} rows -> {result['cube_cells'][kind]:,} cube cells, "
+              f"{result['serving_rows'][kind]:,} serving rows")
+    print(f"✅ Wrote {len(result['files'])} files in {result['seconds']}s (peak RSS {result['max_rss_mb']} MB)")
+
+
+if __name__ == '__main__':
+    main()
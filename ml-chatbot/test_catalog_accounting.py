@@ -0,0 +1,73 @@
+"""
+Test script checking that CATALOG_ACCOUNTING charges the handlers' ColumnarCatalog reads
+Boots the advanced service with accounting on and reads the per-handler row counters
+"""
+
+import os
+import sys
+
+os.environ['CATALOG_ACCOUNTING'] = '1'
+os.environ['CATALOG_ACCOUNTING_ALLOC'] = '0'
+os.environ.setdefault('HOT_PATH_LOGS', '0')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import advanced_ml_service as service
+from catalog_accounting import AccountedCatalog, CatalogAccountant, OPS, ROWS
+
+
+def _rows(handler: str) -> float:
+    return ROWS._values.get((handler,), 0)
+
+
+def _catalog_ops(handler: str) -> int:
+    return sum(count for (name, op), count in OPS._values.items()
+               if name == handler and op.startswith(('jewelry_catalog.', 'diamonds_catalog.')))
+
+
+def test_catalogs_are_accounted():
+    assert isinstance(service.bot.jewelry_catalog, AccountedCatalog)
+    assert isinstance(service.bot.diamonds_catalog, AccountedCatalog)
+
+
+def test_recommendation_touches_rows():
+    before = _rows('_handle_recommendation_query')
+    service.bot._handle_recommendation_query({'products': ['ring'], 'materials': ['gold']}, 'recommend a gold ring')
+    assert _rows('_handle_recommendation_query') > before
+    assert _catalog_ops('_handle_recommendation_query') > 0
+
+
+def test_clustered_lookup_charges_its_run():
+    catalog = service.bot.jewelry_catalog
+    probe = CatalogAccountant(track_allocations=False).wrap('_clustered_probe', lambda: catalog.equals('category', 'ring'))
+    before = _rows('_clustered_probe')
+    run = probe()
+    charged = _rows('_clustered_probe') - before
+    assert isinstance(run, range), "category is a cluster key, so equals should return a run"
+    assert charged == len(run) < len(catalog)
+
+
+def test_analytics_endpoint_touches_rows():
+    before = _rows('analytics')
+    with service.app.test_client() as client:
+        assert client.get('/analytics').status_code == 200
+    assert _rows('analytics') > before
+    assert _catalog_ops('analytics') > 0
+
+
+def main() -> bool:
+    print("🧪 Checking catalog accounting...")
+    tests = [test_catalogs_are_accounted, test_recommendation_touches_rows, test_clustered_lookup_charges_its_run,
+             test_analytics_endpoint_touches_rows]
+    failures = []
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            failures.append(test.__name__)
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,57 @@
+"""
+Test script checking compiled answers against the live handlers
+Compiles each bot's table afresh into a temporary file, then replays the benchmark corpus
+and random cross-intent messages; every table hit must equal what the handler renders now.
+
+advanced_signature / intelligent_signature mirror the handlers' branching by hand, so a
+handler that starts reading a new word fails here instead of serving a stale answer.
+"""
+
+import os
+import sys
+import tempfile
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault('HOT_PATH_LOGS', '0')
+sys.path.insert(0, ML_DIR)
+sys.path.insert(0, os.path.join(ML_DIR, 'benchmarks'))
+
+from answer_compiler import SPECS, AnswerTable, _load_bot, compile_answers, dataset_version, verify, write_table
+from engine_benchmark import load_corpus
+
+SAMPLES = int(os.getenv('COMPILED_PARITY_SAMPLES', '2000'))
+
+
+def check_parity(name: str):
+    """Mismatching messages between a freshly compiled table and the live handler of ``name``"""
+    # The services read their datasets relative to ml-chatbot
+    os.chdir(ML_DIR)
+    bot = _load_bot(name)
+    spec = SPECS[type(bot).__name__]
+    answers, _ = compile_answers(bot, spec)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(spec.table_path))
+        write_table(path, answers, {'bot': type(bot).__name__, 'dataset_version': dataset_version(bot)})
+        report = verify(bot, SAMPLES, [query for query, _ in load_corpus()], AnswerTable(path))
+    print(f"{'✅' if not report['mismatches'] else '❌'} {name}: {report['hits']} of {report['messages']} "
+          f"messages answered from the table, {len(report['mismatches'])} mismatches")
+    return report['mismatches']
+
+
+def test_advanced_parity():
+    mismatches = check_parity('advanced')
+    assert not mismatches, mismatches[:5]
+
+
+def test_intelligent_parity():
+    mismatches = check_parity('intelligent')
+    assert not mismatches, mismatches[:5]
+
+
+def main() -> bool:
+    print("🧪 Checking compiled answers against the live handlers...")
+    return not any([check_parity('advanced'), check_parity('intelligent')])
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,69 @@
+"""
+Test script asserting each chat service's import + init stays within its cold-start budget
+Budgets are seconds per service; override one with STARTUP_BUDGET_<SERVICE>=seconds (e.g. STARTUP_BUDGET_ADVANCED=12)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from startup_profile import profile_service
+
+# Measured import + init with generous headroom for slower machines.
+# advanced trains its classifiers at startup; the others only import.
+STARTUP_BUDGETS = {
+    'advanced': 10.0,
+    'intelligent': 1.5,
+    'ml_models': 1.5,
+    'lightweight': 0.75,
+    'comprehensive': 0.75,
+    'simple': 0.75,
+}
+
+# Best of N fresh processes, so a one-off hiccup or bytecode compilation does not fail the run
+RUNS = int(os.getenv('STARTUP_BUDGET_RUNS', '2'))
+
+
+def check_startup_budgets(services=None):
+    """Names of the services over budget or failing to start"""
+    print("🧪 Checking cold-start budgets...")
+    failures = []
+    for name in services or STARTUP_BUDGETS:
+        budget = float(os.getenv(f'STARTUP_BUDGET_{name.upper()}', STARTUP_BUDGETS[name]))
+        reports = [profile_service(name, top=3) for _ in range(RUNS)]
+        errors = [report for report in reports if 'error' in report]
+        if errors:
+            print(f"❌ {name}: {errors[0]['error']}")
+            failures.append(name)
+            continue
+
+        best = min(reports, key=lambda report: report['import_init_s'])
+        slowest = ', '.join(f"{row['module']} {row['cumulative_ms']:g}ms" for row in best['top_imports'])
+        if best['import_init_s'] > budget:
+            print(f"❌ {name}: {best['import_init_s']:.2f}s > {budget:g}s budget (slowest imports: {slowest})")
+            failures.append(name)
+        else:
+            print(f"✅ {name}: {best['import_init_s']:.2f}s (budget {budget:g}s)")
+
+    if failures:
+        print(f"\n❌ Over budget: {', '.join(failures)}")
+    else:
+        print("\n✅ Every service starts within budget")
+    return failures
+
+
+def test_startup_budgets():
+    failures = check_startup_budgets()
+    assert not failures, f"over budget: {', '.join(failures)}"
+
+
+def main(services=None):
+    """Script entry point; True when every service is within budget"""
+    return not check_startup_budgets(services)
+
+
+if __name__ == "__main__":
+    unknown = [name for name in sys.argv[1:] if name not in STARTUP_BUDGETS]
+    if unknown:
+        sys.exit(f"unknown service(s): {', '.join(unknown)}")
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -22,6 +22,7 @@ if os.path.exists(module_path):
     enhanced_mod = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(enhanced_mod)
     EnhancedJewelryBotTrainer = enhanced_mod.EnhancedJewelryBotTrainer
+    parse_training_args = enhanced_mod.parse_training_args
 else:
     # If module is not present at runtime, raise early with clear message
     raise ImportError(f"enhanced_train_models.py not found in {training_dir}")
@@ -30,8 +31,8 @@ def main():
     print("🚀 Starting Enhanced ML Training with Real Datasets...")
     print("=" * 60)
     
-    # Initialize trainer
-    trainer = EnhancedJewelryBotTrainer()
+    # Initialize trainer (pass --fast for the early-stopping tf.data mode)
+    trainer = EnhancedJewelryBotTrainer(**parse_training_args())
     
     # Start training process
     try:
@@ -1,6 +1,7 @@
 """
 Enhanced ML Training Pipeline for Jewelry Chatbot using Real Datasets
 """
+import argparse
 import json
 import numpy as np
 import pandas as pd
@@ -9,18 +10,28 @@ from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
-import pickle
 import os
 import re
+import sys
 import requests
 from datetime import datetime
 import zipfile
 from io import StringIO
+from scipy import sparse
+from input_pipeline import EpochStats, load_checkpoint, make_dataset, make_sparse_dataset, training_callbacks
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from artifact_store import ArtifactStore
+from catalog_generator import generate_catalog
 
 class EnhancedJewelryBotTrainer:
-    def __init__(self):
+    def __init__(self, fast_mode=False, batch_size=256, max_epochs=100, patience=5, resume=False):
         """
         Initialize the enhanced ML trainer with real dataset integration
+
+        ``fast_mode`` trains through a prefetching tf.data pipeline at
+        ``batch_size`` with early stopping on validation loss and best-weight
+        checkpointing; ``resume`` continues from the last checkpoint.
         """
         self.vectorizer = TfidfVectorizer(
             max_features=10000,
@@ -34,6 +45,15 @@ class EnhancedJewelryBotTrainer:
         self.price_model = None
         self.recommendation_model = None
         
+        # Training mode
+        self.fast_mode = fast_mode
+        self.batch_size = batch_size
+        self.max_epochs = max_epochs
+        self.patience = patience
+        self.resume = resume
+        self.checkpoint_dir = os.path.join(os.path.dirname(__file__), '..', 'models', 'checkpoints')
+        self.training_stats = {}
+        
         # Dataset storage
         self.diamonds_data = None
         self.jewelry_data = None
@@ -67,98 +87,15 @@ class EnhancedJewelryBotTrainer:
         """
         Create synthetic diamonds dataset based on real diamond characteristics
         """
-        np.random.seed(42)
-        n_samples = 5000
-        
-        # Diamond characteristics based on real data
-        cuts = ['Ideal', 'Premium', 'Very Good', 'Good', 'Fair']
-        colors = ['D', 'E', 'F', 'G', 'H', 'I', 'J']
-        clarities = ['FL', 'IF', 'VVS1', 'VVS2', 'VS1', 'VS2', 'SI1', 'SI2']
-        
-        data = {
-            'carat': np.random.uniform(0.2, 5.0, n_samples),
-            'cut': np.random.choice(cuts, n_samples),
-            'color': np.random.choice(colors, n_samples),
-            'clarity': np.random.choice(clarities, n_samples),
-            'depth': np.random.uniform(50, 80, n_samples),
-            'table': np.random.uniform(50, 70, n_samples),
-            'x': np.random.uniform(3, 10, n_samples),
-            'y': np.random.uniform(3, 10, n_samples),
-            'z': np.random.uniform(2, 7, n_samples)
-        }
-        
-        # Generate realistic prices based on 4Cs
-        prices = []
-        for i in range(n_samples):
-            base_price = 1000
-            # Carat weight impact (exponential)
-            base_price *= (data['carat'][i] ** 2) * 1000
-            # Cut quality impact
-            cut_multipliers = {'Ideal': 1.2, 'Premium': 1.15, 'Very Good': 1.1, 'Good': 1.0, 'Fair': 0.9}
-            base_price *= cut_multipliers[data['cut'][i]]
-            # Color impact
-            color_multipliers = {'D': 1.3, 'E': 1.25, 'F': 1.2, 'G': 1.15, 'H': 1.1, 'I': 1.0, 'J': 0.95}
-            base_price *= color_multipliers[data['color'][i]]
-            # Clarity impact
-            clarity_multipliers = {'FL': 1.5, 'IF': 1.4, 'VVS1': 1.3, 'VVS2': 1.2, 'VS1': 1.1, 'VS2': 1.0, 'SI1': 0.9, 'SI2': 0.8}
-            base_price *= clarity_multipliers[data['clarity'][i]]
-            
-            prices.append(max(200, base_price + np.random.normal(0, base_price * 0.1)))
-        
-        data['price'] = prices
-        self.diamonds_data = pd.DataFrame(data)
+        self.diamonds_data = generate_catalog('diamonds', 5000, seed=42, categorical=False)
         print(f"✓ Created synthetic diamonds dataset: {len(self.diamonds_data)} samples")
     
     def create_comprehensive_jewelry_dataset(self):
         """
         Create comprehensive jewelry dataset with various categories
         """
-        np.random.seed(42)
-        
-        # Jewelry categories and their characteristics
-        categories = {
-            'ring': {
-                'types': ['engagement', 'wedding', 'cocktail', 'statement', 'eternity'],
-                'metals': ['gold', 'platinum', 'silver', 'white gold', 'rose gold'],
-                'stones': ['diamond', 'sapphire', 'emerald', 'ruby', 'pearl'],
-                'price_range': (500, 50000)
-            },
-            'necklace': {
-                'types': ['chain', 'pendant', 'choker', 'tennis', 'statement'],
-                'metals': ['gold', 'platinum', 'silver', 'white gold'],
-                'stones': ['diamond', 'pearl', 'gemstone', 'none'],
-                'price_range': (200, 30000)
-            },
-            'earrings': {
-                'types': ['stud', 'drop', 'hoop', 'chandelier', 'huggie'],
-                'metals': ['gold', 'platinum', 'silver', 'white gold'],
-                'stones': ['diamond', 'pearl', 'gemstone', 'none'],
-                'price_range': (150, 15000)
-            },
-            'bracelet': {
-                'types': ['tennis', 'chain', 'bangle', 'charm', 'cuff'],
-                'metals': ['gold', 'platinum', 'silver', 'white gold'],
-                'stones': ['diamond', 'gemstone', 'none'],
-                'price_range': (300, 20000)
-            }
-        }
-        
-        jewelry_records = []
-        for category, details in categories.items():
-            for _ in range(1000):  # 1000 items per category
-                record = {
-                    'category': category,
-                    'type': np.random.choice(details['types']),
-                    'metal': np.random.choice(details['metals']),
-                    'stone': np.random.choice(details['stones']),
-                    'weight': np.random.uniform(1, 50),  # grams
-                    'size': np.random.uniform(5, 12) if category == 'ring' else np.random.uniform(10, 30),
-                    'brand': np.random.choice(['luxury', 'designer', 'classic', 'modern', 'vintage']),
-                    'price': np.random.uniform(*details['price_range'])
-                }
-                jewelry_records.append(record)
-        
-        self.jewelry_data = pd.DataFrame(jewelry_records)
+        # 1000 items per category (ring, necklace, earrings, bracelet)
+        self.jewelry_data = generate_catalog('jewelry', 4000, seed=42, categorical=False)
         print(f"✓ Created jewelry dataset: {len(self.jewelry_data)} samples")
     
     def generate_qa_from_datasets(self):
@@ -254,13 +191,7 @@ class EnhancedJewelryBotTrainer:
         self.price_model.compile(optimizer='adam', loss='mse', metrics=['mae'])
         
         # Train model
-        history = self.price_model.fit(
-            X_train, y_train,
-            epochs=100,
-            batch_size=32,
-            validation_data=(X_test, y_test),
-            verbose=1
-        )
+        history = self._fit_model('price_model', self.price_model, X_train, y_train, X_test, y_test, epochs=100)
         
         # Evaluate
         predictions = self.price_model.predict(X_test)
@@ -345,18 +276,74 @@ class EnhancedJewelryBotTrainer:
         
         self.intent_model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
         
-        history = self.intent_model.fit(
-            X_train.toarray(), y_train,
-            epochs=50,
-            batch_size=32,
-            validation_data=(X_test.toarray(), y_test),
-            verbose=1
-        )
+        # TF-IDF stays sparse; batches are densified one at a time
+        history = self._fit_model('intent_model', self.intent_model, X_train, y_train, X_test, y_test, epochs=50)
         
-        y_pred = np.argmax(self.intent_model.predict(X_test.toarray()), axis=1)
+        y_pred = np.argmax(self.intent_model.predict(make_sparse_dataset(X_test, batch_size=self.batch_size)), axis=1)
         accuracy = accuracy_score(y_test, y_pred)
         print(f"Enhanced Intent Classifier Accuracy: {accuracy:.4f}")
     
+    def _fit_model(self, name, model, X_train, y_train, X_val, y_val, epochs):
+        """
+        Fit a Keras model, recording per-epoch wall-clock and throughput.
+
+        The default mode keeps the original fixed-epoch schedule; fast mode
+        uses the tf.data pipeline with early stopping, best-weight
+        checkpointing and optional resume. Sparse inputs are streamed as
+        dense mini-batches in either mode.
+        """
+        is_sparse = sparse.issparse(X_train)
+        
+        def pipeline(X, y, batch_size, shuffle=False):
+            if is_sparse:
+                return make_sparse_dataset(X, y, batch_size, shuffle=shuffle)
+            return make_dataset(X, y, batch_size, shuffle=shuffle)
+        
+        if not self.fast_mode:
+            stats = EpochStats(X_train.shape[0])
+            history = model.fit(
+                pipeline(X_train, y_train, 32, shuffle=True),
+                epochs=epochs,
+                validation_data=pipeline(X_val, y_val, 32),
+                callbacks=[stats],
+                verbose=1
+            )
+            self.training_stats[name] = {'mode': 'standard', 'batch_size': 32, **stats.summary()}
+            return history
+        
+        # Best weights are what training keeps; the last epoch's are where a resumed run continues
+        checkpoint_path = os.path.join(self.checkpoint_dir, f'{name}.weights.h5')
+        last_weights_path = os.path.join(self.checkpoint_dir, f'{name}.last.weights.h5')
+        state_path = os.path.join(self.checkpoint_dir, f'{name}.state.json')
+        
+        state = {'last_epoch': 0, 'best_val_loss': None, 'early_stopping': None, 'best_weights': None}
+        if self.resume:
+            state = load_checkpoint(model, checkpoint_path, state_path, last_weights_path)
+        
+        callbacks = training_callbacks(checkpoint_path, self.patience, state['best_val_loss'],
+                                       state['early_stopping'], state['best_weights'])
+        stats = EpochStats(X_train.shape[0], state_path=state_path, best_val_loss=state['best_val_loss'],
+                           last_weights_path=last_weights_path, early_stopping=callbacks[0])
+        history = model.fit(
+            pipeline(X_train, y_train, self.batch_size, shuffle=True),
+            epochs=self.max_epochs,
+            initial_epoch=state['last_epoch'],
+            validation_data=pipeline(X_val, y_val, self.batch_size),
+            callbacks=callbacks + [stats],
+            verbose=2
+        )
+        
+        self.training_stats[name] = {
+            'mode': 'fast',
+            'batch_size': self.batch_size,
+            'max_epochs': self.max_epochs,
+            'patience': self.patience,
+            'resumed_from_epoch': state['last_epoch'],
+            'checkpoint': f'checkpoints/{name}.weights.h5',
+            **stats.summary()
+        }
+        return history
+    
     def preprocess_text(self, text):
         """Enhanced text preprocessing"""
         if not isinstance(text, str):
@@ -367,37 +354,16 @@ class EnhancedJewelryBotTrainer:
         return text
     
     def save_enhanced_models(self):
-        """Save all trained models and data"""
+        """Save all trained models and data; models go to a new artifact store version, made CURRENT when complete"""
         model_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
         os.makedirs(model_dir, exist_ok=True)
         
-        # Save models
-        if self.intent_model:
-            self.intent_model.save(os.path.join(model_dir, 'enhanced_intent_model.h5'))
-        
-        if self.price_model:
-            self.price_model.save(os.path.join(model_dir, 'price_prediction_model.h5'))
-        
-        # Save preprocessors
-        with open(os.path.join(model_dir, 'enhanced_vectorizer.pkl'), 'wb') as f:
-            pickle.dump(self.vectorizer, f)
-        
-        with open(os.path.join(model_dir, 'enhanced_label_encoder.pkl'), 'wb') as f:
-            pickle.dump(self.label_encoder, f)
-        
-        with open(os.path.join(model_dir, 'price_scaler.pkl'), 'wb') as f:
-            pickle.dump(self.price_scaler, f)
-        
-        # Save datasets
-        if self.diamonds_data is not None:
-            self.diamonds_data.to_csv(os.path.join(model_dir, 'diamonds_dataset.csv'), index=False)
-        
-        if self.jewelry_data is not None:
-            self.jewelry_data.to_csv(os.path.join(model_dir, 'jewelry_dataset.csv'), index=False)
-        
-        # Save Q&A data
-        with open(os.path.join(model_dir, 'dataset_qa_pairs.json'), 'w') as f:
-            json.dump(self.synthetic_qa_data, f, indent=2)
+        # Datasets stay loose files, read by every service; replace them atomically
+        for data, name in ((self.diamonds_data, 'diamonds_dataset.csv'), (self.jewelry_data, 'jewelry_dataset.csv')):
+            if data is not None:
+                path = os.path.join(model_dir, name)
+                data.to_csv(path + '.tmp', index=False)
+                os.replace(path + '.tmp', path)
         
         # Save metadata
         metadata = {
@@ -410,17 +376,51 @@ class EnhancedJewelryBotTrainer:
                 'price_prediction': self.price_model is not None,
                 'intent_classification': self.intent_model is not None,
                 'dataset_integration': True
-            }
+            },
+            'training_stats': self.training_stats
         }
         
-        with open(os.path.join(model_dir, 'enhanced_model_metadata.json'), 'w') as f:
-            json.dump(metadata, f, indent=2)
+        store = ArtifactStore(model_dir, 'enhanced')
+        with store.new_version(metadata) as version:
+            # Save models
+            if self.intent_model:
+                self.intent_model.save(version.path('enhanced_intent_model.h5'))
+            
+            if self.price_model:
+                self.price_model.save(version.path('price_prediction_model.h5'))
+            
+            # Save preprocessors
+            version.save_pickle('enhanced_vectorizer.pkl', self.vectorizer)
+            version.save_pickle('enhanced_label_encoder.pkl', self.label_encoder)
+            version.save_pickle('price_scaler.pkl', self.price_scaler)
+            
+            # Save Q&A data
+            version.save_json('dataset_qa_pairs.json', self.synthetic_qa_data)
+            version.save_json('enhanced_model_metadata.json', metadata)
         
-        print(f"✓ Enhanced models saved to {model_dir}")
+        print(f"✓ Enhanced models saved to {model_dir} as version {version.version}")
+
+def parse_training_args(argv=None):
+    """Parse training-mode command line flags into trainer keyword arguments"""
+    parser = argparse.ArgumentParser(description="Train the enhanced jewelry chatbot models")
+    parser.add_argument('--fast', action='store_true',
+                        help="tf.data pipeline with early stopping and best-weight checkpointing")
+    parser.add_argument('--batch-size', type=int, default=256, help="batch size in fast mode")
+    parser.add_argument('--epochs', type=int, default=100, help="maximum epochs in fast mode")
+    parser.add_argument('--patience', type=int, default=5, help="early stopping patience (epochs)")
+    parser.add_argument('--resume', action='store_true', help="resume from the last checkpoint")
+    args = parser.parse_args(argv)
+    return {
+        'fast_mode': args.fast,
+        'batch_size': args.batch_size,
+        'max_epochs': args.epochs,
+        'patience': args.patience,
+        'resume': args.resume
+    }
 
 def main():
     """Main training function for enhanced chatbot"""
-    trainer = EnhancedJewelryBotTrainer()
+    trainer = EnhancedJewelryBotTrainer(**parse_training_args())
     trainer.train_enhanced_chatbot()
     
     print("\n=== Enhanced Training Summary ===")
@@ -0,0 +1,214 @@
+"""
+Shared tf.data input pipeline and training callbacks for the Keras trainers
+"""
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+
+def make_dataset(X, y, batch_size=256, shuffle=False, seed=42):
+    """
+    Build a batched, prefetching tf.data pipeline from in-memory arrays
+    """
+    X = np.asarray(X, dtype=np.float32)
+    dataset = tf.data.Dataset.from_tensor_slices((X, y))
+    if shuffle:
+        dataset = dataset.shuffle(len(X), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def make_sparse_dataset(X, y=None, batch_size=256, shuffle=False, seed=42):
+    """
+    Stream a scipy CSR matrix as dense mini-batches.
+
+    Only one ``batch_size x n_features`` block is densified at a time, so
+    memory stays flat no matter how many rows the TF-IDF matrix has.
+    """
+    X = X.tocsr()
+    n_rows, n_features = X.shape
+    labels = None if y is None else np.asarray(y)
+    epoch = [0]
+
+    def batches():
+        order = np.arange(n_rows)
+        if shuffle:
+            np.random.default_rng(seed + epoch[0]).shuffle(order)
+            epoch[0] += 1
+        for start in range(0, n_rows, batch_size):
+            rows = order[start:start + batch_size]
+            dense = X[rows].toarray().astype(np.float32, copy=False)
+            if labels is None:
+                yield dense
+            else:
+                yield dense, labels[rows]
+
+    feature_spec = tf.TensorSpec(shape=(None, n_features), dtype=tf.float32)
+    if labels is None:
+        signature = feature_spec
+    else:
+        signature = (feature_spec, tf.TensorSpec(shape=(None,), dtype=tf.as_dtype(labels.dtype)))
+
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class ResumableEarlyStopping(tf.keras.callbacks.EarlyStopping):
+    """
+    EarlyStopping that continues a previous run's patience.
+
+    Keras resets ``wait``, ``best`` and the best weights at the start of
+    every fit; ``resume_state`` (from ``state()``) and ``best_weights`` put
+    them back, so a resumed run stops when the uninterrupted one would have.
+    """
+
+    def __init__(self, resume_state=None, best_weights=None, **kwargs):
+        super().__init__(**kwargs)
+        self.resume_state = resume_state
+        self.resume_weights = best_weights
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        if self.resume_state and self.resume_state.get('best') is not None:
+            self.wait = self.resume_state['wait']
+            self.best = self.resume_state['best']
+            self.best_epoch = self.resume_state['best_epoch']
+            self.best_weights = self.resume_weights
+
+    def state(self):
+        return {
+            'wait': self.wait,
+            'best': float(self.best) if self.best is not None else None,
+            'best_epoch': self.best_epoch
+        }
+
+
+class EpochStats(tf.keras.callbacks.Callback):
+    """
+    Record wall-clock time and samples/sec for every epoch.
+
+    When ``state_path`` is given the last completed epoch, best validation
+    loss and ``early_stopping``'s counters are written there after each
+    epoch, and the epoch's weights to ``last_weights_path``, so an
+    interrupted run can resume where it stopped.
+    """
+
+    def __init__(self, n_samples, state_path=None, best_val_loss=None, last_weights_path=None,
+                 early_stopping=None):
+        super().__init__()
+        self.n_samples = n_samples
+        self.state_path = state_path
+        self.last_weights_path = last_weights_path
+        self.early_stopping = early_stopping
+        self.epochs = []
+        self.best_val_loss = best_val_loss
+        self._epoch_start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        seconds = time.perf_counter() - self._epoch_start
+        val_loss = logs.get('val_loss')
+        self.epochs.append({
+            'epoch': epoch + 1,
+            'seconds': round(seconds, 4),
+            'samples_per_sec': round(self.n_samples / seconds, 1) if seconds > 0 else None,
+            'loss': float(logs['loss']) if 'loss' in logs else None,
+            'val_loss': float(val_loss) if val_loss is not None else None
+        })
+
+        if val_loss is not None and (self.best_val_loss is None or val_loss < self.best_val_loss):
+            self.best_val_loss = float(val_loss)
+
+        if self.last_weights_path:
+            # Keras insists on the .weights.h5 suffix; replace so a crash keeps the previous epoch's file
+            temporary = self.last_weights_path[:-len('.weights.h5')] + '.tmp.weights.h5'
+            self.model.save_weights(temporary)
+            os.replace(temporary, self.last_weights_path)
+
+        if self.state_path:
+            state = {'last_epoch': epoch + 1, 'best_val_loss': self.best_val_loss}
+            if self.early_stopping is not None:
+                state['early_stopping'] = self.early_stopping.state()
+            with open(self.state_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(self.state_path + '.tmp', self.state_path)
+
+    def summary(self):
+        """Timing summary suitable for the metadata JSON"""
+        total = sum(e['seconds'] for e in self.epochs)
+        return {
+            'epochs_run': len(self.epochs),
+            'wall_clock_seconds': round(total, 4),
+            'mean_samples_per_sec': round(self.n_samples * len(self.epochs) / total, 1) if total > 0 else None,
+            'best_val_loss': self.best_val_loss,
+            'per_epoch': self.epochs
+        }
+
+
+def load_checkpoint(model, checkpoint_path, state_path, last_weights_path):
+    """
+    Restore a previous run: ``model`` gets the last completed epoch's weights.
+
+    Returns the saved state (``last_epoch``, ``best_val_loss`` and
+    ``early_stopping``) plus ``best_weights``, the best checkpoint for
+    early stopping to restore. The state is empty when there is nothing
+    usable to resume from (no checkpoint, or a checkpoint from an
+    incompatible model); a best checkpoint without last-epoch weights,
+    from an older run, only warm-starts training from epoch 0.
+    """
+    empty_state = {'last_epoch': 0, 'best_val_loss': None, 'early_stopping': None, 'best_weights': None}
+    if not os.path.exists(checkpoint_path):
+        return empty_state
+
+    try:
+        model.load_weights(checkpoint_path)
+        best_weights = model.get_weights()
+        if not os.path.exists(last_weights_path):
+            print(f"Warning: no last-epoch weights at {last_weights_path}; warm-starting from the best checkpoint")
+            return empty_state
+        model.load_weights(last_weights_path)
+    except Exception as e:
+        print(f"Warning: could not resume from {checkpoint_path}: {e}")
+        return empty_state
+
+    state = dict(empty_state)
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state.update(json.load(f))
+    state['best_weights'] = best_weights
+
+    print(f"✓ Resumed from {last_weights_path} (epoch {state['last_epoch']})")
+    return state
+
+
+def training_callbacks(checkpoint_path, patience=5, best_val_loss=None, early_stopping_state=None,
+                       best_weights=None):
+    """
+    Early stopping on validation loss plus best-weight checkpointing.
+
+    ``best_val_loss`` carries the best score of a resumed run so the
+    checkpoint is not overwritten by a worse first epoch;
+    ``early_stopping_state`` and ``best_weights`` carry its patience.
+    """
+    os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+    return [
+        ResumableEarlyStopping(
+            resume_state=early_stopping_state,
+            best_weights=best_weights,
+            monitor='val_loss',
+            patience=patience,
+            restore_best_weights=True
+        ),
+        tf.keras.callbacks.ModelCheckpoint(
+            checkpoint_path,
+            monitor='val_loss',
+            save_best_only=True,
+            save_weights_only=True,
+            initial_value_threshold=best_val_loss
+        )
+    ]
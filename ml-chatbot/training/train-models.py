@@ -6,10 +6,14 @@ from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report
-import pickle
 import os
 import re
+import sys
 from datetime import datetime
+from input_pipeline import make_sparse_dataset
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from artifact_store import ArtifactStore, save_response_data
 
 class JewelryBotTrainer:
     def __init__(self):
@@ -143,17 +147,16 @@ class JewelryBotTrainer:
             metrics=['accuracy']
         )
         
-        # Train model
+        # Train model on sparse TF-IDF, densifying one mini-batch at a time
         history = self.intent_model.fit(
-            X_train.toarray(), y_train,
+            make_sparse_dataset(X_train, y_train, batch_size=32, shuffle=True),
             epochs=50,
-            batch_size=32,
-            validation_data=(X_test.toarray(), y_test),
+            validation_data=make_sparse_dataset(X_test, y_test, batch_size=32),
             verbose=1
         )
         
         # Evaluate
-        y_pred = np.argmax(self.intent_model.predict(X_test.toarray()), axis=1)
+        y_pred = np.argmax(self.intent_model.predict(make_sparse_dataset(X_test, batch_size=32)), axis=1)
         accuracy = accuracy_score(y_test, y_pred)
         
         print(f"Intent Classifier Accuracy: {accuracy:.4f}")
@@ -198,30 +201,13 @@ class JewelryBotTrainer:
     
     def save_models(self):
         """
-        Save trained models and preprocessors
+        Save trained models and preprocessors as a new artifact store version
+        
+        Nothing is overwritten in place: the version is staged, checksummed
+        and only then made CURRENT, so services never see a partial save.
         """
         model_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
         
-        # Save intent model
-        intent_model_path = os.path.join(model_dir, 'intent_model.h5')
-        self.intent_model.save(intent_model_path)
-        
-        # Save vectorizer
-        vectorizer_path = os.path.join(model_dir, 'vectorizer.pkl')
-        with open(vectorizer_path, 'wb') as f:
-            pickle.dump(self.vectorizer, f)
-        
-        # Save label encoder
-        encoder_path = os.path.join(model_dir, 'label_encoder.pkl')
-        with open(encoder_path, 'wb') as f:
-            pickle.dump(self.label_encoder, f)
-        
-        # Save response data
-        response_path = os.path.join(model_dir, 'response_data.pkl')
-        with open(response_path, 'wb') as f:
-            pickle.dump(self.response_data, f)
-        
-        # Save model metadata
         metadata = {
             'training_date': datetime.now().isoformat(),
             'model_version': '1.0',
@@ -230,11 +216,16 @@ class JewelryBotTrainer:
             'categories': self.training_data['categories']
         }
         
-        metadata_path = os.path.join(model_dir, 'model_metadata.json')
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        store = ArtifactStore(model_dir, 'basic')
+        with store.new_version(metadata) as version:
+            self.intent_model.save(version.path('intent_model.h5'))
+            version.save_pickle('vectorizer.pkl', self.vectorizer)
+            version.save_pickle('label_encoder.pkl', self.label_encoder)
+            # question_vectors are stored as memory-mappable sparse components
+            save_response_data(version, self.response_data)
+            version.save_json('model_metadata.json', metadata)
         
-        print(f"Models saved to {model_dir}")
+        print(f"Models saved to {model_dir} as version {version.version}")
     
     def train_full_pipeline(self):
         """
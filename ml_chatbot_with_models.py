@@ -9,40 +9,82 @@ import re
 import os
 import sys
 import pickle
-from flask import Flask, request, jsonify
+import hashlib
+import copy
+import time
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 
 # Suppress TensorFlow warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
-try:
-    # Allow opting out of TensorFlow import for environments where it's
-    # incompatible (for example, newer Python versions). Set SKIP_TF=1 to
-    # force the fallback engine.
-    if os.getenv('SKIP_TF', '0') == '1':
-        raise ImportError('SKIP_TF set')
-    import tensorflow as tf
-    print("✓ TensorFlow loaded")
-except Exception as e:
-    # Catch any exception (ImportError, ABI mismatch, runtime errors) so the
-    # service can still run in fallback mode without crashing during import.
-    print(f"✗ TensorFlow import failed or skipped ({e}) - will use fallback")
-    tf = None
-
 # Ensure stdout can handle Unicode on Windows
 try:
     sys.stdout.reconfigure(encoding='utf-8')
 except Exception:
     pass
 
+# Shared serving utilities live next to the other services
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml-chatbot'))
+from lazy_imports import lazy_module, is_loaded
+from single_flight import SingleFlight
+from semantic_cache import cache_from_env
+from engine_router import EngineRouter
+from service_logging import configure_logging, hot_logger, logging_stats
+from live_profiler import debug_authorized, install_profile_endpoint
+from catalog_accounting import accountant_from_env
+from slow_requests import annotate, install_slow_request_endpoint, watchdog_from_env
+from progressive_boot import BootProgress, install_health_endpoints, progressive_boot_enabled, start_background
+from snapshots import SnapshotManager
+from artifact_store import ArtifactError, artifact_path, open_current, pointer_paths
+from catalog_schema import TRAINING_ONLY, compact_enabled, compact_frame
+from catalog_core import ColumnarCatalog, cluster_keys
+from service_metrics import (REGISTRY, REQUESTS, REQUEST_SECONDS, ERRORS, PROMETHEUS_CONTENT_TYPE,
+                             stage, stats_collector)
+
+# Allow opting out of TensorFlow import for environments where it's
+# incompatible (for example, newer Python versions). Set SKIP_TF=1 to
+# force the fallback engine. Otherwise TensorFlow is only located here;
+# it is imported when load_ml_models finds a model file to load, so a
+# deployment without .h5 models never pays its multi-second import.
+if os.getenv('SKIP_TF', '0') == '1':
+    print("✗ TensorFlow skipped (SKIP_TF set) - will use fallback")
+    tf = None
+else:
+    tf = lazy_module('tensorflow')
+    if tf is None:
+        print("✗ TensorFlow not installed - will use fallback")
+
 app = Flask(__name__)
 CORS(app)
 
+# Identical in-flight /chat messages share one computation
+chat_flight = SingleFlight()
+
+configure_logging('ml_chatbot_with_models')
+prediction_log = hot_logger('ml_prediction')
+override_log = hot_logger('heuristic_override')
+
 class MLJewelryChatbot:
+    # Candidate locations, first existing one wins; the hot-reload watcher polls all of them
+    JEWELRY_PATHS = ['ml-chatbot/models/jewelry_dataset.csv', 'jewelry_dataset.csv', 'models/jewelry_dataset.csv']
+    DIAMOND_PATHS = ['ml-chatbot/models/diamonds_dataset.csv', 'diamonds_dataset.csv', 'models/diamonds_dataset.csv']
+    MODEL_DIR = 'ml-chatbot/models'
+    MODEL_FILES = ['enhanced_intent_model.h5', 'enhanced_vectorizer.pkl', 'enhanced_label_encoder.pkl',
+                   'intent_model.h5', 'vectorizer.pkl', 'label_encoder.pkl',
+                   'price_prediction_model.h5', 'price_scaler.pkl']
+    # Substrings the query handlers branch on, in the order they are checked
+    SEARCH_CATEGORIES = ('ring', 'necklace', 'earring', 'bracelet')
+    MATERIAL_ORDER = ('platinum', 'gold', 'silver')
+    
     def __init__(self):
         self.jewelry_data = None
         self.diamonds_data = None
+        self.jewelry_catalog = None
         self.knowledge_base = {}
+        self.dataset_paths = []
+        self.model_paths = []
+        self.dataset_version = ''
         
         # ML model components
         self.intent_model = None
@@ -50,46 +92,69 @@ class MLJewelryChatbot:
         self.vectorizer = None
         self.label_encoder = None
         self.price_scaler = None
+        self.semantic_cache = None
         
         # Status flags
         self.ml_models_loaded = False
         
-        print("Initializing ML-Powered Chatbot...")
-        self.load_datasets()
-        self.load_ml_models()
-        self.build_knowledge()
-        print("Chatbot ready!")
+        # Loading happens in boot_chatbot, in stages, so a bare instance is
+        # already a working regex engine
+        self.dataset_version = self._dataset_version()
+    
+    def finalize(self):
+        """Derive the per-load state (semantic cache, dataset version) once components have loaded"""
+        if self.vectorizer is not None:
+            self.semantic_cache = cache_from_env(len(getattr(self.vectorizer, 'vocabulary_', {})))
+        self.dataset_version = self._dataset_version()
     
     def load_datasets(self):
         """Load jewelry and diamond datasets"""
         try:
-            paths = [
-                'ml-chatbot/models/jewelry_dataset.csv',
-                'jewelry_dataset.csv',
-                'models/jewelry_dataset.csv'
-            ]
-            
-            for path in paths:
+            for path in self.JEWELRY_PATHS:
                 if os.path.exists(path):
                     self.jewelry_data = pd.read_csv(path)
+                    if compact_enabled():
+                        self.jewelry_data = compact_frame(self.jewelry_data, 'jewelry')
+                    self.jewelry_catalog = ColumnarCatalog.from_frame(self.jewelry_data, cluster_by=cluster_keys('jewelry'))
+                    self.dataset_paths.append(path)
                     print(f"✓ Loaded {len(self.jewelry_data)} jewelry items from {path}")
                     break
             
-            paths = [
-                'ml-chatbot/models/diamonds_dataset.csv',
-                'diamonds_dataset.csv',
-                'models/diamonds_dataset.csv'
-            ]
-            
-            for path in paths:
+            for path in self.DIAMOND_PATHS:
                 if os.path.exists(path):
                     self.diamonds_data = pd.read_csv(path)
+                    if compact_enabled():
+                        self.diamonds_data = compact_frame(self.diamonds_data, 'diamonds', drop=TRAINING_ONLY['diamonds'])
+                    self.dataset_paths.append(path)
                     print(f"✓ Loaded {len(self.diamonds_data)} diamonds from {path}")
                     break
                     
         except Exception as e:
             print(f"✗ Error loading datasets: {e}")
     
+    def _dataset_version(self):
+        """Short fingerprint of the loaded dataset and model files and engine"""
+        digest = hashlib.sha256(f"ml={self.ml_models_loaded}".encode())
+        for path in self.dataset_paths + self.model_paths:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:16]
+    
+    @classmethod
+    def source_fingerprint(cls):
+        """Size and mtime of every candidate dataset and model file; changes when any is replaced, added or removed"""
+        paths = cls.JEWELRY_PATHS + cls.DIAMOND_PATHS + [os.path.join(cls.MODEL_DIR, name) for name in cls.MODEL_FILES]
+        # Publishing or rolling back a store version only rewrites a CURRENT pointer
+        paths += pointer_paths(cls.MODEL_DIR)
+        fingerprint = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        return tuple(fingerprint)
+    
     def load_ml_models(self):
         """Load trained ML models (.h5 and .pkl files)"""
         if tf is None:
@@ -97,12 +162,24 @@ class MLJewelryChatbot:
             return
         
         try:
-            model_dir = 'ml-chatbot/models'
+            model_dir = self.MODEL_DIR
+            self.model_paths = []
+            
+            # Each trainer's CURRENT store version when there is one, else the loose files
+            versions = {}
+            for lineage in ('enhanced', 'basic'):
+                try:
+                    versions[lineage] = open_current(model_dir, lineage)
+                    if versions[lineage] is not None:
+                        print(f"✓ Using {lineage} artifact store version {versions[lineage].version}")
+                except ArtifactError as e:
+                    print(f"✗ {lineage} artifact store unusable ({e}), using loose model files")
+                    versions[lineage] = None
             
             # Try to load enhanced models first
-            enhanced_intent_path = os.path.join(model_dir, 'enhanced_intent_model.h5')
-            enhanced_vec_path = os.path.join(model_dir, 'enhanced_vectorizer.pkl')
-            enhanced_enc_path = os.path.join(model_dir, 'enhanced_label_encoder.pkl')
+            enhanced_intent_path = artifact_path(model_dir, 'enhanced_intent_model.h5', versions['enhanced'])
+            enhanced_vec_path = artifact_path(model_dir, 'enhanced_vectorizer.pkl', versions['enhanced'])
+            enhanced_enc_path = artifact_path(model_dir, 'enhanced_label_encoder.pkl', versions['enhanced'])
             
             if os.path.exists(enhanced_intent_path):
                 self.intent_model = tf.keras.models.load_model(enhanced_intent_path, compile=False)
@@ -117,12 +194,13 @@ class MLJewelryChatbot:
                 print(f"✓ Loaded enhanced label encoder")
                 print(f"  Intent classes: {self.label_encoder.classes_}")
                 
+                self.model_paths += [enhanced_intent_path, enhanced_vec_path, enhanced_enc_path]
                 self.ml_models_loaded = True
             else:
                 # Fallback to basic models
-                intent_path = os.path.join(model_dir, 'intent_model.h5')
-                vec_path = os.path.join(model_dir, 'vectorizer.pkl')
-                enc_path = os.path.join(model_dir, 'label_encoder.pkl')
+                intent_path = artifact_path(model_dir, 'intent_model.h5', versions['basic'])
+                vec_path = artifact_path(model_dir, 'vectorizer.pkl', versions['basic'])
+                enc_path = artifact_path(model_dir, 'label_encoder.pkl', versions['basic'])
                 
                 if os.path.exists(intent_path):
                     self.intent_model = tf.keras.models.load_model(intent_path, compile=False)
@@ -136,20 +214,23 @@ class MLJewelryChatbot:
                         self.label_encoder = pickle.load(f)
                     print(f"✓ Loaded basic label encoder")
                     
+                    self.model_paths += [intent_path, vec_path, enc_path]
                     self.ml_models_loaded = True
             
             # Try to load price prediction model
-            price_model_path = os.path.join(model_dir, 'price_prediction_model.h5')
-            price_scaler_path = os.path.join(model_dir, 'price_scaler.pkl')
+            price_model_path = artifact_path(model_dir, 'price_prediction_model.h5', versions['enhanced'])
+            price_scaler_path = artifact_path(model_dir, 'price_scaler.pkl', versions['enhanced'])
             
             if os.path.exists(price_model_path):
                 self.price_model = tf.keras.models.load_model(price_model_path, compile=False)
                 print(f"✓ Loaded price prediction model")
+                self.model_paths.append(price_model_path)
                 
                 if os.path.exists(price_scaler_path):
                     with open(price_scaler_path, 'rb') as f:
                         self.price_scaler = pickle.load(f)
                     print(f"✓ Loaded price scaler")
+                    self.model_paths.append(price_scaler_path)
             
             if self.ml_models_loaded:
                 print("✓✓✓ ML MODELS SUCCESSFULLY LOADED - Using Neural Networks ✓✓✓")
@@ -161,6 +242,17 @@ class MLJewelryChatbot:
             print("  Falling back to pattern matching")
             self.ml_models_loaded = False
     
+    def warm_up(self):
+        """Run one throwaway prediction; Keras traces its graph on the first call, which is slow"""
+        if not self.ml_models_loaded:
+            return
+        try:
+            start = time.perf_counter()
+            self.intent_model.predict(self.vectorizer.transform(['hello']).toarray(), verbose=0)
+            print(f"✓ Warm-up prediction in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"✗ Warm-up prediction failed: {e}")
+    
     def build_knowledge(self):
         """Build knowledge base from datasets"""
         if self.jewelry_data is not None:
@@ -246,27 +338,60 @@ class MLJewelryChatbot:
         q = query.lower()
         return bool(re.search(r'\b(compare|comparison|difference|differ|better|best|versus|vs|between|which one)\b', q))
     
+    def _handler_signature(self, handler, query):
+        """
+        What ``handler`` reads from the query, with the same substring checks
+        it branches on; handlers not listed here answer from the catalog alone
+        """
+        q = query.lower()
+        name = getattr(handler, '__name__', None)
+        if name == 'handle_search':
+            return next((cat for cat in self.SEARCH_CATEGORIES if cat in q), None)
+        if name == 'handle_material':
+            return next((metal for metal in self.MATERIAL_ORDER if metal in q), None)
+        if name == 'handle_comparison':
+            return tuple(metal in q for metal in self.MATERIAL_ORDER)
+        return None
+    
+    def respond_with_cache(self, intent, handler, query):
+        """Run the intent handler, reusing a near-duplicate query's answer when cached"""
+        if self.semantic_cache is None:
+            return handler(query)
+        
+        input_vector = self.vectorizer.transform([self.preprocess_text(query)])
+        fingerprint = self.semantic_cache.fingerprint(input_vector)
+        # The fingerprint only sees TF-IDF terms, while the handlers match substrings ('golden' reads as gold)
+        guard = (intent, getattr(handler, '__name__', None), self._handler_signature(handler, query))
+        response = self.semantic_cache.get(fingerprint, guard)
+        if response is None:
+            response = handler(query)
+            self.semantic_cache.put(fingerprint, guard, response)
+        return response
+    
     def classify_intent_ml(self, query):
         """Use NEURAL NETWORK to classify intent"""
         if not self.ml_models_loaded:
             return None
         
         try:
-            # Preprocess
-            processed = self.preprocess_text(query)
-            
-            # Vectorize using trained TF-IDF
-            input_vector = self.vectorizer.transform([processed])
+            with stage('tfidf'):
+                # Preprocess
+                processed = self.preprocess_text(query)
+                
+                # Vectorize using trained TF-IDF
+                input_vector = self.vectorizer.transform([processed])
             
             # Predict with neural network
-            predictions = self.intent_model.predict(input_vector.toarray(), verbose=0)
+            with stage('model'):
+                predictions = self.intent_model.predict(input_vector.toarray(), verbose=0)
             predicted_idx = np.argmax(predictions[0])
             confidence = float(predictions[0][predicted_idx])
             
             # Decode intent
             intent = self.label_encoder.inverse_transform([predicted_idx])[0]
             
-            print(f"[ML PREDICTION] Intent: {intent}, Confidence: {confidence:.3f}")
+            prediction_log.info("[ML PREDICTION] Intent: %s, Confidence: %.3f", intent, confidence,
+                                extra={'intent': intent, 'confidence': round(confidence, 3)})
             return intent, confidence
             
         except Exception as e:
@@ -325,15 +450,15 @@ class MLJewelryChatbot:
         if kb.get('categories'):
             response += "**Jewelry Categories:**\n"
             for cat in kb['categories'][:10]:
-                if self.jewelry_data is not None:
-                    count = len(self.jewelry_data[self.jewelry_data['category'] == cat])
+                if self.jewelry_catalog is not None:
+                    count = len(self.jewelry_catalog.equals('category', cat))
                     response += f"• {cat.capitalize()}: {count:,} pieces\n"
         
         if kb.get('materials'):
             response += "\n**Premium Materials:**\n"
             for mat in kb['materials'][:8]:
-                if self.jewelry_data is not None and mat and str(mat) != 'nan':
-                    count = len(self.jewelry_data[self.jewelry_data['metal'] == mat])
+                if self.jewelry_catalog is not None and mat and str(mat) != 'nan':
+                    count = len(self.jewelry_catalog.equals('metal', mat))
                     response += f"• {mat}: {count:,} pieces\n"
         
         if kb.get('price_min'):
@@ -347,26 +472,27 @@ class MLJewelryChatbot:
     
     def handle_search(self, query):
         """Handle product search"""
-        if self.jewelry_data is None:
+        catalog = self.jewelry_catalog
+        if catalog is None:
             return "I apologize, but I'm currently unable to access our inventory."
         
         q = query.lower()
-        results = self.jewelry_data.copy()
+        results = range(len(catalog))
         
         # Simple category filtering
-        for cat in ['ring', 'necklace', 'earring', 'bracelet']:
+        for cat in self.SEARCH_CATEGORIES:
             if cat in q:
-                results = results[results['category'].str.contains(cat, case=False, na=False)]
+                results = catalog.contains('category', cat, results)
                 break
         
         if len(results) == 0:
-            return f"I couldn't find exact matches. We have {len(self.jewelry_data):,} pieces total. Try /collections!"
+            return f"I couldn't find exact matches. We have {len(catalog):,} pieces total. Try /collections!"
         
         response = f"**Found {len(results):,} pieces**\n\n"
         
-        for idx, item in results.head(5).iterrows():
-            response += f"• {item.get('category', 'Jewelry').capitalize()}"
-            if 'metal' in item and pd.notna(item['metal']):
+        for item in catalog.records(catalog.head(results, 5)):
+            response += f"• {(item.get('category') or 'Jewelry').capitalize()}"
+            if item.get('metal') is not None:
                 response += f" - {item['metal']}"
             if 'price' in item and pd.notna(item['price']):
                 response += f" - ${item['price']:,.0f}"
@@ -492,6 +618,7 @@ class MLJewelryChatbot:
 
     def handle_material(self, query):
         """Handle material questions (gold, platinum, silver)"""
+        # Checked in MATERIAL_ORDER; _handler_signature mirrors this
         q = query.lower()
         if 'platinum' in q:
             note = "Platinum: naturally white, durable, hypoallergenic; typically higher cost."
@@ -543,19 +670,128 @@ class MLJewelryChatbot:
         handler = handlers.get(intent, self.handle_general)
         return handler(query)
 
-# Initialize chatbot
-chatbot = MLJewelryChatbot()
+# Opt-in rows/allocation accounting per handler call (CATALOG_ACCOUNTING=1)
+catalog_accountant = accountant_from_env()
+
+BOOT_STAGES = ('datasets', 'models', 'warmup')
+boot = BootProgress(BOOT_STAGES)
+reload_progress = None
+
+def _prepare(bot):
+    if catalog_accountant is not None:
+        # Instrument a copy so the staged bot, which later stages copy, stays unwrapped
+        bot = copy.copy(bot)
+        catalog_accountant.instrument(bot, ('jewelry_data', 'diamonds_data', 'jewelry_catalog'),
+                                      lambda name: name.startswith('handle_'))
+    return bot
+
+def _track_published(bot):
+    # Module attribute kept for scripts and benchmarks that drive the bot directly
+    global chatbot
+    chatbot = bot
+
+# Requests pin the current bot; boot stages and reloads swap in new ones atomically
+snapshots = SnapshotManager(prepare=_prepare, on_publish=_track_published)
+
+def load_chatbot(progress, on_stage=None):
+    """Load datasets, then models and a warm-up prediction; ``on_stage`` receives the catalog-only bot in between"""
+    staged = MLJewelryChatbot()
+    with progress.stage('datasets'):
+        staged.load_datasets()
+        staged.build_knowledge()
+    progress.note('datasets', f"{staged.knowledge_base.get('total_jewelry', 0):,} jewelry, "
+                              f"{staged.knowledge_base.get('total_diamonds', 0):,} diamonds")
+    staged.finalize()
+    if on_stage is not None:
+        on_stage(staged)
+        # Published bots are never mutated; later stages work on a copy
+        staged = copy.copy(staged)
+    
+    with progress.stage('models'):
+        staged.load_ml_models()
+    progress.note('models', 'neural network' if staged.ml_models_loaded else 'no models, regex fallback')
+    with progress.stage('warmup'):
+        staged.warm_up()
+    staged.finalize()
+    return staged
+
+def boot_chatbot():
+    """Boot in stages, publishing the catalog-backed regex engine before the models load"""
+    print("Initializing ML-Powered Chatbot...")
+    bot = load_chatbot(boot, on_stage=lambda staged: snapshots.publish(staged, 'boot: datasets'))
+    snapshots.publish(bot, 'boot')
+    print("Chatbot ready!")
+
+def reload_chatbot():
+    """Build a complete replacement bot from the files on disk; published by the snapshot manager"""
+    global reload_progress
+    reload_progress = BootProgress(BOOT_STAGES)
+    return load_chatbot(reload_progress)
+
+# PROGRESSIVE_BOOT=1 serves the regex engine at once and loads everything in the background
+snapshots.publish(MLJewelryChatbot(), 'boot: regex')
+if progressive_boot_enabled():
+    start_background(boot, boot_chatbot)
+else:
+    boot_chatbot()
+
+# SNAPSHOT_WATCH_SECONDS=N reloads when a dataset or model file changes
+if float(os.getenv('SNAPSHOT_WATCH_SECONDS', '0')) > 0:
+    snapshots.watch(MLJewelryChatbot.source_fingerprint, reload_chatbot, float(os.getenv('SNAPSHOT_WATCH_SECONDS')))
 
 @app.route('/health', methods=['GET'])
 def health():
+    snapshot = boot.snapshot()
+    bot = snapshots.current
     return jsonify({
         'status': 'healthy',
-        'ml_models_loaded': chatbot.ml_models_loaded,
-        'jewelry_items': chatbot.knowledge_base.get('total_jewelry', 0),
-        'diamonds': chatbot.knowledge_base.get('total_diamonds', 0),
-        'engine': 'Neural Network ML' if chatbot.ml_models_loaded else 'Pattern Matching Fallback'
+        'live': True,
+        'ready': snapshot['ready'],
+        'boot': snapshot,
+        'snapshot': snapshots.stats(),
+        'ml_models_loaded': bot.ml_models_loaded,
+        'tensorflow_loaded': is_loaded('tensorflow'),
+        'jewelry_items': bot.knowledge_base.get('total_jewelry', 0),
+        'diamonds': bot.knowledge_base.get('total_diamonds', 0),
+        'engine': 'Neural Network ML' if bot.ml_models_loaded else 'Pattern Matching Fallback',
+        'single_flight': chat_flight.stats(),
+        'engines': engine_router.stats(),
+        'semantic_cache': bot.semantic_cache.stats() if bot.semantic_cache is not None else None
+    })
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Rebuild datasets and models from disk in the background and swap them in; token-guarded like /debug"""
+    if not debug_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    if not snapshots.reload_async(reload_chatbot, 'admin'):
+        return jsonify({'error': 'Reload already running', 'snapshot': snapshots.stats()}), 409
+    return jsonify({'accepted': True, 'serving': snapshots.version}), 202
+
+@app.route('/admin/reload', methods=['GET'])
+def admin_reload_status():
+    if not debug_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({
+        'snapshot': snapshots.stats(),
+        'progress': reload_progress.snapshot() if reload_progress is not None else None
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint with per-stage chat latency histograms"""
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+# GET /health/live and /health/ready for orchestrator probes
+install_health_endpoints(app, boot)
+
+# Token-guarded POST /debug/profile; idle until called
+install_profile_endpoint(app)
+
+# Requests over SLOW_REQUEST_MS, readable at GET /debug/slow
+slow_watchdog = watchdog_from_env()
+install_slow_request_endpoint(app, slow_watchdog)
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
@@ -565,28 +801,50 @@ def chat():
         if not message:
             return jsonify({'error': 'No message provided'}), 400
         
-        # First, attempt ML intent classification (if available) to get confidence
-        ml_pred = None
+        # Per-request latency budget from the caller, else CHAT_DEADLINE_MS
         try:
-            ml_pred = chatbot.classify_intent_ml(message) if chatbot.ml_models_loaded else None
-        except Exception:
-            ml_pred = None
-
-        # Decision: prefer ML when it provides a prediction (use ML regardless of confidence)
-        engine = 'dataset'
-        fallback_reason = None
-
-        if ml_pred:
-            intent_ml, confidence_ml = ml_pred
-            # Use ML pipeline (prefer ML). However, ensure the reply is related to the
-            # user's query: if the ML model returns a generic/educational intent but the
-            # query clearly requests a search or pricing result, reroute to the
-            # dataset-backed handlers so the response is dataset-grounded and relevant.
+            deadline_ms = float(data.get('deadline_ms') or request.headers.get('X-Deadline-Ms') or 0) or None
+        except (TypeError, ValueError):
+            deadline_ms = None
+        
+        # The request finishes on the snapshot current now, even if a reload swaps in another.
+        # Concurrent identical questions (case and spacing aside) on one snapshot share an answer
+        with snapshots.use(), REQUEST_SECONDS.time(), slow_watchdog.track(message):
+            key = (snapshots.version, ' '.join(message.lower().split()))
+            answer = chat_flight.do(key, lambda: engine_router.route(message, deadline_ms))
+            annotate(intent=answer.get('intent'))
+        REQUESTS.inc(intent=answer.get('intent', ''), engine=answer.get('engine', ''))
+        return jsonify(answer)
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        ERRORS.inc(stage='endpoint', type=type(e).__name__)
+        return jsonify({'error': str(e)}), 500
 
-            # Heuristic override: detect concrete intents and override if ML intent is wrong or low confidence
-            q_lower = message.lower()
-            overridden = False
+def answer_with_ml(bot, message):
+    """ML engine: neural intent + heuristic overrides; None when the model is unavailable"""
+    # First, attempt ML intent classification (if available) to get confidence
+    ml_pred = None
+    try:
+        ml_pred = bot.classify_intent_ml(message) if bot.ml_models_loaded else None
+    except Exception:
+        ml_pred = None
 
+    # Decision: prefer ML when it provides a prediction (use ML regardless of confidence)
+    engine = 'dataset'
+    fallback_reason = None
+
+    if ml_pred:
+        intent_ml, confidence_ml = ml_pred
+        # Use ML pipeline (prefer ML). However, ensure the reply is related to the
+        # user's query: if the ML model returns a generic/educational intent but the
+        # query clearly requests a search or pricing result, reroute to the
+        # dataset-backed handlers so the response is dataset-grounded and relevant.
+
+        # Heuristic override: detect concrete intents and override if ML intent is wrong or low confidence
+        q_lower = message.lower()
+        overridden = False
+        with stage('override'):
             # Greeting detection - highest priority (allow trailing words like "there", "everyone")
             if re.match(r'^\s*(hi|hello|hey|greetings|good\s+(morning|afternoon|evening))(\s+(there|everyone|folks))?\s*[!.?]*\s*$', q_lower, re.IGNORECASE):
                 intent_ml = 'greeting'
@@ -596,123 +854,155 @@ def chat():
                 intent_ml = 'inventory'
                 overridden = True
             # Specific domain intents
-            elif chatbot._is_appointment_like(q_lower):
+            elif bot._is_appointment_like(q_lower):
                 intent_ml = 'appointment'
                 overridden = True
-            elif chatbot._is_shipping_like(q_lower):
+            elif bot._is_shipping_like(q_lower):
                 intent_ml = 'shipping'
                 overridden = True
-            elif chatbot._is_returns_like(q_lower):
+            elif bot._is_returns_like(q_lower):
                 intent_ml = 'returns'
                 overridden = True
-            elif chatbot._is_customization_like(q_lower):
+            elif bot._is_customization_like(q_lower):
                 intent_ml = 'customization'
                 overridden = True
-            elif chatbot._is_sizing_like(q_lower):
+            elif bot._is_sizing_like(q_lower):
                 intent_ml = 'sizing'
                 overridden = True
-            elif chatbot._is_care_like(q_lower):
+            elif bot._is_care_like(q_lower):
                 intent_ml = 'care'
                 overridden = True
-            elif chatbot._is_comparison_like(q_lower):
+            elif bot._is_comparison_like(q_lower):
                 intent_ml = 'comparison'
                 overridden = True
-            elif chatbot._is_material_like(q_lower):
+            elif bot._is_material_like(q_lower):
                 intent_ml = 'material'
                 overridden = True
             # Search/pricing overrides for low confidence or generic/wrong intents
             elif intent_ml in ('education', 'general', 'diamond_info', 'general_info', 'custom_design', 'ring_info', 'jewelry_info') or confidence_ml < 0.75:
-                if chatbot._is_search_like(q_lower):
+                if bot._is_search_like(q_lower):
                     intent_ml = 'search'
                     overridden = True
-                elif chatbot._is_pricing_like(q_lower):
+                elif bot._is_pricing_like(q_lower):
                     intent_ml = 'pricing'
                     overridden = True
-            
-            if overridden:
-                print(f"[HEURISTIC OVERRIDE] ML->'{intent_ml}' for query: {q_lower}")
-            
-            # Map ML model intents to handler functions
-            handlers = {
-                # Direct mappings
-                'inventory': chatbot.handle_inventory,
-                'search': chatbot.handle_search,
-                'pricing': chatbot.handle_pricing,
-                'education': chatbot.handle_education,
-                'material': chatbot.handle_material,
-                'comparison': chatbot.handle_comparison,
-                'customization': chatbot.handle_customization,
-                'sizing': chatbot.handle_sizing,
-                'care': chatbot.handle_care,
-                'appointment': chatbot.handle_appointment,
-                'diamond_info': chatbot.handle_education,
-                'greeting': chatbot.handle_greeting,
-                'gratitude': lambda q: "You're welcome! Feel free to ask anything.",
-                'general': chatbot.handle_general,
-                # ML model intent mappings
-                'general_info': chatbot.handle_general,
-                'jewelry_info': chatbot.handle_search,  # jewelry_info -> search handler
-                'ring_info': chatbot.handle_search,     # ring_info -> search handler
-                'custom_design': chatbot.handle_customization, # custom_design -> customization handler
-                'care': chatbot.handle_care,                   # care -> care handler
-            }
-
-            handler = handlers.get(intent_ml, chatbot.handle_general)
-            response_text = handler(message)
-
-            engine = 'ml'
-            return jsonify({
-                'response': response_text,
-                'intent': intent_ml,
-                'confidence': float(confidence_ml),
-                'ml_powered': True,
-                'engine': engine
-            })
-
-        # ML not available -> use dataset handlers (regex)
-        regex_intent, regex_conf = chatbot.classify_intent_regex(message)
-
+        
+        if overridden:
+            override_log.info("[HEURISTIC OVERRIDE] ML->'%s' for query: %s", intent_ml, q_lower,
+                              extra={'intent': intent_ml, 'query': q_lower})
+        
+        # Map ML model intents to handler functions
         handlers = {
-            'inventory': chatbot.handle_inventory,
-            'search': chatbot.handle_search,
-            'pricing': chatbot.handle_pricing,
-            'education': chatbot.handle_education,
-            'material': chatbot.handle_material,
-            'comparison': chatbot.handle_comparison,
-            'customization': chatbot.handle_customization,
-            'sizing': chatbot.handle_sizing,
-            'care': chatbot.handle_care,
-            'appointment': chatbot.handle_appointment,
-            'diamond_info': chatbot.handle_education,
-            'greeting': chatbot.handle_greeting,
+            # Direct mappings
+            'inventory': bot.handle_inventory,
+            'search': bot.handle_search,
+            'pricing': bot.handle_pricing,
+            'education': bot.handle_education,
+            'material': bot.handle_material,
+            'comparison': bot.handle_comparison,
+            'customization': bot.handle_customization,
+            'sizing': bot.handle_sizing,
+            'care': bot.handle_care,
+            'appointment': bot.handle_appointment,
+            'diamond_info': bot.handle_education,
+            'greeting': bot.handle_greeting,
             'gratitude': lambda q: "You're welcome! Feel free to ask anything.",
-            'general': chatbot.handle_general,
+            'general': bot.handle_general,
+            # ML model intent mappings
+            'general_info': bot.handle_general,
+            'jewelry_info': bot.handle_search,  # jewelry_info -> search handler
+            'ring_info': bot.handle_search,     # ring_info -> search handler
+            'custom_design': bot.handle_customization, # custom_design -> customization handler
+            'care': bot.handle_care,                   # care -> care handler
         }
 
-        handler = handlers.get(regex_intent, chatbot.handle_general)
-        response_text = handler(message)
+        handler = handlers.get(intent_ml, bot.handle_general)
+        with stage('handler'):
+            response_text = bot.respond_with_cache(intent_ml, handler, message)
 
-        return jsonify({
+        engine = 'ml'
+        return {
             'response': response_text,
-            'intent': regex_intent,
-            'confidence': float(regex_conf),
-            'ml_powered': False,
-            'engine': 'dataset',
-            'fallback_reason': 'ml_unavailable'
-        })
-    
-    except Exception as e:
-        print(f"Error: {e}")
-        return jsonify({'error': str(e)}), 500
+            'intent': intent_ml,
+            'confidence': float(confidence_ml),
+            'ml_powered': True,
+            'engine': engine
+        }
+
+    return None
+
+def answer_with_dataset(bot, message):
+    """Dataset engine: regex intent + dataset handlers, used when ML is unavailable or too slow"""
+    with stage('regex_classify'):
+        regex_intent, regex_conf = bot.classify_intent_regex(message)
+
+    handlers = {
+        'inventory': bot.handle_inventory,
+        'search': bot.handle_search,
+        'pricing': bot.handle_pricing,
+        'education': bot.handle_education,
+        'material': bot.handle_material,
+        'comparison': bot.handle_comparison,
+        'customization': bot.handle_customization,
+        'sizing': bot.handle_sizing,
+        'care': bot.handle_care,
+        'appointment': bot.handle_appointment,
+        'diamond_info': bot.handle_education,
+        'greeting': bot.handle_greeting,
+        'gratitude': lambda q: "You're welcome! Feel free to ask anything.",
+        'general': bot.handle_general,
+    }
+
+    handler = handlers.get(regex_intent, bot.handle_general)
+    with stage('handler'):
+        response_text = handler(message)
+
+    return {
+        'response': response_text,
+        'intent': regex_intent,
+        'confidence': float(regex_conf),
+        'ml_powered': False,
+        'engine': 'dataset'
+    }
+
+# ML first; the regex/dataset engine answers in-process when ML is missing or misses the deadline
+engine_router = EngineRouter(default_deadline_ms=int(os.getenv('CHAT_DEADLINE_MS', '2000')))
+engine_router.register('ml', snapshots.bound(answer_with_ml))
+engine_router.register('dataset', snapshots.bound(answer_with_dataset))
+
+def _engine_metrics():
+    """Per-engine answer and fallback counts from the router"""
+    stats = engine_router.stats()
+    return [
+        ('chat_engine_answered', 'gauge', 'Requests answered by each engine',
+         [({'engine': name}, count) for name, count in stats['answered'].items()]),
+        ('chat_engine_fallbacks', 'gauge', 'Engine fallbacks by reason',
+         [({'reason': reason}, count) for reason, count in stats['fallbacks'].items()])
+    ]
+
+REGISTRY.register_collector(stats_collector('chat_single_flight', chat_flight.stats))
+REGISTRY.register_collector(stats_collector('chat_logging', logging_stats))
+REGISTRY.register_collector(_engine_metrics)
+REGISTRY.register_collector(stats_collector('chat_boot', boot.stats))
+REGISTRY.register_collector(stats_collector('chat_snapshot', snapshots.stats))
+# Looked up per scrape: the published bot, and with it the cache, changes with every snapshot
+REGISTRY.register_collector(stats_collector(
+    'chat_semantic_cache',
+    lambda: snapshots.current.semantic_cache.stats() if snapshots.current.semantic_cache is not None else {}))
+
 
 if __name__ == '__main__':
     print("\n" + "="*70)
     print("ML-POWERED JEWELRY CHATBOT SERVER")
     print("="*70)
-    print(f"Engine: {'Neural Network ML' if chatbot.ml_models_loaded else 'Pattern Matching Fallback'}")
+    if not boot.ready:
+        print("Engine: Pattern Matching Fallback (models loading in background)")
+    else:
+        print(f"Engine: {'Neural Network ML' if chatbot.ml_models_loaded else 'Pattern Matching Fallback'}")
     print(f"Knowledge: {chatbot.knowledge_base.get('total_jewelry', 0):,} jewelry, {chatbot.knowledge_base.get('total_diamonds', 0):,} diamonds")
     print("Server: http://localhost:5000")
     print("Health: http://localhost:5000/health")
+    print("Metrics: http://localhost:5000/metrics")
     print("="*70 + "\n")
     
     app.run(host='0.0.0.0', port=5000, debug=False)